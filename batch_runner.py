@@ -0,0 +1,318 @@
+"""
+Offline batch runner.
+
+Replays conversations from a JSONL file through the agent graph without the
+Streamlit UI. Each input line is one conversation:
+
+    {"id": "ticket-1", "customer_id": 1, "turns": ["My order is late", "It's #12345"]}
+
+Every conversation starts at triage_agent in its own session, and up to
+`concurrency` conversations run at once. One result line per conversation
+(responses, handoffs, tool calls and timings) is appended to the output
+JSONL as soon as it finishes, so long runs can be watched and resumed.
+
+Usage:
+    python batch_runner.py tickets.jsonl results.jsonl --concurrency 16
+"""
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from collections import Counter
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Optional, TextIO
+
+import dotenv
+
+# Before config is imported, so its os.getenv defaults see .env values
+dotenv.load_dotenv()
+from pydantic import ValidationError
+
+import config
+from conversation_service import Conversation, ConversationService
+from logging_config import get_logger
+from metrics import start_exporters
+from models import (
+    BatchConversation,
+    BatchConversationResult,
+    BatchHandoff,
+    BatchToolCall,
+    BatchTurnResult,
+)
+from session_store import CustomerSession, SessionStore
+from session_summary import SummarizingSession
+
+logger = get_logger(__name__)
+
+# ConversationEvent types that end a turn, mapped to the recorded outcome
+_TURN_OUTCOMES = {
+    "turn_completed": "completed",
+    "input_blocked": "input_blocked",
+    "output_blocked": "output_blocked",
+    "error": "error",
+}
+
+
+# =============================================================================
+# INPUT / OUTPUT
+# =============================================================================
+
+
+def iter_batch_file(
+    path: str | Path,
+) -> Iterator[tuple[str, BatchConversation | None, Optional[str]]]:
+    """
+    Stream conversations from a JSONL file.
+
+    Yields:
+        (conversation id, parsed conversation or None, validation error or None)
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                conversation = BatchConversation.model_validate_json(line)
+            except ValidationError as e:
+                yield str(line_number), None, str(e)
+                continue
+            yield conversation.id or str(line_number), conversation, None
+
+
+def read_completed_ids(path: str | Path) -> set[str]:
+    """Return the IDs already present in an output file (for --resume)."""
+    completed: set[str] = set()
+    if not Path(path).exists():
+        return completed
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                completed.add(str(json.loads(line)["id"]))
+            except (json.JSONDecodeError, KeyError, TypeError):
+                continue
+    return completed
+
+
+# =============================================================================
+# BATCH RUNNER
+# =============================================================================
+
+
+class BatchRunner:
+    """Runs batch conversations through a ConversationService."""
+
+    def __init__(
+        self,
+        service: ConversationService,
+        store: SessionStore,
+        concurrency: int = config.BATCH_CONCURRENCY,
+    ):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.service = service
+        self.store = store
+        self.concurrency = concurrency
+        self.run_id = time.strftime("%Y%m%d%H%M%S")
+
+    async def run_conversation(
+        self, conversation_id: str, conversation: BatchConversation
+    ) -> BatchConversationResult:
+        """Replay every turn of one conversation and collect its results."""
+        started = time.perf_counter()
+        result = BatchConversationResult(
+            id=conversation_id, customer_id=conversation.customer_id, status="completed"
+        )
+        session = SummarizingSession(
+            CustomerSession(
+                conversation.customer_id,
+                session_id=f"batch-{self.run_id}-{conversation_id}",
+                store=self.store,
+            )
+        )
+        try:
+            state = self.service.new_conversation(conversation.customer_id, session=session)
+            for message in conversation.turns:
+                result.turns.append(await self._run_turn(state, message))
+            result.final_agent = state.agent.name
+        except Exception as e:
+            logger.error("Batch conversation %s failed: %s", conversation_id, e, exc_info=True)
+            result.status = "error"
+            result.error = str(e)
+        finally:
+            result.elapsed_seconds = time.perf_counter() - started
+        return result
+
+    async def _run_turn(self, state: Conversation, message: str) -> BatchTurnResult:
+        started = time.perf_counter()
+        response_parts: list[str] = []
+        handoffs: list[BatchHandoff] = []
+        tool_calls: list[BatchToolCall] = []
+        open_tools: dict[str, list[BatchToolCall]] = {}
+        first_token: Optional[float] = None
+        outcome = "error"
+        error: Optional[str] = "Turn ended without an outcome"
+        agent_name: Optional[str] = None
+        turn_id: Optional[str] = None
+
+        async for event in self.service.run_turn(state, message):
+            now = time.perf_counter() - started
+            agent_name = event.agent_name
+            turn_id = event.turn_id
+            if event.type == "text_delta":
+                if first_token is None:
+                    first_token = now
+                response_parts.append(event.text or "")
+            elif event.type == "agent_changed":
+                handoffs.append(
+                    BatchHandoff(
+                        from_agent=event.data["from_agent"],
+                        to_agent=event.agent_name,
+                        at_seconds=now,
+                        routed=event.data.get("routed"),
+                    )
+                )
+                # Only the last agent's message is the customer-facing response
+                response_parts = []
+            elif event.type == "tool_started":
+                call = BatchToolCall(
+                    tool=event.data["tool"], agent_name=event.agent_name, started_at_seconds=now
+                )
+                tool_calls.append(call)
+                open_tools.setdefault(call.tool, []).append(call)
+            elif event.type == "tool_finished":
+                pending = open_tools.get(event.data["tool"])
+                if pending:
+                    call = pending.pop(0)
+                    call.output = event.text
+                    call.elapsed_seconds = now - call.started_at_seconds
+            elif event.type in _TURN_OUTCOMES:
+                outcome = _TURN_OUTCOMES[event.type]
+                error = event.text if event.type == "error" else None
+
+        return BatchTurnResult(
+            message=message,
+            outcome=outcome,
+            agent_name=agent_name,
+            response="".join(response_parts) or None,
+            error=error,
+            handoffs=handoffs,
+            tool_calls=tool_calls,
+            first_token_seconds=first_token,
+            elapsed_seconds=time.perf_counter() - started,
+            turn_id=turn_id,
+        )
+
+    async def run(
+        self,
+        input_path: str | Path,
+        output: TextIO,
+        skip_ids: Optional[set[str]] = None,
+    ) -> Counter:
+        """
+        Replay every conversation in `input_path`, writing results as they finish.
+
+        The input is read lazily, so memory use depends on `concurrency`
+        rather than on the size of the file.
+
+        Args:
+            input_path: JSONL file of conversations
+            output: Text stream receiving one JSON result per line
+            skip_ids: Conversation IDs to skip (already processed)
+
+        Returns:
+            Counter of conversation statuses
+        """
+        skip_ids = skip_ids or set()
+        pending: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        statuses: Counter = Counter()
+        started = time.perf_counter()
+
+        def write(result: BatchConversationResult) -> None:
+            output.write(result.model_dump_json() + "\n")
+            output.flush()
+            statuses[result.status] += 1
+            done = sum(statuses.values())
+            if done % 100 == 0:
+                logger.info("Batch progress: %d conversations (%s)", done, dict(statuses))
+
+        async def worker() -> None:
+            while True:
+                item = await pending.get()
+                if item is None:
+                    return
+                conversation_id, conversation = item
+                write(await self.run_conversation(conversation_id, conversation))
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        try:
+            for conversation_id, conversation, error in iter_batch_file(input_path):
+                if conversation_id in skip_ids:
+                    statuses["skipped"] += 1
+                    continue
+                if conversation is None:
+                    logger.warning("Invalid batch record %s: %s", conversation_id, error)
+                    write(BatchConversationResult(id=conversation_id, status="invalid", error=error))
+                    continue
+                await pending.put((conversation_id, conversation))
+            for _ in workers:
+                await pending.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.to_thread(self.store.flush)
+
+        logger.info(
+            "Batch finished in %.1fs: %s", time.perf_counter() - started, dict(statuses)
+        )
+        return statuses
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay conversations from a JSONL file")
+    parser.add_argument("input", help="JSONL file of {id, customer_id, turns} records")
+    parser.add_argument("output", help="JSONL file receiving one result per conversation")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=config.BATCH_CONCURRENCY,
+        help="Conversations to run at once",
+    )
+    parser.add_argument(
+        "--db",
+        default=config.BATCH_SESSION_DB,
+        help="Session database for replayed conversations (default: a temporary file)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Append to the output and skip conversations already in it",
+    )
+    args = parser.parse_args()
+
+    config.validate_environment()
+
+    start_exporters()
+    skip_ids = read_completed_ids(args.output) if args.resume else set()
+    # A file database so replayed turns can read and write sessions
+    # concurrently (an in-memory one has a single connection)
+    temp_dir = None if args.db else tempfile.TemporaryDirectory(prefix="batch-sessions-")
+    store = SessionStore(args.db or Path(temp_dir.name) / "sessions.db")
+    service = ConversationService(max_concurrent_turns=args.concurrency)
+    runner = BatchRunner(service, store, concurrency=args.concurrency)
+    try:
+        with open(args.output, "a" if args.resume else "w", encoding="utf-8") as output:
+            statuses = asyncio.run(runner.run(args.input, output, skip_ids))
+    finally:
+        store.close()
+        if temp_dir is not None:
+            temp_dir.cleanup()
+    print(f"Wrote results to {args.output}: {dict(statuses)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""
+Benchmark suite.
+
+Measures where time goes in a customer support turn and reports p50, p95
+and p99 for each stage as JSON:
+
+- conversation: time to first token, full turn latency, handoff latency
+  (handoff call -> new agent active) and tool latency, measured from the
+  ConversationService event stream; locally routed turns have no handoff
+- router_off: the same conversations with the intent router off, so every
+  first message is handed off by the triage model; its handoff latency is
+  the LLM handoff overhead the router saves (skipped if the router is off)
+- guardrails: the off-topic input guardrail and the technical output
+  guardrail called directly, one at a time. These are isolated costs, not
+  per-turn overhead: in a turn the input guardrail runs alongside the
+  first model call
+- session: session store writes (queue and flush), full reads and page reads
+
+Use --mock to run against the local mock model (see mock_model.py) and
+measure the app's own overhead; without it the configured provider is used.
+
+Usage:
+    python benchmark.py --mock --turns 500 --concurrency 20 --output bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+import dotenv
+
+# Before config is imported, so its os.getenv defaults see .env values
+dotenv.load_dotenv()
+from agents import RunConfig, RunContextWrapper
+
+import config
+import customers
+import logging_config
+import model_provider
+from conversation_service import DEFAULT_SPECIALISTS, ConversationService
+from logging_config import get_logger
+from session_store import CustomerSession, SessionStore
+from session_summary import SummarizingSession
+
+logger = get_logger(__name__)
+
+DEFAULT_SCENARIOS: tuple[tuple[str, ...], ...] = (
+    ("Where is my order 12345? It was supposed to arrive yesterday.", "Thanks, can you expedite it?"),
+    ("I was charged twice this month and need a refund.", "How long will the refund take?"),
+    ("The app crashes with an error every time I open it.", "I already tried reinstalling."),
+    ("I forgot my password and can't log in.", "My email is still the same."),
+)
+
+
+# =============================================================================
+# STATISTICS
+# =============================================================================
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(values: list[float]) -> dict[str, float]:
+    """Count, mean and p50/p95/p99/max of a list of durations (seconds)."""
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "mean": statistics.fmean(ordered) if ordered else 0.0,
+        "p50": percentile(ordered, 50),
+        "p95": percentile(ordered, 95),
+        "p99": percentile(ordered, 99),
+        "max": ordered[-1] if ordered else 0.0,
+    }
+
+
+class Timings:
+    """Named lists of duration samples."""
+
+    def __init__(self):
+        self.samples: dict[str, list[float]] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self.samples.setdefault(name, []).append(seconds)
+
+    def report(self) -> dict[str, dict[str, float]]:
+        return {name: summarize(values) for name, values in sorted(self.samples.items())}
+
+
+# =============================================================================
+# BENCHMARKS
+# =============================================================================
+
+
+async def bench_conversations(
+    timings: Timings,
+    store: SessionStore,
+    turns: int,
+    concurrency: int,
+    route_new_issues: bool = config.INTENT_ROUTER_ENABLED,
+    prefix: str = "",
+) -> dict[str, int]:
+    """Run scripted conversations through the service and time each stage (names get `prefix`)."""
+    service = ConversationService(
+        max_concurrent_turns=concurrency, route_new_issues=route_new_issues
+    )
+    matches, _ = customers.search_customers("", limit=100)
+    customer_ids = [customer["customer_id"] for customer in matches]
+    outcomes: dict[str, int] = {}
+    remaining = turns
+    next_conversation = 0
+    lock = asyncio.Lock()
+
+    async def take_conversation() -> Optional[int]:
+        nonlocal next_conversation
+        async with lock:
+            if remaining <= 0:
+                return None
+            index = next_conversation
+            next_conversation += 1
+            return index
+
+    async def run_one(index: int) -> None:
+        nonlocal remaining
+        customer_id = customer_ids[index % len(customer_ids)]
+        script = DEFAULT_SCENARIOS[index % len(DEFAULT_SCENARIOS)]
+        session = SummarizingSession(
+            CustomerSession(customer_id, session_id=f"bench-{prefix}{index}", store=store)
+        )
+        conversation = service.new_conversation(customer_id, session=session)
+        for message in script:
+            async with lock:
+                if remaining <= 0:
+                    return
+                remaining -= 1
+            started = time.perf_counter()
+            first_token = None
+            handoff_started = None
+            tool_started: dict[str, list[float]] = {}
+            async for event in service.run_turn(conversation, message):
+                now = time.perf_counter()
+                if event.type == "text_delta" and first_token is None:
+                    first_token = now
+                    timings.add(f"{prefix}ttft_seconds", now - started)
+                elif event.type == "tool_started":
+                    tool = event.data["tool"]
+                    if tool.startswith("transfer_to_"):
+                        handoff_started = now
+                    else:
+                        tool_started.setdefault(tool, []).append(now)
+                elif event.type == "tool_finished":
+                    pending = tool_started.get(event.data["tool"])
+                    if pending:
+                        timings.add(f"{prefix}tool_seconds", now - pending.pop(0))
+                elif event.type == "agent_changed" and not event.data.get("routed"):
+                    timings.add(f"{prefix}handoff_seconds", now - (handoff_started or started))
+                elif event.type in ("turn_completed", "input_blocked", "output_blocked", "error"):
+                    timings.add(f"{prefix}turn_seconds", now - started)
+                    outcomes[event.type] = outcomes.get(event.type, 0) + 1
+
+    async def worker() -> None:
+        while (index := await take_conversation()) is not None:
+            await run_one(index)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return outcomes
+
+
+async def bench_guardrails(timings: Timings, iterations: int) -> None:
+    """Time direct calls of the input and output guardrails, outside any turn."""
+    from my_agents import technical_agent
+    from my_agents.triage_agent import off_topic_guardrail, triage_agent
+    from output_guardrails import technical_output_guardrail
+
+    context = customers.get_default_customer()
+    wrapper = RunContextWrapper(context=context)
+    messages = [message for script in DEFAULT_SCENARIOS for message in script]
+    # One clean answer and one the local output screen escalates to the LLM
+    replies = (
+        "Please clear the app cache, then restart the app and try again.",
+        "Your refund REF-123456 for $49.99 is on its way.",
+    )
+
+    for i in range(iterations):
+        started = time.perf_counter()
+        await off_topic_guardrail.run(triage_agent, messages[i % len(messages)], wrapper)
+        timings.add("input_guardrail_isolated_seconds", time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await technical_output_guardrail.run(wrapper, technical_agent, replies[i % len(replies)])
+        timings.add("output_guardrail_isolated_seconds", time.perf_counter() - started)
+
+
+async def bench_session_store(timings: Timings, store: SessionStore, iterations: int) -> None:
+    """Time session writes, full reads and page reads."""
+    session = CustomerSession(1, session_id="bench-session", store=store)
+    items = [
+        {"role": "user", "content": "Where is my order 12345?"},
+        {"role": "assistant", "content": "Your order shipped yesterday.", "type": "message"},
+    ]
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await session.add_items(items)
+        timings.add("session_add_items_seconds", time.perf_counter() - started)
+
+        # With write-behind on, add_items only queues; the flush is the SQLite cost
+        started = time.perf_counter()
+        await asyncio.to_thread(store.flush)
+        timings.add("session_flush_seconds", time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await session.get_items()
+        timings.add("session_get_items_seconds", time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await session.get_page(config.HISTORY_PAGE_SIZE)
+        timings.add("session_get_page_seconds", time.perf_counter() - started)
+
+
+async def run_benchmarks(args: argparse.Namespace) -> dict:
+    timings = Timings()
+    report: dict = {
+        "provider": "mock" if args.mock else config.MODEL_PROVIDER,
+        "turns": args.turns,
+        "concurrency": args.concurrency,
+        "iterations": args.iterations,
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SessionStore(Path(tmp) / "bench.db")
+        try:
+            started = time.perf_counter()
+            report["outcomes"] = await bench_conversations(
+                timings, store, args.turns, args.concurrency
+            )
+            elapsed = time.perf_counter() - started
+            report["conversation_wall_seconds"] = elapsed
+            report["turns_per_second"] = args.turns / elapsed if elapsed else 0.0
+
+            # Locally routed first messages skip the handoff, so measure
+            # LLM handoffs in a second pass with the router off
+            if config.INTENT_ROUTER_ENABLED:
+                report["router_off_outcomes"] = await bench_conversations(
+                    timings,
+                    store,
+                    args.turns,
+                    args.concurrency,
+                    route_new_issues=False,
+                    prefix="router_off_",
+                )
+
+            await bench_guardrails(timings, args.iterations)
+            await bench_session_store(timings, store, args.iterations)
+        finally:
+            store.close()
+    report["timings"] = timings.report()
+
+    from my_agents.triage_agent import off_topic_verdict_cache, topic_pre_classifier
+
+    if off_topic_verdict_cache is not None:
+        report["guardrail_cache"] = off_topic_verdict_cache.stats()
+    if topic_pre_classifier is not None:
+        report["topic_pre_classifier"] = topic_pre_classifier.stats()
+    from event_bus import MetricsSink, get_event_bus
+    from output_guardrails import technical_output_screen
+
+    report["log_records_dropped"] = logging_config.dropped_records()
+    bus = get_event_bus()
+    bus.flush()
+    report["event_bus"] = bus.stats()
+    metrics = bus.get_sink(MetricsSink)
+    if metrics is not None:
+        report["hook_metrics"] = metrics.stats()
+
+    if technical_output_screen is not None:
+        report["output_screen"] = technical_output_screen.stats()
+    if config.INTENT_ROUTER_ENABLED:
+        from intent_router import get_intent_router
+
+        report["intent_router"] = get_intent_router().stats()
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the customer support pipeline")
+    parser.add_argument("--mock", action="store_true", help="Use the local mock model provider")
+    parser.add_argument("--latency", type=float, default=None, help="Mock first-token latency (s)")
+    parser.add_argument("--tps", type=float, default=None, help="Mock tokens per second")
+    parser.add_argument("--turns", type=int, default=200, help="Conversation turns to run")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent conversations")
+    parser.add_argument(
+        "--iterations", type=int, default=200, help="Iterations of guardrail and session benchmarks"
+    )
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    if args.mock:
+        from mock_model import MockBehavior, MockModelProvider, check_tool_calls
+
+        behavior = MockBehavior()
+        if args.latency is not None:
+            behavior.latency_seconds = args.latency
+        if args.tps is not None:
+            behavior.tokens_per_second = args.tps
+        model_provider.set_run_config(
+            RunConfig(model_provider=MockModelProvider(behavior), tracing_disabled=True)
+        )
+        # Tool timings are only meaningful if mock tool calls are accepted
+        failures = asyncio.run(check_tool_calls(list(DEFAULT_SPECIALISTS.values())))
+        if failures:
+            sys.exit("Mock tool calls are rejected:\n" + "\n".join(failures))
+    else:
+        config.validate_environment()
+
+    report = asyncio.run(run_benchmarks(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+        logger.info("Wrote benchmark report to %s", args.output)
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
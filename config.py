@@ -20,7 +20,8 @@ def validate_environment() -> None:
     Raises:
         EnvironmentError: If any required environment variables are missing
     """
-    REQUIRED_ENV_VARS = ["OPENAI_API_KEY"]
+    # The mock model provider runs offline and needs no API key
+    REQUIRED_ENV_VARS = [] if MODEL_PROVIDER == "mock" else ["OPENAI_API_KEY"]
     missing_vars = [var for var in REQUIRED_ENV_VARS if not os.getenv(var)]
     if missing_vars:
         raise EnvironmentError(
@@ -35,14 +36,217 @@ def validate_environment() -> None:
 DB_NAME: Final[str] = os.getenv("DB_NAME", "customer-support-memory.db")
 SESSION_ID: Final[str] = "chat-history"
 
+# All customers share DB_NAME (split into SESSION_DB_SHARDS files when > 1)
+SESSION_DB_SHARDS: Final[int] = int(os.getenv("SESSION_DB_SHARDS", "1"))
+SESSION_POOL_SIZE: Final[int] = int(os.getenv("SESSION_POOL_SIZE", "8"))
+SESSION_POOL_TIMEOUT_SECONDS: Final[float] = 10.0
+SESSION_STATEMENT_CACHE_SIZE: Final[int] = 64
+SQLITE_BUSY_TIMEOUT_MS: Final[int] = 5000
+
+# Queue session writes and flush them in grouped transactions
+SESSION_WRITE_BEHIND: Final[bool] = os.getenv("SESSION_WRITE_BEHIND", "1") == "1"
+SESSION_WRITE_BEHIND_MAX_ITEMS: Final[int] = 256
+SESSION_WRITE_BEHIND_FLUSH_SECONDS: Final[float] = 0.05
+# Failed flushes of a queued write before it is logged and dead-lettered
+SESSION_WRITE_BEHIND_MAX_ATTEMPTS: Final[int] = 5
+
+# Number of chat history items rendered per page
+HISTORY_PAGE_SIZE: Final[int] = int(os.getenv("HISTORY_PAGE_SIZE", "50"))
+
+# Estimated tokens of history sent to the model per turn; older turns are
+# folded into a summary until the recent tail fits in HISTORY_RECENT_TOKENS
+HISTORY_TOKEN_BUDGET: Final[int] = int(os.getenv("HISTORY_TOKEN_BUDGET", "8000"))
+HISTORY_RECENT_TOKENS: Final[int] = int(os.getenv("HISTORY_RECENT_TOKENS", "3000"))
+
+
+# =============================================================================
+# CUSTOMER STORE CONFIGURATION
+# =============================================================================
+
+# "json" reads customers.json; "sqlite" reads CUSTOMERS_DB_NAME
+CUSTOMER_STORE_BACKEND: Final[str] = os.getenv("CUSTOMER_STORE", "json").lower()
+CUSTOMERS_DB_NAME: Final[str] = os.getenv("CUSTOMERS_DB_NAME", "customers.db")
+CUSTOMER_IMPORT_BATCH_SIZE: Final[int] = 5000
+CUSTOMER_SEARCH_PAGE_SIZE: Final[int] = 20
+# Customers (in name order) checked for substring matches once prefix matches run out
+CUSTOMER_SEARCH_SUBSTRING_SCAN_LIMIT: Final[int] = 5000
+
+
+# =============================================================================
+# MODEL PROVIDER
+# =============================================================================
+
+# "openai" calls the OpenAI API; "mock" serves every agent from mock_model.py offline
+MODEL_PROVIDER: Final[str] = os.getenv("MODEL_PROVIDER", "openai").lower()
+MOCK_MODEL_LATENCY_SECONDS: Final[float] = float(os.getenv("MOCK_MODEL_LATENCY_SECONDS", "0"))
+# 0 streams the whole response without pacing
+MOCK_MODEL_TOKENS_PER_SECOND: Final[float] = float(os.getenv("MOCK_MODEL_TOKENS_PER_SECOND", "0"))
+MOCK_MODEL_RESPONSE_TOKENS: Final[int] = int(os.getenv("MOCK_MODEL_RESPONSE_TOKENS", "40"))
+# Optional JSON file of scripted MockBehavior settings and rules
+MOCK_MODEL_SCRIPT: Final[str] = os.getenv("MOCK_MODEL_SCRIPT", "")
+
+
+# =============================================================================
+# GUARDRAIL CACHE
+# =============================================================================
+
+# Check every turn with the off-topic input guardrail ("1" enables)
+INPUT_GUARDRAIL_ENABLED: Final[bool] = os.getenv("INPUT_GUARDRAIL", "0") == "1"
+# Cache off-topic guardrail verdicts for repeated inputs ("0" disables)
+GUARDRAIL_CACHE_ENABLED: Final[bool] = os.getenv("GUARDRAIL_CACHE", "1") == "1"
+GUARDRAIL_CACHE_MAX_ENTRIES: Final[int] = int(os.getenv("GUARDRAIL_CACHE_MAX_ENTRIES", "10000"))
+GUARDRAIL_CACHE_TTL_SECONDS: Final[float] = float(os.getenv("GUARDRAIL_CACHE_TTL_SECONDS", "3600"))
+# Optional SQLite file shared across restarts; empty keeps the cache in memory only
+GUARDRAIL_CACHE_DB: Final[str] = os.getenv("GUARDRAIL_CACHE_DB", "")
+GUARDRAIL_CACHE_DB_MAX_ENTRIES: Final[int] = 100000
+
+# Local pre-classifier that answers confident cases before the LLM guardrail ("0" disables)
+TOPIC_CLASSIFIER_ENABLED: Final[bool] = os.getenv("TOPIC_CLASSIFIER", "1") == "1"
+# Trained model JSON (see topic_classifier.py); empty trains on the built-in seed examples
+TOPIC_CLASSIFIER_MODEL: Final[str] = os.getenv("TOPIC_CLASSIFIER_MODEL", "")
+# P(on-topic) at or above this passes locally; at or below the off threshold blocks locally
+TOPIC_ON_TOPIC_THRESHOLD: Final[float] = float(os.getenv("TOPIC_ON_TOPIC_THRESHOLD", "0.85"))
+TOPIC_OFF_TOPIC_THRESHOLD: Final[float] = float(os.getenv("TOPIC_OFF_TOPIC_THRESHOLD", "0.1"))
+# A support-keyword hit passes locally only when P(on-topic) is also at or above this
+TOPIC_LEXICON_THRESHOLD: Final[float] = float(os.getenv("TOPIC_LEXICON_THRESHOLD", "0.7"))
+
+
+# =============================================================================
+# OUTPUT GUARDRAILS
+# =============================================================================
+
+# Clear technical answers with no billing, order or account signals without the LLM check ("0" disables)
+OUTPUT_SCREEN_ENABLED: Final[bool] = os.getenv("OUTPUT_SCREEN", "1") == "1"
+
+# Check guarded agents' responses chunk by chunk while they stream ("0" checks the full answer)
+OUTPUT_GUARDRAIL_STREAMING: Final[bool] = os.getenv("OUTPUT_GUARDRAIL_STREAMING", "1") == "1"
+# Unchecked characters that trigger the next chunk check
+OUTPUT_GUARDRAIL_CHUNK_CHARS: Final[int] = int(os.getenv("OUTPUT_GUARDRAIL_CHUNK_CHARS", "400"))
+# Verified characters repeated in each check so phrases split across chunks are seen whole
+OUTPUT_GUARDRAIL_OVERLAP_CHARS: Final[int] = int(os.getenv("OUTPUT_GUARDRAIL_OVERLAP_CHARS", "80"))
+
+
+# =============================================================================
+# INTENT ROUTER
+# =============================================================================
+
+# Start new issues directly on the matching specialist instead of a triage turn ("0" disables)
+INTENT_ROUTER_ENABLED: Final[bool] = os.getenv("INTENT_ROUTER", "1") == "1"
+# Trained router JSON (see intent_router.py); empty trains on the built-in seed examples
+INTENT_ROUTER_MODEL: Final[str] = os.getenv("INTENT_ROUTER_MODEL", "")
+# Minimum share of the top intent for a model-based route
+INTENT_ROUTER_THRESHOLD: Final[float] = float(os.getenv("INTENT_ROUTER_THRESHOLD", "0.6"))
+
+
+# =============================================================================
+# AGENT INSTRUCTIONS
+# =============================================================================
+
+# Rendered per-customer instruction texts kept per agent (see instructions.py)
+INSTRUCTIONS_CACHE_MAX_ENTRIES: Final[int] = int(os.getenv("INSTRUCTIONS_CACHE_MAX_ENTRIES", "10000"))
+
+
+# =============================================================================
+# CONVERSATION SERVICE
+# =============================================================================
+
+# Agent turns allowed to run at once across all customers
+SERVICE_MAX_CONCURRENT_TURNS: Final[int] = int(os.getenv("SERVICE_MAX_CONCURRENT_TURNS", "200"))
+# Conversations kept in memory between turns; idle or least recently used
+# ones are dropped and reopened from the session store (with fresh customer
+# details) on the next message
+SERVICE_MAX_CONVERSATIONS: Final[int] = int(os.getenv("SERVICE_MAX_CONVERSATIONS", "10000"))
+SERVICE_CONVERSATION_IDLE_SECONDS: Final[float] = float(
+    os.getenv("SERVICE_CONVERSATION_IDLE_SECONDS", "1800")
+)
+
+
+# =============================================================================
+# LOGGING
+# =============================================================================
+
+# Hand log records to a background thread instead of writing them inline ("0" writes inline)
+LOG_ASYNC: Final[bool] = os.getenv("LOG_ASYNC", "1") == "1"
+# Records queued for the logging thread before new ones are dropped
+LOG_QUEUE_SIZE: Final[int] = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Rotate the log file at this size (0 disables size-based rotation)
+LOG_MAX_BYTES: Final[int] = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+# Or rotate on a schedule instead, e.g. "midnight" or "H" (takes precedence over LOG_MAX_BYTES)
+LOG_ROTATE_WHEN: Final[str] = os.getenv("LOG_ROTATE_WHEN", "")
+# Rotated log files kept
+LOG_BACKUP_COUNT: Final[int] = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+# "text" for human-readable lines, "json" for one JSON object per record with turn fields
+LOG_FORMAT: Final[str] = os.getenv("LOG_FORMAT", "text")
+
+
+# =============================================================================
+# EVENT BUS
+# =============================================================================
+
+# Hook events queued per sink before the oldest are dropped
+EVENT_BUS_MAX_EVENTS: Final[int] = int(os.getenv("EVENT_BUS_MAX_EVENTS", "10000"))
+# Events handed to a sink per write
+EVENT_BUS_BATCH_SIZE: Final[int] = int(os.getenv("EVENT_BUS_BATCH_SIZE", "100"))
+# Tool results longer than this are truncated in events
+EVENT_DETAIL_MAX_CHARS: Final[int] = int(os.getenv("EVENT_DETAIL_MAX_CHARS", "2000"))
+# Optional JSONL file receiving every hook event
+EVENT_LOG_FILE: Final[str] = os.getenv("EVENT_LOG_FILE", "")
+
+
+# =============================================================================
+# METRICS
+# =============================================================================
+
+# Serve Prometheus metrics at http://METRICS_HOST:METRICS_PORT/metrics (0 disables)
+METRICS_PORT: Final[int] = int(os.getenv("METRICS_PORT", "0"))
+METRICS_HOST: Final[str] = os.getenv("METRICS_HOST", "127.0.0.1")
+# Optional file rewritten with the metrics in Prometheus text format
+METRICS_FILE: Final[str] = os.getenv("METRICS_FILE", "")
+METRICS_FILE_INTERVAL_SECONDS: Final[float] = float(os.getenv("METRICS_FILE_INTERVAL_SECONDS", "15"))
+
+
+# =============================================================================
+# TRACING
+# =============================================================================
+
+# OTLP JSON lines file receiving turn traces (see tracing.py); empty disables local tracing
+TRACE_FILE: Final[str] = os.getenv("TRACE_FILE", "")
+# Share of traces kept (0.0-1.0); errored and slow traces are always kept
+TRACE_SAMPLE_RATE: Final[float] = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+# Keep every trace at least this slow regardless of the sample rate (0 disables)
+TRACE_KEEP_SLOWER_THAN_MS: Final[float] = float(os.getenv("TRACE_KEEP_SLOWER_THAN_MS", "5000"))
+# Finished traces queued for the writer thread before new ones are dropped
+TRACE_QUEUE_SIZE: Final[int] = int(os.getenv("TRACE_QUEUE_SIZE", "1000"))
+
+
+# =============================================================================
+# BATCH RUNNER
+# =============================================================================
+
+# Conversations replayed at once by batch_runner.py
+BATCH_CONCURRENCY: Final[int] = int(os.getenv("BATCH_CONCURRENCY", "8"))
+# Session database for replayed conversations (empty: a temporary file
+# removed after the run, which keeps them out of DB_NAME)
+BATCH_SESSION_DB: Final[str] = os.getenv("BATCH_SESSION_DB", "")
+
+
+# =============================================================================
+# UI RENDERING
+# =============================================================================
+
+# Maximum placeholder updates per second while a response streams in
+STREAM_RENDER_HZ: Final[float] = float(os.getenv("STREAM_RENDER_HZ", "30"))
+
 
 # =============================================================================
 # SESSION STATE KEYS
 # =============================================================================
 
-SESSION_STATE_SESSION_KEY: Final[str] = "session"
-SESSION_STATE_AGENT_KEY: Final[str] = "agent"
-SESSION_STATE_TEXT_PLACEHOLDER_KEY: Final[str] = "text_placeholder"
+SESSION_STATE_SELECTED_CUSTOMER_KEY: Final[str] = "selected_customer_id"
+SESSION_STATE_CUSTOMER_SEARCH_KEY: Final[str] = "customer_search"
+SESSION_STATE_CUSTOMER_PAGE_KEY: Final[str] = "customer_search_page"
+SESSION_STATE_CUSTOMER_QUERY_KEY: Final[str] = "customer_search_query"
+SESSION_STATE_HISTORY_START_KEY: Final[str] = "history_start_id"
 
 
 # =============================================================================
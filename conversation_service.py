@@ -0,0 +1,562 @@
+"""
+Headless conversation service.
+
+ConversationService runs customer conversations through the agent graph
+independently of any UI. It runs on the process-wide background event loop
+(see background_loop.py), keeps each customer's session and current agent, and
+turns SDK stream events into ConversationEvent objects that any client
+(Streamlit, batch jobs, load generators) can consume.
+
+Async callers use send_message(); synchronous callers such as the
+Streamlit script use stream(), which bridges events off the service loop.
+
+Tracked conversations are kept in an LRU with an idle TTL. An evicted
+conversation is reopened on the customer's next message: history comes back
+from the session store, customer details are reloaded, and the turn starts
+at the entry agent.
+
+Each turn runs in a logging turn scope (see logging_config.py), so its log
+records, hook events and guardrail checks share the turn's correlation ID,
+which is also set on every ConversationEvent of the turn. Each turn is also
+one Agents SDK trace (exported locally by tracing.py when TRACE_FILE is set).
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable, Iterator
+from concurrent.futures import Future
+from contextlib import suppress
+from dataclasses import dataclass, field
+from typing import Any, Coroutine, Optional, TypeVar
+
+from agents import (
+    Agent,
+    InputGuardrailTripwireTriggered,
+    OutputGuardrailTripwireTriggered,
+    Runner,
+    Session,
+    custom_span,
+    get_current_trace,
+    trace,
+)
+
+import config
+import customers
+import metrics
+from background_loop import BackgroundLoop, get_background_loop
+from intent_router import IntentRouter, get_intent_router
+from logging_config import current_turn, end_turn, get_logger, start_turn
+from model_provider import get_run_config
+from models import ConversationEvent, UserAccountContext
+from my_agents import account_agent, billing_agent, order_agent, technical_agent
+from my_agents.triage_agent import triage_agent
+from output_guardrails import StreamingOutputGuard, active_stream_guard, streaming_check_for
+from session_store import CustomerSession
+from session_summary import SummarizingSession
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+SessionFactory = Callable[[int], Session]
+
+# Name of the trace recorded for each turn
+TURN_WORKFLOW_NAME = "Customer support turn"
+
+# Events that end a turn; the last one yielded is the turn's logged outcome
+_OUTCOME_EVENTS = frozenset({"turn_completed", "input_blocked", "output_blocked", "error"})
+
+DEFAULT_SPECIALISTS: dict[str, Agent[UserAccountContext]] = {
+    "technical": technical_agent,
+    "billing": billing_agent,
+    "order": order_agent,
+    "account": account_agent,
+}
+
+
+def default_session_factory(customer_id: int) -> Session:
+    """Summarized view over the customer's conversation in the shared store."""
+    return SummarizingSession(CustomerSession(customer_id, config.SESSION_ID))
+
+
+@dataclass
+class Conversation:
+    """Per-customer state kept by the service between turns."""
+
+    context: UserAccountContext
+    session: Session
+    agent: Agent[UserAccountContext]
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    last_used: float = field(default_factory=time.monotonic)
+    # Turns started or queued; a conversation with any is never evicted
+    active_turns: int = 0
+
+
+class ConversationService:
+    """Runs conversations for many customers on one event loop."""
+
+    def __init__(
+        self,
+        entry_agent: Agent[UserAccountContext] = triage_agent,
+        session_factory: SessionFactory = default_session_factory,
+        max_concurrent_turns: int = config.SERVICE_MAX_CONCURRENT_TURNS,
+        background_loop: Optional[BackgroundLoop] = None,
+        stream_output_checks: bool = config.OUTPUT_GUARDRAIL_STREAMING,
+        router: Optional[IntentRouter] = None,
+        route_new_issues: bool = config.INTENT_ROUTER_ENABLED,
+        specialists: Optional[dict[str, Agent[UserAccountContext]]] = None,
+        max_conversations: int = config.SERVICE_MAX_CONVERSATIONS,
+        conversation_idle_seconds: float = config.SERVICE_CONVERSATION_IDLE_SECONDS,
+    ):
+        self.entry_agent = entry_agent
+        self.session_factory = session_factory
+        self.max_concurrent_turns = max_concurrent_turns
+        self.stream_output_checks = stream_output_checks
+        # Messages that would start on the entry agent go straight to a
+        # specialist when the local router is confident
+        self.router = (router or get_intent_router()) if route_new_issues else None
+        self.specialists = specialists if specialists is not None else DEFAULT_SPECIALISTS
+        self._guarded_agents: dict[str, Agent[UserAccountContext]] = {}
+        self.max_conversations = max_conversations
+        self.conversation_idle_seconds = conversation_idle_seconds
+        self._conversations: OrderedDict[int, Conversation] = OrderedDict()
+        self._conversations_lock = threading.Lock()
+        self.evicted_conversations = 0
+        self._turn_slots: Optional[asyncio.Semaphore] = None
+        self._background_loop = background_loop
+
+    # =========================================================================
+    # EVENT LOOP
+    # =========================================================================
+
+    def start(self) -> "ConversationService":
+        """Attach the service to its event loop, starting it if needed (idempotent)."""
+        if self._background_loop is None:
+            self._background_loop = get_background_loop()
+        self._background_loop.start()
+        return self
+
+    def submit(self, coro: Coroutine[Any, Any, T]) -> Future[T]:
+        """Schedule a coroutine on the service loop from any thread."""
+        self.start()
+        return self._background_loop.submit(coro)
+
+    def run(self, coro: Coroutine[Any, Any, T]) -> T:
+        """Run a coroutine on the service loop and wait for its result."""
+        self.start()
+        return self._background_loop.run(coro)
+
+    def stream(
+        self, customer_id: int, message: str, turn_id: Optional[str] = None
+    ) -> Iterator[ConversationEvent]:
+        """Synchronous view of send_message() for non-async clients."""
+        events: queue.Queue = queue.Queue()
+        done = object()
+
+        async def pump() -> None:
+            try:
+                async for event in self.send_message(customer_id, message, turn_id):
+                    events.put(event)
+            finally:
+                events.put(done)
+
+        future = self.submit(pump())
+        while True:
+            event = events.get()
+            if event is done:
+                break
+            yield event
+        # Surface unexpected failures from the pump itself
+        future.result()
+
+    # =========================================================================
+    # CONVERSATIONS
+    # =========================================================================
+
+    def new_conversation(
+        self, customer_id: int, session: Optional[Session] = None
+    ) -> Conversation:
+        """
+        Create a conversation that the service does not track.
+
+        Use this with run_turn() when several independent conversations for
+        the same customer must run side by side (e.g. batch replays).
+
+        Args:
+            customer_id: Customer the conversation belongs to
+            session: Session to use (defaults to the service's session factory)
+
+        Returns:
+            A Conversation starting at the entry agent
+
+        Raises:
+            ValueError: If the customer does not exist
+        """
+        context = customers.get_customer_context(customer_id)
+        if context is None:
+            raise ValueError(f"Unknown customer: {customer_id}")
+        return Conversation(
+            context=context,
+            session=session if session is not None else self.session_factory(customer_id),
+            agent=self.entry_agent,
+        )
+
+    def _guarded_agent(self, agent: Agent[UserAccountContext]) -> Agent[UserAccountContext]:
+        # Input guardrails only run on a run's first agent, so a run that
+        # starts past the entry agent (routed, or continuing with a
+        # specialist) must carry the entry agent's guardrails too
+        if agent is self.entry_agent or not self.entry_agent.input_guardrails:
+            return agent
+        guarded = self._guarded_agents.get(agent.name)
+        if guarded is None:
+            guarded = agent.clone(
+                input_guardrails=self.entry_agent.input_guardrails + agent.input_guardrails
+            )
+            self._guarded_agents[agent.name] = guarded
+        return guarded
+
+    def _get_conversation(self, customer_id: int, claim: bool = False) -> Conversation:
+        # Clients may look up sessions from their own threads
+        with self._conversations_lock:
+            now = time.monotonic()
+            conversation = self._conversations.get(customer_id)
+            if conversation is None:
+                conversation = self.new_conversation(customer_id)
+                self._conversations[customer_id] = conversation
+                logger.info(
+                    "Opened conversation for customer %s (%s)", customer_id, conversation.context.name
+                )
+            else:
+                self._conversations.move_to_end(customer_id)
+            conversation.last_used = now
+            if claim:
+                conversation.active_turns += 1
+            self._evict_idle(now, keep=customer_id)
+            return conversation
+
+    def _release_conversation(self, conversation: Conversation) -> None:
+        with self._conversations_lock:
+            conversation.active_turns -= 1
+            conversation.last_used = time.monotonic()
+            # Conversations skipped while busy can go now
+            self._evict_idle(conversation.last_used)
+
+    def _evict_idle(self, now: float, keep: Optional[int] = None) -> None:
+        # Oldest first; stop at the first entry that is neither idle nor over capacity
+        expired_before = now - self.conversation_idle_seconds
+        evicted = 0
+        for customer_id, conversation in list(self._conversations.items()):
+            over_capacity = len(self._conversations) > self.max_conversations
+            if not over_capacity and conversation.last_used > expired_before:
+                break
+            if conversation.active_turns or customer_id == keep:
+                continue
+            del self._conversations[customer_id]
+            evicted += 1
+        if evicted:
+            self.evicted_conversations += evicted
+            logger.debug("Evicted %s idle conversation(s)", evicted)
+
+    def get_session(self, customer_id: int) -> Session:
+        """Return the session backing a customer's conversation."""
+        return self._get_conversation(customer_id).session
+
+    def current_agent(self, customer_id: int) -> Agent[UserAccountContext]:
+        """Return the agent that will handle the customer's next message."""
+        return self._get_conversation(customer_id).agent
+
+    async def reset(self, customer_id: int) -> None:
+        """Clear a customer's history and route their next message through triage."""
+        conversation = self._get_conversation(customer_id)
+        async with conversation.lock:
+            await conversation.session.clear_session()
+            conversation.agent = self.entry_agent
+        logger.info("Reset conversation for customer %s", customer_id)
+
+    async def send_message(
+        self, customer_id: int, message: str, turn_id: Optional[str] = None
+    ) -> AsyncIterator[ConversationEvent]:
+        """
+        Run one user turn and stream its events.
+
+        Turns for the same customer run one at a time; turns for different
+        customers run concurrently up to `max_concurrent_turns`.
+
+        Args:
+            customer_id: Customer sending the message
+            message: User message text
+            turn_id: Correlation ID for the turn (generated if not given)
+
+        Yields:
+            ConversationEvent for each delta, agent change, tool call and the outcome
+        """
+        conversation = self._get_conversation(customer_id, claim=True)
+        try:
+            async for event in self.run_turn(conversation, message, turn_id):
+                yield event
+        finally:
+            self._release_conversation(conversation)
+
+    async def run_turn(
+        self, conversation: Conversation, message: str, turn_id: Optional[str] = None
+    ) -> AsyncIterator[ConversationEvent]:
+        """
+        Run one user turn on an explicit conversation and stream its events.
+
+        Shares the service-wide concurrency limit with send_message(). The
+        final event's data records `queued_seconds`, the time spent waiting
+        for a turn slot and for the conversation's previous turn.
+
+        Args:
+            conversation: Conversation to continue
+            message: User message text
+            turn_id: Correlation ID for the turn (generated if not given)
+
+        Yields:
+            ConversationEvent for each delta, agent change, tool call and the outcome
+        """
+        if self._turn_slots is None:
+            self._turn_slots = asyncio.Semaphore(self.max_concurrent_turns)
+
+        # Set before the run starts so the SDK's tasks (tools, hooks,
+        # guardrails) copy the turn into their contexts
+        turn_token = start_turn(conversation.context.customer_id, turn_id)
+        try:
+            queued_at = time.perf_counter()
+            async with self._turn_slots, conversation.lock:
+                queued_seconds = time.perf_counter() - queued_at
+                async for event in self._run_turn(conversation, message, queued_seconds):
+                    yield event
+        finally:
+            end_turn(turn_token)
+
+    async def _run_turn(
+        self, conversation: Conversation, message: str, queued_seconds: float = 0.0
+    ) -> AsyncIterator[ConversationEvent]:
+        customer_id = conversation.context.customer_id
+        turn = current_turn()
+        turn_id = turn.turn_id if turn is not None else None
+        logger.info(
+            "Processing message for customer %s: %s...",
+            customer_id,
+            message[:50],
+            extra={"event": "turn_started", "queued_ms": round(queued_seconds * 1000, 3)},
+        )
+        started = time.perf_counter()
+        metrics.TURN_QUEUE_SECONDS.observe(queued_seconds)
+        first_text_at: Optional[float] = None
+        outcome = "cancelled"
+        stream = None
+        tool_names: dict[str, str] = {}
+
+        # The run task copies the current trace, so the run's spans join this one
+        trace_metadata = {
+            "turn_id": turn_id or "",
+            "customer_id": str(customer_id),
+            "customer_tier": conversation.context.tier,
+            "start_agent": conversation.agent.name,
+        }
+        turn_trace = None
+        if get_current_trace() is None:
+            turn_trace = trace(
+                TURN_WORKFLOW_NAME,
+                group_id=f"customer-{customer_id}",
+                metadata=trace_metadata,
+                disabled=get_run_config().tracing_disabled,
+            )
+            turn_trace.start(mark_as_current=True)
+
+        def event(type: str, **kwargs) -> ConversationEvent:
+            nonlocal first_text_at, outcome
+            if type == "text_delta" and first_text_at is None:
+                first_text_at = time.perf_counter()
+            elif type in _OUTCOME_EVENTS:
+                outcome = type
+            return ConversationEvent(
+                type=type,
+                customer_id=customer_id,
+                agent_name=conversation.agent.name,
+                turn_id=turn_id,
+                **kwargs,
+            )
+
+        try:
+            start_agent = self._guarded_agent(conversation.agent)
+            if self.router is not None and conversation.agent is self.entry_agent:
+                with custom_span("intent_router") as route_span:
+                    decision = self.router.route(message)
+                    route_span.span_data.data = {
+                        "intent": decision.intent or "",
+                        "source": decision.source,
+                    }
+                specialist = self.specialists.get(decision.intent) if decision.intent else None
+                if specialist is not None:
+                    old_agent = conversation.agent.name
+                    logger.info(
+                        "Routed locally: %s -> %s (%s, confidence %.2f)",
+                        old_agent,
+                        specialist.name,
+                        decision.source,
+                        decision.confidence,
+                        extra={"event": "routed", "agent": specialist.name, "route": decision.source},
+                    )
+                    conversation.agent = specialist
+                    start_agent = self._guarded_agent(specialist)
+                    metrics.HANDOFFS.labels(old_agent, specialist.name, decision.source).inc()
+                    yield event(
+                        "agent_changed",
+                        data={"from_agent": old_agent, "routed": decision.source},
+                    )
+
+            # Guarded agents' text is checked in chunks and released once verified;
+            # the run task copies the context, so the SDK guardrail sees this guard
+            guard = None
+            if self.stream_output_checks:
+                guard = StreamingOutputGuard(
+                    conversation.context, streaming_check_for(conversation.agent)
+                )
+                guard_token = active_stream_guard.set(guard)
+            try:
+                stream = Runner.run_streamed(
+                    start_agent,
+                    message,
+                    session=conversation.session,
+                    context=conversation.context,
+                    run_config=get_run_config(),
+                )
+            finally:
+                if guard is not None:
+                    active_stream_guard.reset(guard_token)
+
+            async for stream_event in stream.stream_events():
+                if stream_event.type == "raw_response_event":
+                    data = stream_event.data
+                    if data.type == "response.output_text.delta":
+                        if guard is None or not guard.active:
+                            yield event("text_delta", text=data.delta)
+                            continue
+                        guard.feed(data.delta)
+                    elif data.type == "response.completed" and guard is not None and guard.active:
+                        await guard.finish()
+                    else:
+                        continue
+                    if guard.tripped:
+                        stream.cancel()
+                        guard.close()
+                        logger.warning(
+                            "Streaming output guardrail triggered for agent '%s' after %s check(s)",
+                            conversation.agent.name,
+                            guard.checks,
+                            extra={"event": "output_blocked", "agent": conversation.agent.name},
+                        )
+                        yield event(
+                            "output_blocked",
+                            data={"queued_seconds": queued_seconds, "streaming": True},
+                        )
+                        return
+                    verified = guard.release()
+                    if verified:
+                        yield event("text_delta", text=verified)
+
+                elif stream_event.type == "agent_updated_stream_event":
+                    new_agent = stream_event.new_agent
+                    if new_agent.name != conversation.agent.name:
+                        old_agent = conversation.agent.name
+                        logger.info(
+                            "Agent handoff: %s -> %s",
+                            old_agent,
+                            new_agent.name,
+                            extra={"event": "handoff", "agent": new_agent.name},
+                        )
+                        conversation.agent = new_agent
+                        if guard is not None:
+                            guard.reset(streaming_check_for(new_agent))
+                        yield event("agent_changed", data={"from_agent": old_agent})
+
+                elif stream_event.type == "run_item_stream_event":
+                    item = stream_event.item
+                    if stream_event.name == "tool_called":
+                        raw = item.raw_item
+                        name = getattr(raw, "name", None) or "tool"
+                        call_id = getattr(raw, "call_id", None)
+                        if call_id:
+                            tool_names[call_id] = name
+                        yield event("tool_started", data={"tool": name})
+                    elif stream_event.name == "tool_output":
+                        raw = item.raw_item
+                        call_id = raw.get("call_id") if isinstance(raw, dict) else None
+                        yield event(
+                            "tool_finished",
+                            text=str(item.output),
+                            data={"tool": tool_names.get(call_id, "tool")},
+                        )
+
+            yield event(
+                "turn_completed",
+                text=str(stream.final_output) if stream.final_output is not None else None,
+                data={
+                    "elapsed_seconds": time.perf_counter() - started,
+                    "queued_seconds": queued_seconds,
+                },
+            )
+
+        except InputGuardrailTripwireTriggered:
+            logger.warning("Input guardrail triggered for message: %s...", message[:50])
+            yield event("input_blocked", data={"queued_seconds": queued_seconds})
+
+        except OutputGuardrailTripwireTriggered:
+            logger.warning("Output guardrail triggered for agent response")
+            yield event("output_blocked", data={"queued_seconds": queued_seconds})
+
+        except Exception as e:
+            logger.error("Error processing message for customer %s: %s", customer_id, e, exc_info=True)
+            yield event("error", text=str(e), data={"queued_seconds": queued_seconds})
+
+        finally:
+            finished = time.perf_counter()
+            agent_name = conversation.agent.name
+            metrics.TURN_SECONDS.labels(agent_name, outcome).observe(finished - started)
+            if first_text_at is not None:
+                metrics.TURN_FIRST_TEXT_SECONDS.labels(agent_name).observe(first_text_at - started)
+            if stream is not None:
+                metrics.record_usage(agent_name, stream.context_wrapper.usage)
+            if turn_trace is not None:
+                trace_metadata.update(outcome=outcome, final_agent=agent_name)
+                # Resetting fails if the generator is closed from another context
+                with suppress(ValueError):
+                    turn_trace.finish(reset_current=True)
+            logger.info(
+                "Turn finished for customer %s: %s in %.0f ms",
+                customer_id,
+                outcome,
+                (finished - started) * 1000,
+                extra={
+                    "event": "turn_finished",
+                    "outcome": outcome,
+                    "agent": agent_name,
+                    "elapsed_ms": round((finished - started) * 1000, 3),
+                    "queued_ms": round(queued_seconds * 1000, 3),
+                    "first_text_ms": (
+                        round((first_text_at - started) * 1000, 3)
+                        if first_text_at is not None
+                        else None
+                    ),
+                },
+            )
+
+
+_service: Optional[ConversationService] = None
+_service_lock = threading.Lock()
+
+
+def get_conversation_service() -> ConversationService:
+    """Return the process-wide conversation service, started on first use."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = ConversationService().start()
+    return _service
@@ -1,14 +1,31 @@
 """
 Customer data management.
 
-This module provides functions to load and manage customer data from
-the customers.json file.
+This module provides functions to load and manage customer data. Customers
+live in a pluggable CustomerStore:
+
+- JsonCustomerStore: the customers.json file, parsed once and indexed in
+  memory, reloaded only when the file's mtime or size changes.
+- SQLiteCustomerStore: an indexed SQLite table for large customer bases,
+  filled by the streaming bulk importer (`python customers.py import ...`).
+
+The backend is selected with the CUSTOMER_STORE environment variable.
 """
 
+import argparse
+import atexit
+import bisect
 import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Iterable, Iterator
+from itertools import islice
 from pathlib import Path
 from typing import Optional
 from models import UserAccountContext
+import config
 from logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -31,16 +48,592 @@ def load_customers() -> list[dict]:
     try:
         with open(CUSTOMERS_FILE, "r") as f:
             customers = json.load(f)
-        logger.debug(f"Loaded {len(customers)} customers from {CUSTOMERS_FILE}")
+        logger.debug("Loaded %s customers from %s", len(customers), CUSTOMERS_FILE)
         return customers
     except FileNotFoundError:
-        logger.error(f"Customers file not found: {CUSTOMERS_FILE}")
+        logger.error("Customers file not found: %s", CUSTOMERS_FILE)
         raise
     except json.JSONDecodeError as e:
-        logger.error(f"Invalid JSON in customers file: {e}")
+        logger.error("Invalid JSON in customers file: %s", e)
         raise
 
 
+# =============================================================================
+# CUSTOMER STORES
+# =============================================================================
+
+# Search key kinds, in ranking order
+MATCH_NAME = 0  # prefix of the full name
+MATCH_WORD = 1  # prefix of a later word of the name
+MATCH_ID = 2  # prefix of the customer ID
+
+
+def search_keys(customer: dict) -> set[tuple[int, str]]:
+    """Return the (kind, lowercased key) pairs a customer is found by in prefix search."""
+    name = customer["name"].lower()
+    keys = {(MATCH_NAME, name), (MATCH_ID, str(customer["customer_id"]))}
+    keys.update((MATCH_WORD, word) for word in name.split()[1:])
+    return keys
+
+
+class CustomerStore(ABC):
+    """Read interface shared by all customer backends."""
+
+    @abstractmethod
+    def get_by_id(self, customer_id: int) -> Optional[dict]:
+        """Return the customer with this ID, or None."""
+
+    @abstractmethod
+    def get_by_name(self, name: str) -> Optional[dict]:
+        """Return the first customer with this exact name, or None."""
+
+    @abstractmethod
+    def sorted_names(self) -> list[str]:
+        """Return every customer name, sorted alphabetically."""
+
+    @abstractmethod
+    def first(self) -> Optional[dict]:
+        """Return the default (first) customer, or None if the store is empty."""
+
+    @abstractmethod
+    def count(self) -> int:
+        """Return the number of customers in the store."""
+
+    @abstractmethod
+    def _iter_all(self) -> Iterator[dict]:
+        """Yield every customer sorted by name."""
+
+    @abstractmethod
+    def _iter_prefix(self, kind: int, prefix: str) -> Iterator[dict]:
+        """Yield customers with a `kind` search key starting with `prefix`, ordered by key then ID."""
+
+    @abstractmethod
+    def _iter_by_search_name(self, limit: int) -> Iterator[dict]:
+        """Yield the first `limit` customers ordered by lowercased name, then ID."""
+
+    def _iter_matches(self, query: str) -> Iterator[dict]:
+        """Yield customers matching a lowercased query, best matches first, without duplicates."""
+        if not query:
+            yield from self._iter_all()
+            return
+
+        seen: set[int] = set()
+        for kind in (MATCH_NAME, MATCH_WORD, MATCH_ID):
+            for customer in self._iter_prefix(kind, query):
+                if customer["customer_id"] not in seen:
+                    seen.add(customer["customer_id"])
+                    yield customer
+
+        # Bounded, so a query without enough prefix matches never scans everyone
+        for customer in self._iter_by_search_name(config.CUSTOMER_SEARCH_SUBSTRING_SCAN_LIMIT):
+            if customer["customer_id"] not in seen and (
+                query in customer["name"].lower() or query in str(customer["customer_id"])
+            ):
+                seen.add(customer["customer_id"])
+                yield customer
+
+    def search(self, query: str, limit: int, offset: int = 0) -> tuple[list[dict], bool]:
+        """
+        Search customers by name or ID.
+
+        Every backend ranks matches the same way: customers whose full name
+        starts with the query, then those with a later word of the name
+        starting with it, then those whose ID starts with it, each group
+        ordered by the matched text and then ID. Substring matches follow,
+        looked for among the first CUSTOMER_SEARCH_SUBSTRING_SCAN_LIMIT
+        customers by name.
+
+        Args:
+            query: Search text (case-insensitive); empty returns all customers by name
+            limit: Page size
+            offset: Number of matches to skip
+
+        Returns:
+            Tuple of (matching customers, whether more matches exist)
+        """
+        matches = list(islice(self._iter_matches(query.strip().lower()), offset, offset + limit + 1))
+        return matches[:limit], len(matches) > limit
+
+
+class JsonCustomerStore(CustomerStore):
+    """
+    Indexed, file-backed view of customers.json.
+
+    The file is parsed on first access and again only when its mtime or size
+    changes, so repeated lookups cost a stat() plus a dict lookup.
+    """
+
+    def __init__(self, path: Path = CUSTOMERS_FILE):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._signature: Optional[tuple[int, int]] = None
+        self._customers: list[dict] = []
+        self._by_id: dict[int, dict] = {}
+        self._by_name: dict[str, dict] = {}
+        self._by_name_sorted: list[dict] = []
+        self._by_search_name: list[dict] = []
+        self._search_keys: list[tuple[int, str, int, int]] = []
+
+    def _file_signature(self) -> tuple[int, int]:
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _build_indexes(self, customers: list[dict]) -> None:
+        by_id: dict[int, dict] = {}
+        by_name: dict[str, dict] = {}
+        for customer in customers:
+            # Keep the first record on duplicates, matching the old linear scan
+            by_id.setdefault(customer["customer_id"], customer)
+            by_name.setdefault(customer["name"], customer)
+
+        by_name_sorted = sorted(customers, key=lambda c: (c["name"], c["customer_id"]))
+
+        # Sorted (kind, key, customer ID, position) tuples for prefix search,
+        # in the same order as SQLiteCustomerStore's search key index
+        keys: list[tuple[int, str, int, int]] = []
+        for position, customer in enumerate(customers):
+            keys.extend(
+                (kind, key, customer["customer_id"], position)
+                for kind, key in search_keys(customer)
+            )
+        keys.sort()
+
+        self._customers = customers
+        self._by_id = by_id
+        self._by_name = by_name
+        self._by_name_sorted = by_name_sorted
+        self._by_search_name = [
+            customers[position] for kind, _, _, position in keys if kind == MATCH_NAME
+        ]
+        self._search_keys = keys
+
+    def refresh(self) -> None:
+        """Reload the customer file if it changed since the last load."""
+        try:
+            signature = self._file_signature()
+        except FileNotFoundError:
+            logger.error("Customers file not found: %s", self.path)
+            raise
+
+        if signature == self._signature:
+            return
+
+        with self._lock:
+            if signature == self._signature:
+                return
+            try:
+                with open(self.path, "r") as f:
+                    customers = json.load(f)
+            except json.JSONDecodeError as e:
+                logger.error("Invalid JSON in customers file: %s", e)
+                raise
+            self._build_indexes(customers)
+            self._signature = signature
+            logger.info("Indexed %s customers from %s", len(customers), self.path)
+
+    def get_by_id(self, customer_id: int) -> Optional[dict]:
+        self.refresh()
+        return self._by_id.get(customer_id)
+
+    def get_by_name(self, name: str) -> Optional[dict]:
+        self.refresh()
+        return self._by_name.get(name)
+
+    def sorted_names(self) -> list[str]:
+        self.refresh()
+        return [c["name"] for c in self._by_name_sorted]
+
+    def first(self) -> Optional[dict]:
+        self.refresh()
+        return self._customers[0] if self._customers else None
+
+    def count(self) -> int:
+        self.refresh()
+        return len(self._customers)
+
+    def _iter_all(self) -> Iterator[dict]:
+        self.refresh()
+        yield from self._by_name_sorted
+
+    def _iter_prefix(self, kind: int, prefix: str) -> Iterator[dict]:
+        self.refresh()
+        customers = self._customers
+        keys = self._search_keys
+        index = bisect.bisect_left(keys, (kind, prefix))
+        while index < len(keys) and keys[index][0] == kind and keys[index][1].startswith(prefix):
+            yield customers[keys[index][3]]
+            index += 1
+
+    def _iter_by_search_name(self, limit: int) -> Iterator[dict]:
+        self.refresh()
+        yield from islice(self._by_search_name, limit)
+
+
+class SQLiteCustomerStore(CustomerStore):
+    """
+    SQLite-backed customer store.
+
+    Customers are stored one row each with indexes on customer_id, name,
+    email and tier, so lookups are O(log n) and memory use does not grow
+    with the size of the customer base. Search keys (see search_keys())
+    live in their own table, so prefix search is an index range scan that
+    ranks like JsonCustomerStore.
+    """
+
+    _COLUMNS = "customer_id, name, email, tier"
+    _JOINED_COLUMNS = "c.customer_id, c.name, c.email, c.tier"
+
+    def __init__(self, db_path: str | Path = config.CUSTOMERS_DB_NAME):
+        self.db_path = str(db_path)
+        self._local = threading.local()
+        # Every thread's connection, so close() and dead-thread cleanup reach them
+        self._connections: dict[int, tuple[threading.Thread, sqlite3.Connection]] = {}
+        self._connections_lock = threading.Lock()
+        self._closed = False
+
+        init_conn = self._connect()
+        self._init_db(init_conn)
+        init_conn.close()
+        atexit.register(self.close)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """Get a thread-local database connection."""
+        if self._closed:
+            # close() cannot reach other threads' locals; drop this thread's closed connection
+            self._local.connection = None
+            raise RuntimeError(f"Customer store {self.db_path} is closed")
+        conn = getattr(self._local, "connection", None)
+        if conn is not None:
+            return conn
+
+        conn = self._connect()
+        thread = threading.current_thread()
+        with self._connections_lock:
+            # Server worker threads come and go; close what finished ones left
+            for ident, (owner, stale) in list(self._connections.items()):
+                if not owner.is_alive():
+                    stale.close()
+                    del self._connections[ident]
+            self._connections[id(thread)] = (thread, conn)
+        self._local.connection = conn
+        return conn
+
+    def close(self) -> None:
+        """Close every thread's connection (also registered with atexit)."""
+        with self._connections_lock:
+            self._closed = True
+            connections = [conn for _, conn in self._connections.values()]
+            self._connections.clear()
+        for conn in connections:
+            conn.close()
+
+    def _init_db(self, conn: sqlite3.Connection) -> None:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS customers (
+                customer_id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                email TEXT,
+                tier TEXT NOT NULL DEFAULT 'basic'
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_customers_name ON customers (name)")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_customers_name_nocase "
+            "ON customers (name COLLATE NOCASE)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_customers_email ON customers (email)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_customers_tier ON customers (tier)")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS customer_search_keys (
+                kind INTEGER NOT NULL,
+                key TEXT NOT NULL,
+                customer_id INTEGER NOT NULL,
+                PRIMARY KEY (kind, key, customer_id)
+            ) WITHOUT ROWID
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_customer_search_keys_customer "
+            "ON customer_search_keys (customer_id)"
+        )
+        conn.commit()
+
+        # Databases imported before search keys existed get them once
+        (has_keys,) = conn.execute("SELECT EXISTS (SELECT 1 FROM customer_search_keys)").fetchone()
+        (has_customers,) = conn.execute("SELECT EXISTS (SELECT 1 FROM customers)").fetchone()
+        if has_customers and not has_keys:
+            rows = conn.execute(f"SELECT {self._COLUMNS} FROM customers")
+            with conn:
+                while batch := rows.fetchmany(config.CUSTOMER_IMPORT_BATCH_SIZE):
+                    self._write_search_keys(conn, [self._row_to_dict(row) for row in batch])
+            logger.info("Built customer search keys for %s", self.db_path)
+
+    @staticmethod
+    def _write_search_keys(conn: sqlite3.Connection, customers: list[dict]) -> None:
+        conn.executemany(
+            "DELETE FROM customer_search_keys WHERE customer_id = ?",
+            [(c["customer_id"],) for c in customers],
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO customer_search_keys (kind, key, customer_id) VALUES (?, ?, ?)",
+            [
+                (kind, key, c["customer_id"])
+                for c in customers
+                for kind, key in search_keys(c)
+            ],
+        )
+
+    @staticmethod
+    def _row_to_dict(row: Optional[tuple]) -> Optional[dict]:
+        if row is None:
+            return None
+        customer_id, name, email, tier = row
+        return {"customer_id": customer_id, "name": name, "email": email, "tier": tier}
+
+    def get_by_id(self, customer_id: int) -> Optional[dict]:
+        row = self._get_connection().execute(
+            f"SELECT {self._COLUMNS} FROM customers WHERE customer_id = ?",
+            (customer_id,),
+        ).fetchone()
+        return self._row_to_dict(row)
+
+    def get_by_name(self, name: str) -> Optional[dict]:
+        row = self._get_connection().execute(
+            f"SELECT {self._COLUMNS} FROM customers WHERE name = ? ORDER BY customer_id LIMIT 1",
+            (name,),
+        ).fetchone()
+        return self._row_to_dict(row)
+
+    def get_by_email(self, email: str) -> Optional[dict]:
+        """Return the first customer with this email, or None."""
+        row = self._get_connection().execute(
+            f"SELECT {self._COLUMNS} FROM customers WHERE email = ? ORDER BY customer_id LIMIT 1",
+            (email,),
+        ).fetchone()
+        return self._row_to_dict(row)
+
+    def sorted_names(self) -> list[str]:
+        rows = self._get_connection().execute("SELECT name FROM customers ORDER BY name")
+        return [name for (name,) in rows]
+
+    def first(self) -> Optional[dict]:
+        row = self._get_connection().execute(
+            f"SELECT {self._COLUMNS} FROM customers ORDER BY customer_id LIMIT 1"
+        ).fetchone()
+        return self._row_to_dict(row)
+
+    def count(self) -> int:
+        (total,) = self._get_connection().execute("SELECT COUNT(*) FROM customers").fetchone()
+        return total
+
+    def _iter_all(self) -> Iterator[dict]:
+        for row in self._get_connection().execute(
+            f"SELECT {self._COLUMNS} FROM customers ORDER BY name, customer_id"
+        ):
+            yield self._row_to_dict(row)
+
+    def _iter_prefix(self, kind: int, prefix: str) -> Iterator[dict]:
+        # A range scan on the search key primary key; BINARY order on UTF-8
+        # matches Python's code point order, so the ranking is the JSON store's
+        rows = self._get_connection().execute(
+            f"""
+            SELECT {self._JOINED_COLUMNS}
+            FROM customer_search_keys k JOIN customers c ON c.customer_id = k.customer_id
+            WHERE k.kind = ? AND k.key >= ? AND k.key < ?
+            ORDER BY k.key, k.customer_id
+            """,
+            (kind, prefix, prefix + "\U0010ffff"),
+        )
+        for row in rows:
+            yield self._row_to_dict(row)
+
+    def _iter_by_search_name(self, limit: int) -> Iterator[dict]:
+        rows = self._get_connection().execute(
+            f"""
+            SELECT {self._JOINED_COLUMNS}
+            FROM customer_search_keys k JOIN customers c ON c.customer_id = k.customer_id
+            WHERE k.kind = ?
+            ORDER BY k.key, k.customer_id
+            LIMIT ?
+            """,
+            (MATCH_NAME, limit),
+        )
+        for row in rows:
+            yield self._row_to_dict(row)
+
+    def upsert_many(self, customers: Iterable[dict]) -> int:
+        """
+        Insert or replace a batch of customers in a single transaction.
+
+        Args:
+            customers: Customer dictionaries to write
+
+        Returns:
+            Number of rows written
+        """
+        rows = [
+            (c["customer_id"], c["name"], c.get("email"), c.get("tier", "basic"))
+            for c in customers
+        ]
+        conn = self._get_connection()
+        with conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO customers ({self._COLUMNS}) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._write_search_keys(conn, [self._row_to_dict(row) for row in rows])
+        return len(rows)
+
+
+# =============================================================================
+# BULK IMPORT
+# =============================================================================
+
+
+def _iter_json_array(f, chunk_size: int = 1 << 16) -> Iterator[dict]:
+    """Yield objects from a top-level JSON array without loading the whole file."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    started = False
+    eof = False
+
+    while True:
+        # Skip separators between array elements
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if not started and pos < len(buffer):
+            if buffer[pos] != "[":
+                raise ValueError("Expected a JSON array of customers")
+            started = True
+            pos += 1
+            continue
+        if started and pos < len(buffer) and buffer[pos] == "]":
+            return
+
+        if pos < len(buffer):
+            try:
+                obj, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                yield obj
+                pos = end
+                continue
+
+        if eof:
+            if started:
+                raise ValueError("Unterminated JSON array of customers")
+            return
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+
+def iter_customer_file(path: str | Path) -> Iterator[dict]:
+    """
+    Stream customer records from a JSON array or JSONL file.
+
+    Args:
+        path: Path to a `.json` (array) or `.jsonl` (one object per line) file
+
+    Yields:
+        Customer dictionaries
+    """
+    path = Path(path)
+    with open(path, "r") as f:
+        if path.suffix in (".jsonl", ".ndjson"):
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    logger.error("Invalid JSON on line %s of %s: %s", line_number, path, e)
+                    raise
+        else:
+            yield from _iter_json_array(f)
+
+
+def import_customers(
+    source: str | Path,
+    store: SQLiteCustomerStore,
+    batch_size: int = config.CUSTOMER_IMPORT_BATCH_SIZE,
+) -> int:
+    """
+    Stream customers from a JSON/JSONL file into a SQLite store.
+
+    Records are written in batched transactions, so memory use is bounded by
+    `batch_size` regardless of the file size. Existing customers with the
+    same ID are replaced.
+
+    Args:
+        source: Path to the customer file
+        store: Destination store
+        batch_size: Number of customers per transaction
+
+    Returns:
+        Number of customers imported
+    """
+    total = 0
+    batch: list[dict] = []
+    for customer in iter_customer_file(source):
+        batch.append(customer)
+        if len(batch) >= batch_size:
+            total += store.upsert_many(batch)
+            batch.clear()
+            logger.debug("Imported %s customers from %s", total, source)
+    if batch:
+        total += store.upsert_many(batch)
+
+    logger.info("Imported %s customers from %s into %s", total, source, store.db_path)
+    return total
+
+
+# =============================================================================
+# STORE SELECTION
+# =============================================================================
+
+_store: Optional[CustomerStore] = None
+_store_lock = threading.Lock()
+
+
+def get_customer_store() -> CustomerStore:
+    """Return the process-wide customer store, creating it on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if config.CUSTOMER_STORE_BACKEND == "sqlite":
+                    _store = SQLiteCustomerStore(config.CUSTOMERS_DB_NAME)
+                else:
+                    _store = JsonCustomerStore(CUSTOMERS_FILE)
+                logger.info("Using %s for customer lookups", type(_store).__name__)
+    return _store
+
+
+def set_customer_store(store: CustomerStore) -> None:
+    """Replace the process-wide customer store."""
+    global _store
+    _store = store
+
+
+# =============================================================================
+# LOOKUP API
+# =============================================================================
+
+
 def get_customer_by_id(customer_id: int) -> Optional[dict]:
     """
     Get a customer by their ID.
@@ -51,12 +644,11 @@ def get_customer_by_id(customer_id: int) -> Optional[dict]:
     Returns:
         Customer dictionary or None if not found
     """
-    customers = load_customers()
-    for customer in customers:
-        if customer["customer_id"] == customer_id:
-            logger.debug(f"Found customer {customer_id}: {customer['name']}")
-            return customer
-    logger.warning(f"Customer {customer_id} not found")
+    customer = get_customer_store().get_by_id(customer_id)
+    if customer is not None:
+        logger.debug("Found customer %s: %s", customer_id, customer["name"])
+        return customer
+    logger.warning("Customer %s not found", customer_id)
     return None
 
 
@@ -70,12 +662,11 @@ def get_customer_by_name(name: str) -> Optional[dict]:
     Returns:
         Customer dictionary or None if not found
     """
-    customers = load_customers()
-    for customer in customers:
-        if customer["name"] == name:
-            logger.debug(f"Found customer by name: {name}")
-            return customer
-    logger.warning(f"Customer with name '{name}' not found")
+    customer = get_customer_store().get_by_name(name)
+    if customer is not None:
+        logger.debug("Found customer by name: %s", name)
+        return customer
+    logger.warning("Customer with name '%s' not found", name)
     return None
 
 
@@ -86,9 +677,33 @@ def get_all_customer_names() -> list[str]:
     Returns:
         List of customer names sorted alphabetically
     """
-    customers = load_customers()
-    names = [c["name"] for c in customers]
-    return sorted(names)
+    return get_customer_store().sorted_names()
+
+
+def search_customers(
+    query: str,
+    limit: int = config.CUSTOMER_SEARCH_PAGE_SIZE,
+    offset: int = 0,
+) -> tuple[list[dict], bool]:
+    """
+    Search customers by name or ID for typeahead selection.
+
+    Args:
+        query: Search text (case-insensitive prefix or substring)
+        limit: Maximum number of results to return
+        offset: Number of results to skip (for pagination)
+
+    Returns:
+        Tuple of (matching customer dictionaries, whether more results exist)
+    """
+    results, has_more = get_customer_store().search(query, limit, offset)
+    logger.debug(
+        "Customer search '%s' (offset %s) returned %s results",
+        query,
+        offset,
+        len(results),
+    )
+    return results, has_more
 
 
 def customer_dict_to_context(customer_dict: dict) -> UserAccountContext:
@@ -140,11 +755,45 @@ def get_default_customer() -> UserAccountContext:
     Raises:
         ValueError: If no customers exist
     """
-    customers = load_customers()
-    if not customers:
-        logger.error("No customers found in customers.json")
+    default = get_customer_store().first()
+    if default is None:
+        logger.error("No customers found in customer store")
         raise ValueError("No customers available")
 
-    default = customers[0]
-    logger.info(f"Using default customer: {default['name']} (ID: {default['customer_id']})")
+    logger.info("Using default customer: %s (ID: %s)", default["name"], default["customer_id"])
     return customer_dict_to_context(default)
+
+
+# =============================================================================
+# COMMAND LINE
+# =============================================================================
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Customer store utilities")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser(
+        "import", help="Bulk import a JSON/JSONL customer file into SQLite"
+    )
+    import_parser.add_argument("source", help="Path to a .json or .jsonl customer file")
+    import_parser.add_argument("--db", default=config.CUSTOMERS_DB_NAME, help="SQLite database path")
+    import_parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=config.CUSTOMER_IMPORT_BATCH_SIZE,
+        help="Customers per transaction",
+    )
+
+    args = parser.parse_args()
+    if args.command == "import":
+        store = SQLiteCustomerStore(args.db)
+        try:
+            total = import_customers(args.source, store, batch_size=args.batch_size)
+            print(f"Imported {total} customers into {args.db} ({store.count()} total)")
+        finally:
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
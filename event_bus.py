@@ -0,0 +1,344 @@
+"""
+Event bus for agent hook events.
+
+AgentToolUsageLoggingHooks publishes AgentHookEvent objects here instead of
+logging or rendering inline. publish() never blocks. Each sink has its own
+bounded queue and worker thread, so a slow sink (a file on a busy disk, a
+Streamlit session nobody is watching) can only delay or drop its own events;
+it never stalls an agent run or the other sinks.
+
+Sinks:
+- LogSink: writes events to the application log
+- MetricsSink: counts events and times tool calls (also fed to metrics.py)
+- FileSink: appends events as JSON lines
+- StreamlitSink: buffers events per customer until the Streamlit script
+  thread drains and renders them in batches
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Iterable, Optional, TextIO, TypeVar
+
+import config
+import metrics
+from logging_config import get_logger
+from models import AgentHookEvent
+
+logger = get_logger(__name__)
+
+S = TypeVar("S", bound="EventSink")
+
+# Tell a sink worker to exit
+_STOP = object()
+
+# Tool durations kept by MetricsSink
+_DURATION_WINDOW = 10000
+
+
+class EventSink:
+    """Base class for sinks; write() receives batches on the sink's own worker thread."""
+
+    name = "sink"
+
+    def write(self, events: list[AgentHookEvent]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class LogSink(EventSink):
+    """Logs hook events at the levels the hooks used to log them, tagged with their turn."""
+
+    name = "log"
+
+    def write(self, events: list[AgentHookEvent]) -> None:
+        for event in events:
+            extra = {
+                "event": event.type,
+                "agent": event.agent_name,
+                "turn_id": event.turn_id,
+                "customer_id": event.customer_id,
+                "turn_elapsed_ms": event.turn_elapsed_ms,
+            }
+            if event.tool is not None:
+                extra["tool"] = event.tool
+            if event.type == "tool_started":
+                logger.debug("Agent '%s' starting tool: %s", event.agent_name, event.tool, extra=extra)
+            elif event.type == "tool_finished":
+                logger.debug("Agent '%s' completed tool: %s", event.agent_name, event.tool, extra=extra)
+            elif event.type == "handoff":
+                logger.info(
+                    "Agent handoff in hook: %s -> %s",
+                    event.source_agent,
+                    event.agent_name,
+                    extra=extra,
+                )
+            elif event.type == "agent_started":
+                logger.info(
+                    "Agent '%s' activated for customer %s",
+                    event.agent_name,
+                    event.customer_id,
+                    extra=extra,
+                )
+            elif event.type == "agent_finished":
+                logger.info(
+                    "Agent '%s' completed for customer %s",
+                    event.agent_name,
+                    event.customer_id,
+                    extra=extra,
+                )
+
+
+class MetricsSink(EventSink):
+    """Event counts per type and tool call durations per tool, mirrored to the Prometheus metrics."""
+
+    name = "metrics"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts: dict[str, int] = {}
+        self._started: dict[tuple[int, str, str], list[float]] = {}
+        self._durations: dict[str, deque[float]] = {}
+
+    def write(self, events: list[AgentHookEvent]) -> None:
+        with self._lock:
+            for event in events:
+                self.counts[event.type] = self.counts.get(event.type, 0) + 1
+                if event.type == "handoff":
+                    metrics.HANDOFFS.labels(event.source_agent, event.agent_name, "llm").inc()
+                if event.tool is None:
+                    continue
+                key = (event.customer_id, event.agent_name, event.tool)
+                if event.type == "tool_started":
+                    self._started.setdefault(key, []).append(event.timestamp)
+                elif event.type == "tool_finished" and self._started.get(key):
+                    duration = event.timestamp - self._started[key].pop(0)
+                    if not self._started[key]:
+                        del self._started[key]
+                    metrics.TOOL_SECONDS.labels(event.agent_name, event.tool).observe(duration)
+                    self._durations.setdefault(
+                        event.tool, deque(maxlen=_DURATION_WINDOW)
+                    ).append(duration)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "events": dict(self.counts),
+                "tools": {
+                    tool: {
+                        "calls": len(durations),
+                        "mean_seconds": sum(durations) / len(durations),
+                        "max_seconds": max(durations),
+                    }
+                    for tool, durations in self._durations.items()
+                },
+            }
+
+
+class FileSink(EventSink):
+    """Appends events to a JSONL file."""
+
+    name = "file"
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._file: Optional[TextIO] = None
+
+    def write(self, events: list[AgentHookEvent]) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write("".join(event.model_dump_json() + "\n" for event in events))
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class StreamlitSink(EventSink):
+    """
+    Buffers events per customer for the Streamlit UI.
+
+    Streamlit can only render from its script thread, so this sink just keeps
+    the latest events; main.py drains them and renders each batch at once.
+    """
+
+    name = "streamlit"
+
+    def __init__(self, max_pending: int = 200):
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._pending: dict[int, deque[AgentHookEvent]] = {}
+
+    def write(self, events: list[AgentHookEvent]) -> None:
+        with self._lock:
+            for event in events:
+                pending = self._pending.get(event.customer_id)
+                if pending is None:
+                    pending = self._pending[event.customer_id] = deque(maxlen=self.max_pending)
+                pending.append(event)
+
+    def drain(self, customer_id: int) -> list[AgentHookEvent]:
+        """Return and forget the customer's buffered events."""
+        with self._lock:
+            pending = self._pending.pop(customer_id, None)
+        return list(pending) if pending else []
+
+
+class _SinkWorker:
+    """Bounded queue plus worker thread feeding one sink in batches."""
+
+    def __init__(self, sink: EventSink, max_events: int, batch_size: int):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_events)
+        self._thread = threading.Thread(
+            target=self._run, name=f"event-sink-{sink.name}", daemon=True
+        )
+        self._thread.start()
+
+    def offer(self, event: AgentHookEvent) -> None:
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def stop(self, timeout: float) -> None:
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.warning("Event sink '%s' did not drain before shutdown", self.sink.name)
+            return
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch = []
+            item = self._queue.get()
+            while True:
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+                if stopping or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            try:
+                if batch:
+                    self.sink.write(batch)
+                    self.written += len(batch)
+            except Exception as e:
+                self.errors += 1
+                logger.error("Event sink '%s' failed: %s", self.sink.name, e, exc_info=True)
+            finally:
+                for _ in range(len(batch) + stopping):
+                    self._queue.task_done()
+        self.sink.close()
+
+
+class EventBus:
+    """Fans hook events out to sinks without ever blocking the publisher."""
+
+    def __init__(
+        self,
+        sinks: Iterable[EventSink] = (),
+        max_events: int = config.EVENT_BUS_MAX_EVENTS,
+        batch_size: int = config.EVENT_BUS_BATCH_SIZE,
+    ):
+        self.max_events = max_events
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        # Replaced, never mutated, so publish() can iterate without the lock
+        self._workers: tuple[_SinkWorker, ...] = ()
+        for sink in sinks:
+            self.add_sink(sink)
+
+    def add_sink(self, sink: S) -> S:
+        with self._lock:
+            self._workers = self._workers + (_SinkWorker(sink, self.max_events, self.batch_size),)
+        return sink
+
+    def get_sink(self, sink_type: type[S]) -> Optional[S]:
+        """Return the first registered sink of `sink_type`."""
+        for worker in self._workers:
+            if isinstance(worker.sink, sink_type):
+                return worker.sink
+        return None
+
+    def publish(self, event: AgentHookEvent) -> None:
+        for worker in self._workers:
+            worker.offer(event)
+
+    def flush(self, timeout: float = 1.0) -> bool:
+        """Wait until every sink has written its queued events; False on timeout."""
+        deadline = time.monotonic() + timeout
+        return all(
+            worker.flush(max(0.0, deadline - time.monotonic())) for worker in self._workers
+        )
+
+    def close(self, timeout: float = 5.0) -> None:
+        with self._lock:
+            workers, self._workers = self._workers, ()
+        for worker in workers:
+            worker.stop(timeout)
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {
+            worker.sink.name: {
+                "queued": worker._queue.qsize(),
+                "written": worker.written,
+                "dropped": worker.dropped,
+                "errors": worker.errors,
+            }
+            for worker in self._workers
+        }
+
+
+_bus: Optional[EventBus] = None
+_bus_lock = threading.Lock()
+
+
+def get_event_bus() -> EventBus:
+    """Return the process-wide event bus with the log, metrics and optional file sinks."""
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                sinks: list[EventSink] = [LogSink(), MetricsSink()]
+                if config.EVENT_LOG_FILE:
+                    sinks.append(FileSink(config.EVENT_LOG_FILE))
+                _bus = EventBus(sinks)
+    return _bus
+
+
+def get_streamlit_sink() -> StreamlitSink:
+    """Return the Streamlit sink, registering it on the event bus on first use."""
+    bus = get_event_bus()
+    with _bus_lock:
+        sink = bus.get_sink(StreamlitSink)
+        if sink is None:
+            sink = bus.add_sink(StreamlitSink())
+    return sink
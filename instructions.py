@@ -0,0 +1,164 @@
+"""
+Cache-friendly agent instructions.
+
+Model providers cache the longest prompt prefix they have seen before, and
+the system instructions open every request. Agents here therefore keep their
+instructions as a static prefix, identical for every customer, followed by a
+short customer section (name, tier, tier-specific perks) at the very end.
+
+CachedInstructions is the callable the agents pass as `instructions`. It
+renders the customer section once per (agent, tier, customer) and reuses the
+result on later turns.
+
+Report cacheable vs. per-customer token counts for every agent:
+    python instructions.py
+"""
+
+import json
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+from agents import Agent, RunContextWrapper
+
+import config
+from models import UserAccountContext
+
+CustomerSection = Callable[[UserAccountContext], str]
+
+
+def customer_section(
+    premium_label: str = "",
+    premium_note: str = "",
+    include_email: bool = False,
+) -> CustomerSection:
+    """
+    Build the per-customer suffix renderer for an agent.
+
+    Args:
+        premium_label: Shown next to the tier for non-basic customers
+        premium_note: Extra line for non-basic customers
+        include_email: Whether the agent needs the customer's email
+
+    Returns:
+        Function rendering the customer section for a context
+    """
+
+    def render(context: UserAccountContext) -> str:
+        premium = context.tier != "basic"
+        lines = [
+            "",
+            "    CURRENT CUSTOMER (the customer you are helping right now):",
+            f"    - Name: {context.name}",
+        ]
+        if include_email:
+            lines.append(f"    - Email: {context.email}")
+        tier = f"    - Tier: {context.tier}"
+        if premium and premium_label:
+            tier += f" ({premium_label})"
+        lines.append(tier)
+        if premium and premium_note:
+            lines.append(f"    {premium_note}")
+        return "\n".join(lines) + "\n"
+
+    return render
+
+
+class CachedInstructions:
+    """
+    Static instruction prefix plus a memoized per-customer section.
+
+    The customer section always goes after the prefix, so the opening of an
+    agent's prompt is identical for every customer and can be served from the
+    provider's prompt cache.
+    """
+
+    def __init__(
+        self,
+        prefix: str,
+        section: CustomerSection,
+        max_entries: int = config.INSTRUCTIONS_CACHE_MAX_ENTRIES,
+    ):
+        self.prefix = prefix
+        self.section = section
+        self.max_entries = max_entries
+        self._rendered: OrderedDict[tuple, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(
+        self,
+        wrapper: RunContextWrapper[UserAccountContext],
+        agent: Agent[UserAccountContext],
+    ) -> str:
+        context = wrapper.context
+        # Name and email are part of the key so profile changes render fresh text
+        key = (agent.name, context.tier, context.customer_id, context.name, context.email)
+        with self._lock:
+            text = self._rendered.get(key)
+            if text is not None:
+                self._rendered.move_to_end(key)
+                self.hits += 1
+                return text
+            self.misses += 1
+
+        text = self.prefix + self.section(context)
+        with self._lock:
+            self._rendered[key] = text
+            while len(self._rendered) > self.max_entries:
+                self._rendered.popitem(last=False)
+        return text
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._rendered), "hits": self.hits, "misses": self.misses}
+
+
+def token_report(
+    agents: list[Agent[Any]], contexts: list[UserAccountContext]
+) -> dict[str, dict[str, float]]:
+    """
+    Estimate cacheable and per-customer instruction tokens for each agent.
+
+    Args:
+        agents: Agents whose instructions are CachedInstructions
+        contexts: Customers to render the customer section for
+
+    Returns:
+        Per agent: prefix tokens, mean and max customer-section tokens, and
+        the cacheable share of the instructions
+    """
+    from session_summary import estimate_tokens
+
+    report = {}
+    for agent in agents:
+        instructions = agent.instructions
+        if not isinstance(instructions, CachedInstructions):
+            continue
+        prefix_tokens = estimate_tokens(instructions.prefix)
+        section_tokens = [estimate_tokens(instructions.section(context)) for context in contexts]
+        mean_section = sum(section_tokens) / len(section_tokens) if section_tokens else 0.0
+        report[agent.name] = {
+            "cacheable_tokens": prefix_tokens,
+            "variable_tokens_mean": mean_section,
+            "variable_tokens_max": max(section_tokens, default=0),
+            "cacheable_share": prefix_tokens / (prefix_tokens + mean_section),
+        }
+    return report
+
+
+def main() -> None:
+    import customers
+    from my_agents import account_agent, billing_agent, order_agent, technical_agent, triage_agent
+
+    matches, _ = customers.search_customers("", limit=1000)
+    contexts = [customers.customer_dict_to_context(customer) for customer in matches]
+    agents = [triage_agent, technical_agent, billing_agent, order_agent, account_agent]
+    sys.stdout.write(json.dumps(token_report(agents, contexts), indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Local intent router.
+
+Picks the specialist for a new issue without an LLM triage turn. The intents
+mirror the issue classification guide in dynamic_triage_agent_instructions:
+technical, billing, order and account.
+
+1. Rules: the multilingual lexicons from topic_classifier. A message whose
+   support vocabulary points at exactly one intent is routed there.
+2. Model: one-vs-rest logistic regressions over hashed character n-grams
+   (NgramTopicModel), normalized across intents. The top intent is used when
+   its share is at least `threshold`.
+
+Anything else falls back to triage_agent, which can ask a clarifying
+question. ConversationService uses the router to start runs directly on the
+matching specialist.
+
+CLI:
+    python intent_router.py train labeled.jsonl --out intent_model.json
+    python intent_router.py evaluate labeled.jsonl --model intent_model.json
+
+Labeled JSONL lines look like {"text": "I was charged twice", "intent": "billing"}.
+"""
+
+import argparse
+import json
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+import config
+from logging_config import get_logger
+from topic_classifier import NgramTopicModel, lexicon_hits
+from verdict_cache import normalize_text
+
+logger = get_logger(__name__)
+
+INTENTS: tuple[str, ...] = ("technical", "billing", "order", "account")
+
+INTENT_SEED_EXAMPLES: tuple[tuple[str, str], ...] = (
+    # Technical: errors, crashes, performance, how-to, setup
+    ("The app won't load", "technical"),
+    ("I'm getting an error message", "technical"),
+    ("The app crashes every time I open it", "technical"),
+    ("Pages are really slow today", "technical"),
+    ("How do I set up the integration with Slack?", "technical"),
+    ("The export feature is broken", "technical"),
+    ("Sync stopped working after the update", "technical"),
+    ("앱이 계속 꺼져요", "technical"),
+    ("오류 메시지가 떠요", "technical"),
+    ("La aplicación no carga", "technical"),
+    ("Me sale un error al abrir la app", "technical"),
+    ("アプリが起動しません", "technical"),
+    ("エラーが表示されます", "technical"),
+    # Billing: payments, refunds, subscriptions, invoices
+    ("I was charged twice", "billing"),
+    ("Cancel my subscription", "billing"),
+    ("I need a refund", "billing"),
+    ("My payment failed", "billing"),
+    ("Can I switch to the annual plan?", "billing"),
+    ("Update my credit card", "billing"),
+    ("There's a wrong amount on my invoice", "billing"),
+    ("환불해 주세요", "billing"),
+    ("결제가 두 번 됐어요", "billing"),
+    ("Quiero cancelar mi suscripción", "billing"),
+    ("Me cobraron dos veces", "billing"),
+    ("返金してください", "billing"),
+    ("二重に請求されました", "billing"),
+    # Order: status, shipping, returns, tracking
+    ("Where's my order?", "order"),
+    ("I want to return this", "order"),
+    ("Wrong item shipped", "order"),
+    ("My package hasn't arrived", "order"),
+    ("Can I get the tracking number?", "order"),
+    ("The delivery is late", "order"),
+    ("Is this product back in stock?", "order"),
+    ("주문한 상품이 안 왔어요", "order"),
+    ("반품하고 싶어요", "order"),
+    ("¿Dónde está mi pedido?", "order"),
+    ("Quiero devolver este producto", "order"),
+    ("注文した商品が届きません", "order"),
+    ("返品したいです", "order"),
+    # Account: login, password, profile, security, deletion
+    ("Can't log in", "account"),
+    ("Forgot password", "account"),
+    ("Change my email", "account"),
+    ("Enable two-factor authentication", "account"),
+    ("Delete my account", "account"),
+    ("I want to export my data", "account"),
+    ("Someone else accessed my profile", "account"),
+    ("로그인이 안 돼요", "account"),
+    ("비밀번호를 잊어버렸어요", "account"),
+    ("No puedo iniciar sesión", "account"),
+    ("Olvidé mi contraseña", "account"),
+    ("ログインできません", "account"),
+    ("パスワードを忘れました", "account"),
+)
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    """Router output; `intent` is None when triage should decide."""
+
+    intent: Optional[str]
+    confidence: float
+    source: str  # rule, model, or fallback
+
+
+class IntentRouter:
+    """Rules plus one-vs-rest n-gram models over the four specialist intents."""
+
+    def __init__(
+        self,
+        models: dict[str, NgramTopicModel],
+        threshold: float = config.INTENT_ROUTER_THRESHOLD,
+    ):
+        missing = set(INTENTS) - set(models)
+        if missing:
+            raise ValueError(f"Missing intent models: {', '.join(sorted(missing))}")
+        self.models = models
+        self.threshold = threshold
+        self.rule_routes = 0
+        self.model_routes = 0
+        self.fallbacks = 0
+
+    @classmethod
+    def train(
+        cls,
+        examples: Iterable[tuple[str, str]] = INTENT_SEED_EXAMPLES,
+        epochs: int = 40,
+        **kwargs,
+    ) -> "IntentRouter":
+        """Train one binary model per intent on (text, intent) pairs."""
+        examples = list(examples)
+        models = {
+            # NgramTopicModel predicts P(positive); "off topic" here means "not this intent"
+            intent: NgramTopicModel().fit(
+                [(text, label != intent) for text, label in examples], epochs=epochs
+            )
+            for intent in INTENTS
+        }
+        return cls(models, **kwargs)
+
+    def save(self, path: str | Path) -> None:
+        data = {intent: model.to_dict() for intent, model in self.models.items()}
+        Path(path).write_text(json.dumps(data), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: str | Path, **kwargs) -> "IntentRouter":
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        return cls({intent: NgramTopicModel.from_dict(d) for intent, d in data.items()}, **kwargs)
+
+    def scores(self, text: str) -> dict[str, float]:
+        """Share of each intent among the one-vs-rest probabilities."""
+        normalized = normalize_text(text)
+        raw = {intent: model.predict_proba(normalized) for intent, model in self.models.items()}
+        total = sum(raw.values()) or 1.0
+        return {intent: p / total for intent, p in raw.items()}
+
+    def route(self, text: str) -> RouteDecision:
+        normalized = normalize_text(text)
+        categories, off_topic = lexicon_hits(normalized)
+        intents = [category for category in categories if category in INTENTS]
+        if len(intents) == 1 and not off_topic:
+            self.rule_routes += 1
+            return RouteDecision(intents[0], 1.0, "rule")
+
+        scores = self.scores(text)
+        intent, confidence = max(scores.items(), key=lambda item: item[1])
+        if confidence >= self.threshold and not off_topic:
+            self.model_routes += 1
+            return RouteDecision(intent, confidence, "model")
+        self.fallbacks += 1
+        return RouteDecision(None, confidence, "fallback")
+
+    def stats(self) -> dict[str, float]:
+        total = self.rule_routes + self.model_routes + self.fallbacks
+        return {
+            "rule_routes": self.rule_routes,
+            "model_routes": self.model_routes,
+            "fallbacks": self.fallbacks,
+            "fast_path_rate": (total - self.fallbacks) / total if total else 0.0,
+        }
+
+
+def load_router(path: str = config.INTENT_ROUTER_MODEL) -> IntentRouter:
+    """Load a saved router, or train one on the seed examples."""
+    if path and Path(path).exists():
+        logger.info("Loading intent router model from %s", path)
+        return IntentRouter.load(path)
+    if path:
+        logger.warning("Intent router model %s not found; training on seed examples", path)
+    return IntentRouter.train()
+
+
+_router: Optional[IntentRouter] = None
+
+
+def get_intent_router() -> IntentRouter:
+    """Return the process-wide intent router, loaded on first use."""
+    global _router
+    if _router is None:
+        _router = load_router()
+    return _router
+
+
+def read_labeled(path: str | Path) -> list[tuple[str, str]]:
+    """Read {"text", "intent"} JSONL examples."""
+    examples = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                if record["intent"] not in INTENTS:
+                    raise ValueError(f"Unknown intent: {record['intent']}")
+                examples.append((record["text"], record["intent"]))
+    return examples
+
+
+def evaluate(router: IntentRouter, examples: list[tuple[str, str]]) -> dict:
+    """Coverage and accuracy of fast-path routes on labeled examples."""
+    routed = correct = 0
+    confusion: dict[str, dict[str, int]] = {intent: {} for intent in INTENTS}
+    for text, label in examples:
+        decision = router.route(text)
+        predicted = decision.intent or "triage"
+        confusion[label][predicted] = confusion[label].get(predicted, 0) + 1
+        if decision.intent is not None:
+            routed += 1
+            correct += decision.intent == label
+    total = len(examples)
+    return {
+        "examples": total,
+        "threshold": router.threshold,
+        "coverage": routed / total if total else 0.0,
+        "routed_accuracy": correct / routed if routed else 0.0,
+        "misroutes": routed - correct,
+        "confusion": confusion,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train and evaluate the local intent router")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    train_parser = subparsers.add_parser("train", help="Train on labeled JSONL")
+    train_parser.add_argument("examples", help="JSONL of {text, intent} records")
+    train_parser.add_argument("--out", required=True, help="Where to save the router JSON")
+    train_parser.add_argument(
+        "--include-seed", action="store_true", help="Also train on the built-in seed examples"
+    )
+
+    evaluate_parser = subparsers.add_parser("evaluate", help="Report routing accuracy")
+    evaluate_parser.add_argument("examples", help="JSONL of {text, intent} records")
+    evaluate_parser.add_argument("--model", default=config.INTENT_ROUTER_MODEL, help="Router JSON")
+    evaluate_parser.add_argument("--threshold", type=float, default=config.INTENT_ROUTER_THRESHOLD)
+
+    args = parser.parse_args()
+    examples = read_labeled(args.examples)
+    if args.command == "train":
+        if args.include_seed:
+            examples.extend(INTENT_SEED_EXAMPLES)
+        IntentRouter.train(examples).save(args.out)
+        print(f"Trained on {len(examples)} examples; saved router to {args.out}")
+    elif args.command == "evaluate":
+        router = load_router(args.model)
+        router.threshold = args.threshold
+        sys.stdout.write(json.dumps(evaluate(router, examples), indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+"""
+Multi-tenant load generator.
+
+Simulates N customers drawn from the customer store, each running scripted
+multi-turn conversations (a weighted mix of billing, order, technical and
+account scripts) concurrently through the agent graph, every customer in
+its own session. Every `--interval` seconds it samples:
+
+- throughput: turns completed per second in the interval
+- queueing delay: time turns waited for a service slot, plus event loop lag
+- SQLite contention: connection pool waits and write-behind flushes
+- memory: process RSS and its growth since the start
+
+and prints a summary line; the full timeline and overall percentiles are
+written as JSON at the end. Use it with MODEL_PROVIDER=mock (or --mock) to
+find the concurrency ceiling of a single process.
+
+Usage:
+    python load_test.py --mock --customers 500 --duration 60 --max-turns 200
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+import dotenv
+
+# Before config is imported, so its os.getenv defaults see .env values
+dotenv.load_dotenv()
+from agents import RunConfig
+
+import config
+import customers
+import model_provider
+from benchmark import summarize
+from conversation_service import DEFAULT_SPECIALISTS, ConversationService
+from logging_config import get_logger
+from session_store import CustomerSession, SessionStore
+from session_summary import SummarizingSession
+
+logger = get_logger(__name__)
+
+SCRIPTS: dict[str, tuple[tuple[str, ...], ...]] = {
+    "billing": (
+        ("I was charged twice for my subscription.", "Can you refund the duplicate charge?", "Thanks!"),
+        ("I need a copy of my last invoice.", "Can I switch to a yearly plan?", "Great, thank you."),
+    ),
+    "order": (
+        ("Where is my order 48213?", "It was due yesterday.", "Can you expedite shipping?"),
+        ("I received the wrong item in order 55120.", "How do I return it?", "Okay, thanks."),
+    ),
+    "technical": (
+        ("The app crashes when I open settings.", "I'm on version 4.2 on Android.", "Still broken after reinstall."),
+        ("I get an error 500 when uploading files.", "It started this morning.", "Thanks for checking."),
+    ),
+    "account": (
+        ("I forgot my password and can't log in.", "My email hasn't changed.", "Got it, thanks."),
+        ("How do I enable two-factor authentication?", "I'd like to use an authenticator app.", "Done, thanks."),
+    ),
+}
+
+
+def parse_mix(text: str) -> dict[str, float]:
+    """Parse 'billing=2,order=1' into script weights (unlisted scripts get 0)."""
+    weights = {name: 0.0 for name in SCRIPTS}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCRIPTS:
+            raise ValueError(f"Unknown script mix entry: {name}")
+        weights[name] = float(weight or 1)
+    if not any(weights.values()):
+        raise ValueError("Script mix needs at least one positive weight")
+    return weights
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is KiB on Linux and bytes on macOS
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+# =============================================================================
+# LOAD GENERATOR
+# =============================================================================
+
+
+@dataclass
+class IntervalStats:
+    """Samples collected since the last snapshot."""
+
+    turns: int = 0
+    outcomes: dict[str, int] = field(default_factory=dict)
+    turn_seconds: list[float] = field(default_factory=list)
+    queued_seconds: list[float] = field(default_factory=list)
+    ttft_seconds: list[float] = field(default_factory=list)
+    loop_lag_seconds: list[float] = field(default_factory=list)
+
+
+class LoadGenerator:
+    """Drives concurrent simulated customers through a ConversationService."""
+
+    def __init__(
+        self,
+        service: ConversationService,
+        store: SessionStore,
+        customer_count: int,
+        mix: dict[str, float],
+        think_seconds: float = 0.0,
+        ramp_seconds: float = 0.0,
+        seed: int = 0,
+    ):
+        self.service = service
+        self.store = store
+        self.customer_count = customer_count
+        self.mix = mix
+        self.think_seconds = think_seconds
+        self.ramp_seconds = ramp_seconds
+        self.random = random.Random(seed)
+        self.run_id = time.strftime("%Y%m%d%H%M%S")
+        self.interval = IntervalStats()
+        self.totals = IntervalStats()
+        self.timeline: list[dict] = []
+        self.active_turns = 0
+        self._stop = asyncio.Event()
+        self._turn_budget: Optional[int] = None
+
+    def draw_customers(self) -> list[int]:
+        """Pick customer IDs from the store, reusing them if N exceeds its size."""
+        ids: list[int] = []
+        offset = 0
+        while len(ids) < self.customer_count:
+            page, has_more = customers.search_customers(
+                "", limit=min(500, self.customer_count - len(ids)), offset=offset
+            )
+            ids.extend(customer["customer_id"] for customer in page)
+            offset += len(page)
+            if not has_more:
+                break
+        if not ids:
+            raise RuntimeError("Customer store is empty")
+        return [ids[i % len(ids)] for i in range(self.customer_count)]
+
+    def _pick_script(self) -> tuple[str, tuple[str, ...]]:
+        names = list(self.mix)
+        name = self.random.choices(names, weights=[self.mix[n] for n in names])[0]
+        return name, self.random.choice(SCRIPTS[name])
+
+    def _record(self, name: str, value: float) -> None:
+        getattr(self.interval, name).append(value)
+        getattr(self.totals, name).append(value)
+
+    def _take_turn(self) -> bool:
+        if self._stop.is_set():
+            return False
+        if self._turn_budget is not None:
+            if self._turn_budget <= 0:
+                self._stop.set()
+                return False
+            self._turn_budget -= 1
+        return True
+
+    async def simulate_customer(self, index: int, customer_id: int) -> None:
+        """Run scripted conversations for one customer until the test stops."""
+        if self.ramp_seconds > 0:
+            await asyncio.sleep(self.ramp_seconds * index / self.customer_count)
+        conversation_number = 0
+        while not self._stop.is_set():
+            _, script = self._pick_script()
+            session = SummarizingSession(
+                CustomerSession(
+                    customer_id,
+                    session_id=f"load-{self.run_id}-{index}-{conversation_number}",
+                    store=self.store,
+                )
+            )
+            conversation = self.service.new_conversation(customer_id, session=session)
+            conversation_number += 1
+            for message in script:
+                if not self._take_turn():
+                    return
+                await self._run_turn(conversation, message)
+                if self.think_seconds > 0:
+                    await asyncio.sleep(self.random.uniform(0.5, 1.5) * self.think_seconds)
+
+    async def _run_turn(self, conversation, message: str) -> None:
+        started = time.perf_counter()
+        first_token = None
+        self.active_turns += 1
+        try:
+            async for event in self.service.run_turn(conversation, message):
+                if event.type == "text_delta" and first_token is None:
+                    first_token = time.perf_counter() - started
+                elif event.type in ("turn_completed", "input_blocked", "output_blocked", "error"):
+                    for stats in (self.interval, self.totals):
+                        stats.turns += 1
+                        stats.outcomes[event.type] = stats.outcomes.get(event.type, 0) + 1
+                    self._record("turn_seconds", time.perf_counter() - started)
+                    self._record("queued_seconds", event.data.get("queued_seconds", 0.0))
+                    if first_token is not None:
+                        self._record("ttft_seconds", first_token)
+        finally:
+            self.active_turns -= 1
+
+    async def _watch_loop_lag(self, period: float = 0.1) -> None:
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(period)
+            self._record("loop_lag_seconds", max(0.0, time.perf_counter() - started - period))
+
+    def _pool_totals(self) -> tuple[int, float, float]:
+        acquisitions = sum(pool.acquisitions for pool in self.store.pools)
+        waited = sum(pool.total_wait_seconds for pool in self.store.pools)
+        max_wait = max((pool.max_wait_seconds for pool in self.store.pools), default=0.0)
+        return acquisitions, waited, max_wait
+
+    async def _snapshot_loop(self, interval: float, started: float, baseline_rss: int) -> None:
+        last_time = started
+        last_acquisitions, last_waited, _ = self._pool_totals()
+        last_flushes = self.store.write_behind.flushes if self.store.write_behind else 0
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            now = time.perf_counter()
+            stats, self.interval = self.interval, IntervalStats()
+            acquisitions, waited, max_wait = self._pool_totals()
+            flushes = self.store.write_behind.flushes if self.store.write_behind else 0
+            rss = current_rss_bytes()
+            pool_acquisitions = acquisitions - last_acquisitions
+            snapshot = {
+                "elapsed_seconds": now - started,
+                "turns": stats.turns,
+                "turns_per_second": stats.turns / (now - last_time) if now > last_time else 0.0,
+                "active_turns": self.active_turns,
+                "outcomes": stats.outcomes,
+                "turn_p95_seconds": summarize(stats.turn_seconds)["p95"],
+                "queued_p95_seconds": summarize(stats.queued_seconds)["p95"],
+                "loop_lag_max_seconds": summarize(stats.loop_lag_seconds)["max"],
+                "sqlite_acquisitions": pool_acquisitions,
+                "sqlite_mean_wait_seconds": (
+                    (waited - last_waited) / pool_acquisitions if pool_acquisitions else 0.0
+                ),
+                "sqlite_max_wait_seconds": max_wait,
+                "write_behind_flushes": flushes - last_flushes,
+                "rss_bytes": rss,
+                "rss_growth_bytes": rss - baseline_rss,
+                "gc_objects": len(gc.get_objects()),
+            }
+            self.timeline.append(snapshot)
+            logger.info(
+                "t=%.0fs %.1f turns/s active=%d queued_p95=%.0fms sqlite_wait=%.2fms "
+                "rss=%.0fMiB (+%.0f)",
+                snapshot["elapsed_seconds"],
+                snapshot["turns_per_second"],
+                self.active_turns,
+                snapshot["queued_p95_seconds"] * 1000,
+                snapshot["sqlite_mean_wait_seconds"] * 1000,
+                rss / 2**20,
+                snapshot["rss_growth_bytes"] / 2**20,
+            )
+            last_time, last_acquisitions, last_waited, last_flushes = (
+                now, acquisitions, waited, flushes,
+            )
+
+    async def run(
+        self,
+        duration: float,
+        max_turns: Optional[int] = None,
+        interval: float = 5.0,
+    ) -> dict:
+        """
+        Run the load test.
+
+        Args:
+            duration: Seconds to generate load (0 runs until `max_turns`)
+            max_turns: Stop after this many turns (None for no limit)
+            interval: Seconds between timeline snapshots
+
+        Returns:
+            Report with the timeline and overall percentiles
+        """
+        if duration <= 0 and max_turns is None:
+            raise ValueError("Set a duration or a turn limit")
+        self._turn_budget = max_turns
+        customer_ids = self.draw_customers()
+        baseline_rss = current_rss_bytes()
+        started = time.perf_counter()
+
+        simulators = [
+            asyncio.create_task(self.simulate_customer(index, customer_id))
+            for index, customer_id in enumerate(customer_ids)
+        ]
+        monitors = [
+            asyncio.create_task(self._watch_loop_lag()),
+            asyncio.create_task(self._snapshot_loop(interval, started, baseline_rss)),
+        ]
+        simulation = asyncio.gather(*simulators)
+        try:
+            await asyncio.wait_for(asyncio.shield(simulation), timeout=duration if duration > 0 else None)
+        except asyncio.TimeoutError:
+            # Let in-flight turns finish so every started turn is counted
+            self._stop.set()
+            await simulation
+        self._stop.set()
+        await asyncio.gather(*monitors)
+        elapsed = time.perf_counter() - started
+
+        _, waited, max_wait = self._pool_totals()
+        return {
+            "customers": self.customer_count,
+            "mix": self.mix,
+            "elapsed_seconds": elapsed,
+            "turns": self.totals.turns,
+            "turns_per_second": self.totals.turns / elapsed if elapsed else 0.0,
+            "outcomes": self.totals.outcomes,
+            "turn_seconds": summarize(self.totals.turn_seconds),
+            "ttft_seconds": summarize(self.totals.ttft_seconds),
+            "queued_seconds": summarize(self.totals.queued_seconds),
+            "loop_lag_seconds": summarize(self.totals.loop_lag_seconds),
+            "sqlite_total_wait_seconds": waited,
+            "sqlite_max_wait_seconds": max_wait,
+            "rss_growth_bytes": current_rss_bytes() - baseline_rss,
+            "timeline": self.timeline,
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate concurrent multi-customer load")
+    parser.add_argument("--customers", type=int, default=100, help="Simulated customers")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds of load (0 = until --max-turns)")
+    parser.add_argument("--max-turns", type=int, default=None, help="Stop after this many turns")
+    parser.add_argument(
+        "--mix",
+        default="billing=1,order=1,technical=1,account=1",
+        help="Weighted script mix, e.g. billing=2,order=1",
+    )
+    parser.add_argument("--think-seconds", type=float, default=0.0, help="Mean pause between turns")
+    parser.add_argument("--ramp-seconds", type=float, default=0.0, help="Spread customer start times")
+    parser.add_argument("--interval", type=float, default=5.0, help="Seconds between snapshots")
+    parser.add_argument(
+        "--max-concurrent-turns",
+        type=int,
+        default=config.SERVICE_MAX_CONCURRENT_TURNS,
+        help="Service-wide turn limit",
+    )
+    parser.add_argument("--db", help="Session database (default: a temporary file)")
+    parser.add_argument("--mock", action="store_true", help="Use the local mock model provider")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for script selection")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    if args.mock:
+        from mock_model import MockModelProvider, check_tool_calls
+
+        model_provider.set_run_config(
+            RunConfig(model_provider=MockModelProvider(), tracing_disabled=True)
+        )
+        # Tool timings are only meaningful if mock tool calls are accepted
+        failures = asyncio.run(check_tool_calls(list(DEFAULT_SPECIALISTS.values())))
+        if failures:
+            sys.exit("Mock tool calls are rejected:\n" + "\n".join(failures))
+    else:
+        config.validate_environment()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SessionStore(args.db or Path(tmp) / "load.db")
+        service = ConversationService(max_concurrent_turns=args.max_concurrent_turns)
+        generator = LoadGenerator(
+            service,
+            store,
+            customer_count=args.customers,
+            mix=parse_mix(args.mix),
+            think_seconds=args.think_seconds,
+            ramp_seconds=args.ramp_seconds,
+            seed=args.seed,
+        )
+        try:
+            report = asyncio.run(generator.run(args.duration, args.max_turns, args.interval))
+        finally:
+            store.close()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+        logger.info("Wrote load test report to %s", args.output)
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
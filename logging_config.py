@@ -3,19 +3,202 @@ Logging configuration for customer support agent system.
 
 This module provides centralized logging configuration with different
 log levels for development and production environments.
+
+By default (LOG_ASYNC=1) loggers only put records on a bounded queue; a
+listener thread formats them and writes to the console and the rotating log
+file, so request handling never waits on disk I/O. When the queue is full,
+records are dropped and counted instead of blocking.
+
+Convention: pass values as logger arguments rather than pre-formatting them,
+e.g. ``logger.info("Loaded %s customers", count)``, so messages for filtered
+levels are never formatted and formatting happens on the listener thread.
+
+Every user turn runs inside a turn scope (see turn_scope() and start_turn()).
+Records created while a turn is active carry its correlation ID, customer ID
+and the milliseconds elapsed since the turn began. The scope lives in a
+context variable, so agent runs, tools, hooks and guardrails started from the
+turn inherit it. With LOG_FORMAT=json each record is written as one JSON
+object including these fields and any `extra` passed to the logger.
 """
 
+import atexit
+import json
 import logging
+import logging.handlers
 import os
+import queue
 import sys
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager, suppress
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional
 
+import config
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional["DroppingQueueHandler"] = None
+
+
+# =============================================================================
+# TURN CORRELATION
+# =============================================================================
+
+
+@dataclass(frozen=True)
+class TurnContext:
+    """Correlation data for one user turn."""
+
+    turn_id: str
+    customer_id: Optional[int]
+    started: float  # time.perf_counter()
+
+    def elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self.started) * 1000, 3)
+
+
+_current_turn: ContextVar[Optional[TurnContext]] = ContextVar("current_turn", default=None)
+
+
+def new_turn_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def current_turn() -> Optional[TurnContext]:
+    """Return the active turn, if any."""
+    return _current_turn.get()
+
+
+def start_turn(
+    customer_id: Optional[int], turn_id: Optional[str] = None
+) -> Token[Optional[TurnContext]]:
+    """Make a new turn current; pass the returned token to end_turn()."""
+    return _current_turn.set(TurnContext(turn_id or new_turn_id(), customer_id, time.perf_counter()))
+
+
+def end_turn(token: Token[Optional[TurnContext]]) -> None:
+    # An async generator closed from another task resets in a different
+    # context; its turn ended with that context anyway
+    with suppress(ValueError):
+        _current_turn.reset(token)
+
+
+@contextmanager
+def turn_scope(customer_id: Optional[int], turn_id: Optional[str] = None) -> Iterator[TurnContext]:
+    """Run a block as (part of) a user turn."""
+    token = start_turn(customer_id, turn_id)
+    try:
+        yield _current_turn.get()
+    finally:
+        end_turn(token)
+
+
+_base_record_factory = logging.getLogRecordFactory()
+
+
+def _record_factory(*args, **kwargs) -> logging.LogRecord:
+    # Runs on the logging thread's caller, where the turn context is visible
+    record = _base_record_factory(*args, **kwargs)
+    turn = _current_turn.get()
+    if turn is not None:
+        record.turn_id = turn.turn_id
+        record.customer_id = turn.customer_id
+        record.turn_elapsed_ms = turn.elapsed_ms()
+    return record
+
+
+logging.setLogRecordFactory(_record_factory)
+
+
+# =============================================================================
+# FORMATTERS AND HANDLERS
+# =============================================================================
+
+# Attributes every LogRecord has; anything else came from `extra` or the turn
+_STANDARD_ATTRIBUTES = frozenset(
+    logging.LogRecord("", logging.INFO, "", 0, "", None, None).__dict__
+) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, turn fields and extras."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process_elapsed_ms": round(record.relativeCreated, 3),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that never blocks and hands records over unformatted."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Records stay in-process, so message formatting can wait for the
+        # listener thread (the default prepare() formats on the caller)
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _file_handler(log_file: str) -> logging.Handler:
+    if config.LOG_ROTATE_WHEN:
+        return logging.handlers.TimedRotatingFileHandler(
+            log_file,
+            when=config.LOG_ROTATE_WHEN,
+            backupCount=config.LOG_BACKUP_COUNT,
+            encoding="utf-8",
+        )
+    return logging.handlers.RotatingFileHandler(
+        log_file,
+        maxBytes=config.LOG_MAX_BYTES,
+        backupCount=config.LOG_BACKUP_COUNT,
+        encoding="utf-8",
+    )
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread (safe to call twice)."""
+    global _listener, _queue_handler
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    _queue_handler = None
+
+
+def dropped_records() -> int:
+    """Records dropped because the logging queue was full."""
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
 
 def setup_logging(
     log_level: Optional[str] = None,
     log_file: Optional[str] = None,
     enable_console: bool = True,
+    async_logging: bool = config.LOG_ASYNC,
 ) -> logging.Logger:
     """
     Configure application-wide logging.
@@ -25,10 +208,13 @@ def setup_logging(
                    Defaults to LOG_LEVEL env var or INFO.
         log_file: Path to log file. If None, logs only to console.
         enable_console: Whether to enable console logging.
+        async_logging: Whether to write records on a background listener thread.
 
     Returns:
         Configured root logger
     """
+    global _listener, _queue_handler
+
     # Determine log level
     if log_level is None:
         log_level = os.getenv("LOG_LEVEL", "INFO")
@@ -36,24 +222,30 @@ def setup_logging(
     numeric_level = getattr(logging, log_level.upper(), logging.INFO)
 
     # Create formatter
-    formatter = logging.Formatter(
-        fmt="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
+    if config.LOG_FORMAT == "json":
+        formatter: logging.Formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            fmt="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
 
     # Get root logger
     root_logger = logging.getLogger()
     root_logger.setLevel(numeric_level)
 
     # Remove existing handlers to avoid duplicates
+    stop_logging()
     root_logger.handlers.clear()
 
+    handlers: list[logging.Handler] = []
+
     # Console handler
     if enable_console:
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(numeric_level)
         console_handler.setFormatter(formatter)
-        root_logger.addHandler(console_handler)
+        handlers.append(console_handler)
 
     # File handler
     if log_file:
@@ -61,10 +253,21 @@ def setup_logging(
         log_path = Path(log_file)
         log_path.parent.mkdir(parents=True, exist_ok=True)
 
-        file_handler = logging.FileHandler(log_file)
+        file_handler = _file_handler(log_file)
         file_handler.setLevel(numeric_level)
         file_handler.setFormatter(formatter)
-        root_logger.addHandler(file_handler)
+        handlers.append(file_handler)
+
+    if async_logging and handlers:
+        _queue_handler = DroppingQueueHandler(queue.Queue(maxsize=config.LOG_QUEUE_SIZE))
+        root_logger.addHandler(_queue_handler)
+        _listener = logging.handlers.QueueListener(
+            _queue_handler.queue, *handlers, respect_handler_level=True
+        )
+        _listener.start()
+    else:
+        for handler in handlers:
+            root_logger.addHandler(handler)
 
     return root_logger
 
@@ -86,3 +289,5 @@ def get_logger(name: str) -> logging.Logger:
 # Uses LOG_LEVEL and LOG_FILE environment variables if set
 default_log_file = os.getenv("LOG_FILE", "logs/customer_support.log")
 setup_logging(log_file=default_log_file)
+# Write out whatever is still queued when the process exits
+atexit.register(stop_logging)
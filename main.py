@@ -9,14 +9,16 @@ import dotenv
 
 dotenv.load_dotenv()
 from openai import OpenAI
-import asyncio
 import streamlit as st
-from agents import Runner, SQLiteSession, InputGuardrailTripwireTriggered, OutputGuardrailTripwireTriggered
-from models import UserAccountContext
-from my_agents.triage_agent import triage_agent
 import config
-from logging_config import get_logger
+from logging_config import get_logger, new_turn_id, turn_scope
 import customers
+from background_loop import run_coroutine
+from conversation_service import get_conversation_service
+from event_bus import get_event_bus, get_streamlit_sink
+from metrics import start_exporters
+from session_store import HistoryPage
+from stream_renderer import StreamRenderer
 
 # Setup logging
 logger = get_logger(__name__)
@@ -27,64 +29,70 @@ try:
     config.validate_environment()
     logger.info("Environment validation successful")
 except EnvironmentError as e:
-    logger.error(f"Environment validation failed: {e}")
+    logger.error("Environment validation failed: %s", e)
     raise
 
-client = OpenAI()
+# The mock model provider runs without an API key
+client = OpenAI() if config.MODEL_PROVIDER == "openai" else None
 
 # =============================================================================
 # CUSTOMER SELECTION
 # =============================================================================
 
 # Initialize selected customer in session state
-if "selected_customer_name" not in st.session_state:
+if config.SESSION_STATE_SELECTED_CUSTOMER_KEY not in st.session_state:
     # Get default customer on first load
     default_customer = customers.get_default_customer()
-    st.session_state["selected_customer_name"] = default_customer.name
-    logger.info(f"Initialized with default customer: {default_customer.name}")
+    st.session_state[config.SESSION_STATE_SELECTED_CUSTOMER_KEY] = default_customer.customer_id
+    logger.info("Initialized with default customer: %s", default_customer.name)
 
 # Get current customer context
-user_account_ctx = customers.get_customer_context(st.session_state["selected_customer_name"])
+user_account_ctx = customers.get_customer_context(
+    st.session_state[config.SESSION_STATE_SELECTED_CUSTOMER_KEY]
+)
 if user_account_ctx is None:
     # Fallback to default if selected customer not found
     user_account_ctx = customers.get_default_customer()
-    st.session_state["selected_customer_name"] = user_account_ctx.name
-    logger.warning(f"Selected customer not found, using default: {user_account_ctx.name}")
+    st.session_state[config.SESSION_STATE_SELECTED_CUSTOMER_KEY] = user_account_ctx.customer_id
+    logger.warning("Selected customer not found, using default: %s", user_account_ctx.name)
 
 # =============================================================================
 # SESSION MANAGEMENT (per customer)
 # =============================================================================
 
-# Create customer-specific session key
-customer_session_key = f"{config.SESSION_STATE_SESSION_KEY}_{user_account_ctx.customer_id}"
+# Conversations (sessions, current agent, agent runs) live in the headless
+# service; this script only renders them
+service = get_conversation_service()
+session = service.get_session(user_account_ctx.customer_id)
+# Prometheus endpoint / file, when METRICS_PORT or METRICS_FILE is set
+start_exporters()
+
+
+# Row ID of the oldest message shown; None shows only the latest page
+history_start_key = f"{config.SESSION_STATE_HISTORY_START_KEY}_{user_account_ctx.customer_id}"
 
-if customer_session_key not in st.session_state:
-    # Create customer-specific database
-    customer_db_name = f"customer_{user_account_ctx.customer_id}_support.db"
-    logger.info(
-        f"Initializing session for customer {user_account_ctx.customer_id} "
-        f"({user_account_ctx.name}), DB: {customer_db_name}"
-    )
-    st.session_state[customer_session_key] = SQLiteSession(
-        config.SESSION_ID,
-        customer_db_name,
-    )
 
-# Use customer-specific session
-session = st.session_state[customer_session_key]
+async def load_history(start_id: int | None) -> HistoryPage:
+    """Load the visible window of chat history, from `start_id` if given."""
+    if start_id is None:
+        return await session.get_page(config.HISTORY_PAGE_SIZE)
+    return await session.get_page_since(start_id)
 
-# Initialize agent (shared across all customers)
-if config.SESSION_STATE_AGENT_KEY not in st.session_state:
-    logger.info("Initializing triage agent")
-    st.session_state[config.SESSION_STATE_AGENT_KEY] = triage_agent
+
+async def load_older_history(page: HistoryPage) -> HistoryPage:
+    """Extend a history window one page further back."""
+    older = await session.get_page(config.HISTORY_PAGE_SIZE, before_id=page.first_id)
+    return HistoryPage(
+        items=older.items + page.items,
+        first_id=older.first_id,
+        has_older=older.has_older,
+    )
 
 
-async def paint_history() -> None:
+def paint_history(page: HistoryPage) -> None:
     """Render chat history messages in the Streamlit interface."""
-    logger.debug("Rendering chat history")
-    messages = await session.get_items()
-    logger.debug(f"Retrieved {len(messages)} messages from history")
-    for message in messages:
+    logger.debug("Rendering %s messages from history", len(page.items))
+    for message in page.items:
         if "role" in message:
             with st.chat_message(message["role"]):
                 if message["role"] == "user":
@@ -94,85 +102,110 @@ async def paint_history() -> None:
                         st.write(message["content"][0]["text"].replace("$", "\$"))
 
 
+history_page = HistoryPage(items=[], first_id=None, has_older=False)
 try:
-    asyncio.run(paint_history())
+    # Coroutines run on the shared background loop, so session state is read
+    # and written here on the script thread
+    history_page = run_coroutine(load_history(st.session_state.get(history_start_key)))
+    if history_page.has_older and st.button("⬆️ Load older messages"):
+        history_page = run_coroutine(load_older_history(history_page))
+        st.session_state[history_start_key] = history_page.first_id
+    paint_history(history_page)
 except Exception as e:
-    logger.error(f"Error loading chat history: {e}", exc_info=True)
+    logger.error("Error loading chat history: %s", e, exc_info=True)
     st.error(f"Error loading chat history: {e}")
 
 
-async def run_agent(message: str) -> None:
+# Agent hook events reach the UI through the event bus; they are rendered
+# here on the script thread, a batch at a time
+hook_events = get_streamlit_sink()
+
+
+def render_hook_events() -> None:
+    """Render buffered agent hook events for the current customer in the sidebar."""
+    events = hook_events.drain(user_account_ctx.customer_id)
+    if not events:
+        return
+    with st.sidebar:
+        for event in events:
+            if event.type == "tool_started":
+                st.write(f"🔧 **{event.agent_name}** starting tool: `{event.tool}`")
+            elif event.type == "tool_finished":
+                st.write(f"🔧 **{event.agent_name}** used tool: `{event.tool}`")
+                st.code(event.detail)
+            elif event.type == "handoff":
+                st.write(f"🔄 Handoff: **{event.source_agent}** → **{event.agent_name}**")
+            elif event.type == "agent_started":
+                st.write(f"🚀 **{event.agent_name}** activated")
+            elif event.type == "agent_finished":
+                st.write(f"🏁 **{event.agent_name}** completed")
+
+
+def run_agent(message: str) -> None:
     """
-    Process user message through the agent system and display responses.
+    Send a user message through the conversation service and display responses.
 
     Args:
         message: User's input message to process
     """
-    logger.info(f"Processing user message: {message[:50]}...")  # Log first 50 chars
-    current_agent = st.session_state[config.SESSION_STATE_AGENT_KEY]
-    logger.debug(f"Current agent: {current_agent.name}")
+    customer_id = user_account_ctx.customer_id
+    # The service runs the turn under the same ID, so UI and agent logs line up
+    turn_id = new_turn_id()
+    with turn_scope(customer_id, turn_id):
+        logger.info("Processing user message: %s...", message[:50])  # Log first 50 chars
+        logger.debug("Current agent: %s", service.current_agent(customer_id).name)
+        render_turn(customer_id, message, turn_id)
+
 
+def render_turn(customer_id: int, message: str, turn_id: str) -> None:
+    """Stream one turn's events from the conversation service into the chat."""
     with st.chat_message("ai"):
         text_placeholder = st.empty()
-        response = ""
-
-        st.session_state[config.SESSION_STATE_TEXT_PLACEHOLDER_KEY] = text_placeholder
-
-        try:
-            logger.debug("Starting agent stream")
-            stream = Runner.run_streamed(
-                st.session_state[config.SESSION_STATE_AGENT_KEY],
-                message,
-                session=session,
-                context=user_account_ctx,
-            )
-
-            async for event in stream.stream_events():
-                if event.type == "raw_response_event":
-
-                    if event.data.type == "response.output_text.delta":
-                        response += event.data.delta
-                        text_placeholder.write(response.replace("$", "\$"))
+        renderer = StreamRenderer(text_placeholder)
 
-                elif event.type == "agent_updated_stream_event":
+        for event in service.stream(customer_id, message, turn_id):
+            if event.type == "text_delta":
+                renderer.append(event.text)
 
-                    if st.session_state[config.SESSION_STATE_AGENT_KEY].name != event.new_agent.name:
-                        old_agent = st.session_state[config.SESSION_STATE_AGENT_KEY].name
-                        new_agent = event.new_agent.name
-                        logger.info(f"Agent handoff: {old_agent} -> {new_agent}")
+            elif event.type == "agent_changed":
+                renderer.flush()
+                st.write(f"🤖 Transfered from {event.data['from_agent']} to {event.agent_name}")
+                text_placeholder = st.empty()
+                renderer.reset(text_placeholder)
 
-                        st.write(f"🤖 Transfered from {old_agent} to {new_agent}")
+            elif event.type in ("tool_started", "tool_finished"):
+                render_hook_events()
 
-                        st.session_state[config.SESSION_STATE_AGENT_KEY] = event.new_agent
+            elif event.type == "input_blocked":
+                st.write("I can't help you with that.")
 
-                        text_placeholder = st.empty()
+            elif event.type == "output_blocked":
+                st.write("I can't show you that answer.")
+                renderer.clear()
 
-                        st.session_state[config.SESSION_STATE_TEXT_PLACEHOLDER_KEY] = text_placeholder
-                        response = ""
+            elif event.type == "error":
+                raise RuntimeError(event.text)
 
-        except InputGuardrailTripwireTriggered:
-            logger.warning(f"Input guardrail triggered for message: {message[:50]}...")
-            st.write("I can't help you with that.")
+        renderer.flush()
 
+    # Hooks for the run's last steps may still be on their way to the sink
+    get_event_bus().flush(timeout=0.5)
+    render_hook_events()
 
-        except OutputGuardrailTripwireTriggered:
-            logger.warning(f"Output guardrail triggered for agent response")
-            st.write("I can't show you that answer.")
-            st.session_state[config.SESSION_STATE_TEXT_PLACEHOLDER_KEY].empty()
 
 message = st.chat_input(
     "Write a message for your assistant",
 )
 
 if message:
-    logger.info(f"Received new user message")
+    logger.info("Received new user message")
     with st.chat_message("human"):
         st.write(message)
     try:
-        asyncio.run(run_agent(message))
+        run_agent(message)
         logger.info("Message processing completed successfully")
     except Exception as e:
-        logger.error(f"Error processing message: {e}", exc_info=True)
+        logger.error("Error processing message: %s", e, exc_info=True)
         st.error(f"Error processing message: {e}")
 
 
@@ -187,25 +220,48 @@ with st.sidebar:
     # =============================================================================
     st.header("👤 Customer")
 
-    # Get all available customers
-    all_customer_names = customers.get_all_customer_names()
+    # Typeahead search: only one page of matches is sent to the browser
+    search_query = st.text_input(
+        "Search customers:",
+        placeholder="Name or customer ID",
+        key=config.SESSION_STATE_CUSTOMER_SEARCH_KEY,
+    )
+    if st.session_state.get(config.SESSION_STATE_CUSTOMER_QUERY_KEY) != search_query:
+        st.session_state[config.SESSION_STATE_CUSTOMER_QUERY_KEY] = search_query
+        st.session_state[config.SESSION_STATE_CUSTOMER_PAGE_KEY] = 0
+    page = st.session_state.get(config.SESSION_STATE_CUSTOMER_PAGE_KEY, 0)
+
+    matches, has_more = customers.search_customers(
+        search_query,
+        limit=config.CUSTOMER_SEARCH_PAGE_SIZE,
+        offset=page * config.CUSTOMER_SEARCH_PAGE_SIZE,
+    )
+    options = {c["customer_id"]: c["name"] for c in matches}
+    # Keep the current customer selectable even when it is not on this page
+    options.setdefault(user_account_ctx.customer_id, user_account_ctx.name)
+    option_ids = list(options)
 
     # Customer selector
-    selected_name = st.selectbox(
+    selected_id = st.selectbox(
         "Select Customer:",
-        options=all_customer_names,
-        index=all_customer_names.index(st.session_state["selected_customer_name"])
-        if st.session_state["selected_customer_name"] in all_customer_names
-        else 0,
-        key="customer_selector",
+        options=option_ids,
+        index=option_ids.index(user_account_ctx.customer_id),
+        format_func=lambda customer_id: f"{options[customer_id]} (#{customer_id})",
+        key=f"customer_selector_{search_query}_{page}",
     )
 
+    previous_col, next_col = st.columns(2)
+    if previous_col.button("◀ Previous", disabled=page == 0, use_container_width=True):
+        st.session_state[config.SESSION_STATE_CUSTOMER_PAGE_KEY] = page - 1
+        st.rerun()
+    if next_col.button("Next ▶", disabled=not has_more, use_container_width=True):
+        st.session_state[config.SESSION_STATE_CUSTOMER_PAGE_KEY] = page + 1
+        st.rerun()
+
     # Check if customer changed
-    if selected_name != st.session_state["selected_customer_name"]:
-        logger.info(
-            f"Customer changed from {st.session_state['selected_customer_name']} to {selected_name}"
-        )
-        st.session_state["selected_customer_name"] = selected_name
+    if selected_id != user_account_ctx.customer_id:
+        logger.info("Customer changed from %s to %s", user_account_ctx.customer_id, selected_id)
+        st.session_state[config.SESSION_STATE_SELECTED_CUSTOMER_KEY] = selected_id
         # Force page rerun to reload with new customer
         st.rerun()
 
@@ -224,21 +280,19 @@ with st.sidebar:
 
     reset = st.button("Reset memory")
     if reset:
-        logger.info(f"User requested memory reset for customer {user_account_ctx.customer_id}")
+        logger.info("User requested memory reset for customer %s", user_account_ctx.customer_id)
         try:
-            asyncio.run(session.clear_session())
+            service.run(service.reset(user_account_ctx.customer_id))
+            st.session_state.pop(history_start_key, None)
             logger.info("Memory cleared successfully")
             st.success("Memory cleared successfully!")
         except Exception as e:
-            logger.error(f"Error clearing memory: {e}", exc_info=True)
+            logger.error("Error clearing memory: %s", e, exc_info=True)
             st.error(f"Error clearing memory: {e}")
 
     # =============================================================================
     # SESSION DEBUG INFO
     # =============================================================================
     with st.expander("Debug: Session Data"):
-        try:
-            st.write(asyncio.run(session.get_items()))
-        except Exception as e:
-            logger.error(f"Error displaying session items: {e}", exc_info=True)
-            st.error(f"Error displaying session items: {e}")
\ No newline at end of file
+        # Reuse the window already loaded for the chat instead of fetching everything again
+        st.write(history_page.items)
\ No newline at end of file
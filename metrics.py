@@ -0,0 +1,384 @@
+"""
+In-process metrics with Prometheus text export.
+
+Counters and fixed-bucket histograms for the numbers SLO dashboards need:
+turn latency per agent, tool latency, handoffs, guardrail checks and trips,
+tokens in and out, and session read/write times. Recording is a dict lookup,
+a bisect and a locked increment, so it is cheap enough for every turn.
+
+The metrics live in one process-wide registry. start_exporters() serves them
+at http://METRICS_HOST:METRICS_PORT/metrics and/or rewrites METRICS_FILE
+every METRICS_FILE_INTERVAL_SECONDS (for node_exporter's textfile collector).
+Both are off unless configured.
+
+Trip rate and similar ratios are left to the dashboard, e.g.
+    sum(rate(support_guardrail_checks_total{tripped="true"}[5m]))
+      / sum(rate(support_guardrail_checks_total[5m]))
+"""
+
+import atexit
+import os
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Generic, TypeVar
+
+import config
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+C = TypeVar("C")
+
+# Seconds; spans fast local checks up to slow multi-handoff turns
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ("_bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self._bounds = bounds
+        # One slot per bucket plus +Inf; made cumulative only when rendered
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self._bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self) -> "_Timer":
+        """Context manager observing the seconds spent in its block."""
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("_child", "_started")
+
+    def __init__(self, child: _HistogramChild):
+        self._child = child
+
+    def __enter__(self) -> None:
+        self._started = perf_counter()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._child.observe(perf_counter() - self._started)
+
+
+class _Metric(Generic[C]):
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._children: dict[tuple[str, ...], C] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: Any) -> C:
+        """Return the series for these label values, in `labelnames` order."""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self) -> C:
+        raise NotImplementedError
+
+    def _series(self) -> list[tuple[tuple[str, ...], C]]:
+        with self._lock:
+            return sorted(self._children.items())
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for values, child in self._series():
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values: tuple[str, ...], child: C) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric[_CounterChild]):
+    """Monotonically increasing total."""
+
+    type = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increment the unlabeled series."""
+        self.labels().inc(amount)
+
+    def _render_child(self, values: tuple[str, ...], child: _CounterChild) -> list[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"]
+
+
+class Histogram(_Metric[_HistogramChild]):
+    """Distribution of observed values over fixed buckets."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Observe a value on the unlabeled series."""
+        self.labels().observe(value)
+
+    def _render_child(self, values: tuple[str, ...], child: _HistogramChild) -> list[str]:
+        with child._lock:
+            counts = list(child.counts)
+            total = child.sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(
+                f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}"
+            )
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics rendered together in Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> Any:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str | Path) -> None:
+        """Write the metrics to `path` atomically (readers never see a partial file)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(path.name + ".tmp")
+        temp_path.write_text(self.render(), encoding="utf-8")
+        os.replace(temp_path, path)
+
+
+REGISTRY = MetricsRegistry()
+
+# =============================================================================
+# METRICS
+# =============================================================================
+
+TURN_SECONDS = REGISTRY.histogram(
+    "support_turn_duration_seconds",
+    "User turn latency by the agent that finished the turn and the outcome",
+    ("agent", "outcome"),
+)
+TURN_QUEUE_SECONDS = REGISTRY.histogram(
+    "support_turn_queue_seconds",
+    "Time a turn waited for a turn slot and the conversation's previous turn",
+)
+TURN_FIRST_TEXT_SECONDS = REGISTRY.histogram(
+    "support_turn_first_text_seconds",
+    "Time from the start of a turn to the first text shown to the customer",
+    ("agent",),
+)
+TOOL_SECONDS = REGISTRY.histogram(
+    "support_tool_duration_seconds",
+    "Tool call latency reported by the agent hooks",
+    ("agent", "tool"),
+)
+HANDOFFS = REGISTRY.counter(
+    "support_handoffs_total",
+    "Agent changes; via is llm (a handoff tool call) or the local intent router source",
+    ("from_agent", "to_agent", "via"),
+)
+GUARDRAIL_SECONDS = REGISTRY.histogram(
+    "support_guardrail_duration_seconds",
+    "Guardrail check latency by the path that decided it (cache, classifier, cleared, llm)",
+    ("guardrail", "path"),
+)
+GUARDRAIL_CHECKS = REGISTRY.counter(
+    "support_guardrail_checks_total",
+    "Guardrail checks by decision path and whether the tripwire triggered",
+    ("guardrail", "path", "tripped"),
+)
+TOKENS = REGISTRY.counter(
+    "support_tokens_total",
+    "Model tokens by direction (input or output) and agent: the agent that finished the turn, "
+    "or the guardrail agent for guardrail checks",
+    ("agent", "direction"),
+)
+SESSION_SECONDS = REGISTRY.histogram(
+    "support_session_operation_seconds",
+    "Session store latency (read, write, and write_batch for write-behind flushes)",
+    ("operation",),
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+
+
+def record_guardrail(guardrail: str, path: str, seconds: float, tripped: bool) -> None:
+    GUARDRAIL_SECONDS.labels(guardrail, path).observe(seconds)
+    GUARDRAIL_CHECKS.labels(guardrail, path, "true" if tripped else "false").inc()
+
+
+def record_usage(agent_name: str, usage: Any) -> None:
+    """Count the tokens of an SDK Usage (run result's context_wrapper.usage)."""
+    if usage is None:
+        return
+    if usage.input_tokens:
+        TOKENS.labels(agent_name, "input").inc(usage.input_tokens)
+    if usage.output_tokens:
+        TOKENS.labels(agent_name, "output").inc(usage.output_tokens)
+
+
+# =============================================================================
+# EXPORT
+# =============================================================================
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self) -> None:
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug("Metrics request: " + format, *args)
+
+
+def start_http_server(
+    port: int, host: str = "127.0.0.1", registry: MetricsRegistry = REGISTRY
+) -> ThreadingHTTPServer:
+    """Serve `registry` at http://host:port/metrics from a daemon thread."""
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info("Serving metrics at http://%s:%s/metrics", host, server.server_address[1])
+    return server
+
+
+def start_file_exporter(
+    path: str | Path, interval: float, registry: MetricsRegistry = REGISTRY
+) -> threading.Event:
+    """Rewrite `path` every `interval` seconds and at exit; set the returned event to stop."""
+    stop = threading.Event()
+
+    def write() -> None:
+        try:
+            registry.write(path)
+        except OSError as e:
+            logger.warning("Could not write metrics to %s: %s", path, e)
+
+    def run() -> None:
+        while not stop.wait(interval):
+            write()
+
+    threading.Thread(target=run, name="metrics-file", daemon=True).start()
+    atexit.register(write)
+    logger.info("Writing metrics to %s every %ss", path, interval)
+    return stop
+
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+
+def start_exporters() -> None:
+    """Start the exporters enabled in config (METRICS_PORT, METRICS_FILE) once per process."""
+    global _exporters_started
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+        if config.METRICS_PORT:
+            try:
+                start_http_server(config.METRICS_PORT, config.METRICS_HOST)
+            except OSError as e:
+                logger.warning("Could not serve metrics on port %s: %s", config.METRICS_PORT, e)
+        if config.METRICS_FILE:
+            start_file_exporter(config.METRICS_FILE, config.METRICS_FILE_INTERVAL_SECONDS)
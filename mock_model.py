@@ -0,0 +1,536 @@
+"""
+Local mock model provider.
+
+MockModelProvider stands in for OpenAI so the agent graph can run offline:
+no network, no API cost, and deterministic behavior. It emulates the parts
+of the Responses API the agents use:
+
+- streamed text deltas at a configurable time-to-first-token and tokens/sec
+- tool calls, chosen by matching tool names against the user message
+- handoffs, chosen by routing keywords for each specialist
+- structured outputs, including InputGuardRailOutput and
+  TechnicalOutputGuardRailOutput for the guardrail agents
+
+Scripted behaviors (MockRule) override the defaults for messages matching a
+regular expression, e.g. to force a handoff, a tool call, a guardrail trip or
+a fixed reply. Rules can be loaded from a JSON file (MOCK_MODEL_SCRIPT).
+
+Enable it with MODEL_PROVIDER=mock; see model_provider.get_run_config().
+"""
+
+import asyncio
+import itertools
+import json
+import re
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+from agents import (
+    AgentOutputSchemaBase,
+    FunctionTool,
+    Handoff,
+    Model,
+    ModelProvider,
+    ModelResponse,
+    ModelSettings,
+    ModelTracing,
+    Tool,
+    TResponseInputItem,
+    Usage,
+)
+from agents.items import TResponseStreamEvent
+from agents.tracing import response_span
+from openai.types.responses import (
+    Response,
+    ResponseCompletedEvent,
+    ResponseCreatedEvent,
+    ResponseFunctionToolCall,
+    ResponseOutputItemDoneEvent,
+    ResponseOutputMessage,
+    ResponseOutputText,
+    ResponseTextDeltaEvent,
+    ResponseUsage,
+)
+
+import config
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Specialist routing keywords, keyed by a word of the target agent's name
+DEFAULT_ROUTES: dict[str, tuple[str, ...]] = {
+    "billing": ("bill", "charge", "refund", "payment", "invoice", "subscription", "credit", "plan"),
+    "order": ("order", "shipping", "delivery", "deliver", "track", "return", "package", "item"),
+    "account": ("password", "login", "log in", "account", "email", "two-factor", "2fa", "profile"),
+    "technical": ("error", "crash", "bug", "load", "install", "app", "broken", "slow", "setup"),
+}
+
+DEFAULT_OFF_TOPIC_KEYWORDS: tuple[str, ...] = (
+    "weather", "recipe", "poem", "joke", "movie", "sports", "stock tip", "homework",
+)
+
+_FILLER_WORDS = (
+    "Thanks for reaching out. I have looked into this for you and here is what "
+    "I found. Everything on our side looks in order, and I have noted the "
+    "details on your account so the team can follow up if anything changes. "
+    "Let me know if there is anything else I can help with today."
+).split()
+
+# Handoffs are exposed to the model as tools named transfer_to_<agent>
+_HANDOFF_TOOL_PREFIX = "transfer_to_"
+
+# How the SDK's default failure handler and argument validation report a tool error
+_TOOL_ERROR_PREFIXES = ("An error occurred while running the tool", "ModelBehaviorError")
+
+_ids = itertools.count(1)
+
+
+def _next_id(prefix: str) -> str:
+    return f"{prefix}_mock_{next(_ids)}"
+
+
+@dataclass
+class MockRule:
+    """
+    Scripted behavior for user messages matching `match` (a regex, case-insensitive).
+
+    Any field left as None falls back to the default behavior. `off_topic`
+    and `off_topic_keywords` only decide messages that reach the guardrail
+    agent: with TOPIC_CLASSIFIER on, the local pre-classifier answers
+    clearly on- or off-topic messages before the model is called.
+    """
+
+    match: str
+    text: Optional[str] = None
+    tool: Optional[str] = None
+    tool_arguments: dict[str, Any] = field(default_factory=dict)
+    handoff: Optional[str] = None  # target agent name (or a word of it)
+    off_topic: Optional[bool] = None  # forces the guardrail agent's verdict (see below)
+    structured: dict[str, Any] = field(default_factory=dict)  # overrides structured output fields
+
+    def matches(self, message: str) -> bool:
+        return re.search(self.match, message, re.IGNORECASE) is not None
+
+
+@dataclass
+class MockBehavior:
+    """Tunable timing and decision rules for MockModel."""
+
+    latency_seconds: float = config.MOCK_MODEL_LATENCY_SECONDS
+    tokens_per_second: float = config.MOCK_MODEL_TOKENS_PER_SECOND
+    response_tokens: int = config.MOCK_MODEL_RESPONSE_TOKENS
+    routes: dict[str, tuple[str, ...]] = field(default_factory=lambda: dict(DEFAULT_ROUTES))
+    off_topic_keywords: tuple[str, ...] = DEFAULT_OFF_TOPIC_KEYWORDS
+    rules: list[MockRule] = field(default_factory=list)
+
+    def rule_for(self, message: str) -> Optional[MockRule]:
+        return next((rule for rule in self.rules if rule.matches(message)), None)
+
+
+def load_mock_behavior(path: str | Path) -> MockBehavior:
+    """
+    Load a MockBehavior from a JSON file.
+
+    The file may set any MockBehavior field; "rules" is a list of MockRule
+    objects, e.g. {"latency_seconds": 0.3, "rules": [{"match": "refund", "tool": "process_refund_request"}]}.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    rules = [MockRule(**rule) for rule in data.pop("rules", [])]
+    if "routes" in data:
+        data["routes"] = {name: tuple(words) for name, words in data["routes"].items()}
+    if "off_topic_keywords" in data:
+        data["off_topic_keywords"] = tuple(data["off_topic_keywords"])
+    return MockBehavior(rules=rules, **data)
+
+
+# =============================================================================
+# INPUT INSPECTION
+# =============================================================================
+
+
+def _item_text(item: TResponseInputItem) -> str:
+    content = item.get("content")
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return ""
+
+
+def _split_turn(input: str | list[TResponseInputItem]) -> tuple[str, list[TResponseInputItem]]:
+    """Return the latest user message and the items produced after it."""
+    if isinstance(input, str):
+        return input, []
+    for index in range(len(input) - 1, -1, -1):
+        if input[index].get("role") == "user":
+            return _item_text(input[index]), list(input[index + 1 :])
+    return "", list(input)
+
+
+def _count_words(words: tuple[str, ...], text: str) -> int:
+    return sum(1 for word in words if word in text)
+
+
+def _resolve_ref(schema: dict[str, Any], root: dict[str, Any]) -> dict[str, Any]:
+    """Follow a local "$ref" (e.g. "#/$defs/UserAccountContext") against the root schema."""
+    while "$ref" in schema:
+        target: Any = root
+        for part in schema["$ref"].removeprefix("#/").split("/"):
+            target = target[part]
+        schema = target
+    return schema
+
+
+def _sample_value(
+    name: str, schema: dict[str, Any], message: str, root: Optional[dict[str, Any]] = None
+) -> Any:
+    """Produce a plausible value for a JSON schema property."""
+    root = schema if root is None else root
+    schema = _resolve_ref(schema, root)
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "const" in schema:
+        return schema["const"]
+    for combinator in ("anyOf", "oneOf", "allOf"):
+        if combinator in schema:
+            options = [option for option in schema[combinator] if option.get("type") != "null"]
+            return _sample_value(name, options[0], message, root) if options else None
+    kind = schema.get("type")
+    if kind == "boolean":
+        return False
+    if kind == "integer":
+        return int(schema.get("default", 1))
+    if kind == "number":
+        return float(schema.get("default", 1.0))
+    if kind == "array":
+        return []
+    if kind == "object" or "properties" in schema:
+        return _sample_object(schema, message, root)
+    lowered = name.lower()
+    if "email" in lowered:
+        return "customer@example.com"
+    if lowered.endswith(("number", "_id", "id")):
+        found = re.search(r"\d{3,}", message)
+        return found.group(0) if found else "12345"
+    return schema.get("default", "mock")
+
+
+def _sample_object(
+    schema: dict[str, Any], message: str, root: Optional[dict[str, Any]] = None
+) -> dict[str, Any]:
+    # Every property is filled, so required fields (including nested objects
+    # such as the tools' UserAccountContext) are always present
+    root = schema if root is None else root
+    schema = _resolve_ref(schema, root)
+    return {
+        name: _sample_value(name, prop, message, root)
+        for name, prop in schema.get("properties", {}).items()
+    }
+
+
+async def check_tool_calls(agents: list[Any], message: str = "order 12345") -> list[str]:
+    """
+    Invoke every function tool of `agents` with mock-generated arguments.
+
+    Tool timings from mock runs only mean something if these calls succeed,
+    so benchmarks and load tests run this first.
+
+    Returns:
+        One "agent/tool: output" line per tool whose call was rejected
+    """
+    from agents.tool_context import ToolContext
+
+    failures = []
+    for agent in agents:
+        for tool in agent.tools:
+            if not isinstance(tool, FunctionTool):
+                continue
+            arguments = json.dumps(_sample_object(tool.params_json_schema, message))
+            context = ToolContext(
+                context=None, tool_name=tool.name, tool_call_id="call_check", tool_arguments=arguments
+            )
+            try:
+                output = await tool.on_invoke_tool(context, arguments)
+            except Exception as e:
+                output = f"{type(e).__name__}: {e}"
+            if str(output).startswith(_TOOL_ERROR_PREFIXES):
+                failures.append(f"{agent.name}/{tool.name}: {output}")
+    return failures
+
+
+# =============================================================================
+# MODEL
+# =============================================================================
+
+
+class MockModel(Model):
+    """Deterministic, offline stand-in for an OpenAI Responses model."""
+
+    def __init__(self, model_name: str = "mock", behavior: Optional[MockBehavior] = None):
+        self.model_name = model_name
+        self.behavior = behavior or MockBehavior()
+
+    # -- decisions -----------------------------------------------------------
+
+    def _structured_output(self, output_schema: AgentOutputSchemaBase, message: str) -> str:
+        if output_schema.is_plain_text():
+            return self._reply_text(message)
+        rule = self.behavior.rule_for(message)
+        lowered = message.lower()
+        value = _sample_object(output_schema.json_schema(), message)
+
+        if "is_off_topic" in value:
+            off_topic = _count_words(self.behavior.off_topic_keywords, lowered) > 0
+            if rule and rule.off_topic is not None:
+                off_topic = rule.off_topic
+            value["is_off_topic"] = off_topic
+        if "reason" in value:
+            value["reason"] = "Mock verdict"
+        if rule:
+            value.update(rule.structured)
+        return json.dumps(value)
+
+    def _choose_handoff(self, handoffs: list[Handoff], message: str) -> Optional[Handoff]:
+        rule = self.behavior.rule_for(message)
+        if rule and rule.handoff:
+            target = rule.handoff.lower()
+            return next((h for h in handoffs if target in h.agent_name.lower()), None)
+
+        lowered = message.lower()
+        best: Optional[Handoff] = None
+        best_score = 0
+        for handoff in handoffs:
+            agent_name = handoff.agent_name.lower()
+            for route, keywords in self.behavior.routes.items():
+                if route in agent_name:
+                    score = _count_words(keywords, lowered)
+                    if score > best_score:
+                        best, best_score = handoff, score
+        return best
+
+    def _choose_tool(self, tools: list[Tool], message: str) -> tuple[Optional[FunctionTool], dict]:
+        function_tools = [tool for tool in tools if isinstance(tool, FunctionTool)]
+        rule = self.behavior.rule_for(message)
+        if rule and rule.tool:
+            tool = next((t for t in function_tools if t.name == rule.tool), None)
+            return tool, rule.tool_arguments
+
+        lowered = message.lower()
+        best: Optional[FunctionTool] = None
+        best_score = 0
+        for tool in function_tools:
+            words = tuple(word for word in tool.name.split("_") if len(word) > 3)
+            score = _count_words(words, lowered)
+            if score > best_score:
+                best, best_score = tool, score
+        return best, {}
+
+    def _reply_text(self, message: str) -> str:
+        rule = self.behavior.rule_for(message)
+        if rule and rule.text is not None:
+            return rule.text
+        words = itertools.islice(itertools.cycle(_FILLER_WORDS), self.behavior.response_tokens)
+        return " ".join(words)
+
+    def _build_output(
+        self,
+        input: str | list[TResponseInputItem],
+        tools: list[Tool],
+        output_schema: Optional[AgentOutputSchemaBase],
+        handoffs: list[Handoff],
+    ) -> list:
+        message, turn_items = _split_turn(input)
+        calls = [item.get("name", "") for item in turn_items if item.get("type") == "function_call"]
+        handed_off = any(name.startswith(_HANDOFF_TOOL_PREFIX) for name in calls)
+        used_tool = any(not name.startswith(_HANDOFF_TOOL_PREFIX) for name in calls)
+
+        if output_schema is not None:
+            text = self._structured_output(output_schema, message)
+        else:
+            # At most one handoff and one tool call per turn, like a well-behaved model
+            handoff = None
+            if handoffs and not handed_off and not used_tool:
+                handoff = self._choose_handoff(handoffs, message)
+            if handoff is not None:
+                arguments = _sample_object(handoff.input_json_schema, message)
+                return [self._function_call(handoff.tool_name, arguments)]
+            if not used_tool:
+                tool, arguments = self._choose_tool(tools, message)
+                if tool is not None:
+                    arguments = {**_sample_object(tool.params_json_schema, message), **arguments}
+                    return [self._function_call(tool.name, arguments)]
+            text = self._reply_text(message)
+
+        return [
+            ResponseOutputMessage(
+                id=_next_id("msg"),
+                content=[ResponseOutputText(text=text, type="output_text", annotations=[])],
+                role="assistant",
+                status="completed",
+                type="message",
+            )
+        ]
+
+    @staticmethod
+    def _function_call(name: str, arguments: dict[str, Any]) -> ResponseFunctionToolCall:
+        return ResponseFunctionToolCall(
+            id=_next_id("fc"),
+            call_id=_next_id("call"),
+            name=name,
+            arguments=json.dumps(arguments),
+            type="function_call",
+            status="completed",
+        )
+
+    @staticmethod
+    def _usage(input: str | list[TResponseInputItem], output: list) -> Usage:
+        input_tokens = len(json.dumps(input, default=str)) // 4 + 1
+        output_tokens = sum(len(item.model_dump_json()) for item in output) // 4 + 1
+        return Usage(
+            requests=1,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            total_tokens=input_tokens + output_tokens,
+        )
+
+    # -- Model interface -----------------------------------------------------
+
+    async def get_response(
+        self,
+        system_instructions: str | None,
+        input: str | list[TResponseInputItem],
+        model_settings: ModelSettings,
+        tools: list[Tool],
+        output_schema: AgentOutputSchemaBase | None,
+        handoffs: list[Handoff],
+        tracing: ModelTracing,
+        *,
+        previous_response_id: str | None = None,
+        conversation_id: str | None = None,
+        prompt: Any = None,
+    ) -> ModelResponse:
+        # Model calls get a response span, as with OpenAIResponsesModel
+        with response_span(disabled=tracing.is_disabled()) as span:
+            output = self._build_output(input, tools, output_schema, handoffs)
+            delay = self.behavior.latency_seconds
+            if self.behavior.tokens_per_second > 0:
+                delay += self._output_tokens(output) / self.behavior.tokens_per_second
+            if delay > 0:
+                await asyncio.sleep(delay)
+            usage = self._usage(input, output)
+            response = self._response(output, usage)
+            if tracing.include_data():
+                span.span_data.response = response
+            return ModelResponse(output=output, usage=usage, response_id=response.id)
+
+    async def stream_response(
+        self,
+        system_instructions: str | None,
+        input: str | list[TResponseInputItem],
+        model_settings: ModelSettings,
+        tools: list[Tool],
+        output_schema: AgentOutputSchemaBase | None,
+        handoffs: list[Handoff],
+        tracing: ModelTracing,
+        *,
+        previous_response_id: str | None = None,
+        conversation_id: str | None = None,
+        prompt: Any = None,
+    ) -> AsyncIterator[TResponseStreamEvent]:
+        with response_span(disabled=tracing.is_disabled()) as span:
+            output = self._build_output(input, tools, output_schema, handoffs)
+            sequence = itertools.count()
+            response = self._response([], status=None)
+
+            if self.behavior.latency_seconds > 0:
+                await asyncio.sleep(self.behavior.latency_seconds)
+            yield ResponseCreatedEvent(
+                response=response, sequence_number=next(sequence), type="response.created"
+            )
+
+            interval = 1.0 / self.behavior.tokens_per_second if self.behavior.tokens_per_second > 0 else 0.0
+            for output_index, item in enumerate(output):
+                if isinstance(item, ResponseOutputMessage):
+                    for index, word in enumerate(item.content[0].text.split(" ")):
+                        if interval:
+                            await asyncio.sleep(interval)
+                        yield ResponseTextDeltaEvent(
+                            content_index=0,
+                            delta=word if index == 0 else " " + word,
+                            item_id=item.id,
+                            output_index=output_index,
+                            sequence_number=next(sequence),
+                            type="response.output_text.delta",
+                            logprobs=[],
+                        )
+                elif interval:
+                    await asyncio.sleep(interval * (len(item.arguments) // 4 + 1))
+                yield ResponseOutputItemDoneEvent(
+                    item=item,
+                    output_index=output_index,
+                    sequence_number=next(sequence),
+                    type="response.output_item.done",
+                )
+
+            # Streamed responses report usage only on completion, as the real API does
+            completed = self._response(output, self._usage(input, output), response_id=response.id)
+            if tracing.include_data():
+                span.span_data.response = completed
+            yield ResponseCompletedEvent(
+                response=completed,
+                sequence_number=next(sequence),
+                type="response.completed",
+            )
+
+    def _response(
+        self,
+        output: list,
+        usage: Optional[Usage] = None,
+        status: Optional[str] = "completed",
+        response_id: Optional[str] = None,
+    ) -> Response:
+        return Response(
+            id=response_id or _next_id("resp"),
+            created_at=0,
+            model=self.model_name,
+            object="response",
+            output=output,
+            tool_choice="auto",
+            tools=[],
+            parallel_tool_calls=False,
+            status=status,
+            usage=(
+                ResponseUsage(
+                    input_tokens=usage.input_tokens,
+                    input_tokens_details=usage.input_tokens_details,
+                    output_tokens=usage.output_tokens,
+                    output_tokens_details=usage.output_tokens_details,
+                    total_tokens=usage.total_tokens,
+                )
+                if usage is not None
+                else None
+            ),
+        )
+
+    @staticmethod
+    def _output_tokens(output: list) -> int:
+        tokens = 0
+        for item in output:
+            if isinstance(item, ResponseOutputMessage):
+                tokens += len(item.content[0].text.split(" "))
+            else:
+                tokens += len(item.arguments) // 4 + 1
+        return tokens
+
+
+class MockModelProvider(ModelProvider):
+    """ModelProvider that serves MockModel for every model name."""
+
+    def __init__(self, behavior: Optional[MockBehavior] = None):
+        self.behavior = behavior or MockBehavior()
+
+    def get_model(self, model_name: str | None) -> Model:
+        return MockModel(model_name or "mock", self.behavior)
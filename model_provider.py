@@ -0,0 +1,62 @@
+"""
+Model provider selection.
+
+Every Runner call in the app (conversation turns, guardrails, summaries)
+takes its RunConfig from get_run_config(). MODEL_PROVIDER=openai keeps the
+SDK defaults; MODEL_PROVIDER=mock serves all agents from the offline
+MockModelProvider and disables trace export, so nothing leaves the machine.
+With TRACE_FILE set, traces are also written locally (see tracing.py); for
+the mock provider the file is then the only trace destination.
+"""
+
+from typing import Optional
+
+from agents import ModelProvider, RunConfig
+
+import config
+import tracing
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+_run_config: Optional[RunConfig] = None
+
+
+def create_model_provider(name: str = config.MODEL_PROVIDER) -> Optional[ModelProvider]:
+    """
+    Build the model provider for `name`.
+
+    Returns:
+        A ModelProvider, or None to use the SDK's default OpenAI provider
+
+    Raises:
+        ValueError: If the provider name is unknown
+    """
+    if name == "openai":
+        return None
+    if name == "mock":
+        from mock_model import MockModelProvider, load_mock_behavior
+
+        behavior = load_mock_behavior(config.MOCK_MODEL_SCRIPT) if config.MOCK_MODEL_SCRIPT else None
+        return MockModelProvider(behavior)
+    raise ValueError(f"Unknown MODEL_PROVIDER: {name}")
+
+
+def get_run_config() -> RunConfig:
+    """Return the RunConfig shared by all agent runs in this process."""
+    global _run_config
+    if _run_config is None:
+        provider = create_model_provider()
+        local_tracing = tracing.setup_tracing(replace_default_processors=provider is not None)
+        if provider is None:
+            _run_config = RunConfig()
+        else:
+            _run_config = RunConfig(model_provider=provider, tracing_disabled=not local_tracing)
+        logger.info("Using model provider: %s", config.MODEL_PROVIDER)
+    return _run_config
+
+
+def set_run_config(run_config: Optional[RunConfig]) -> None:
+    """Replace the shared RunConfig (None rebuilds it from config on next use)."""
+    global _run_config
+    _run_config = run_config
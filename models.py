@@ -46,4 +46,77 @@ class HandoffData(BaseModel):
     to_agent_name: str
     issue_type: str
     issue_description: str
-    reason: str
\ No newline at end of file
+    reason: str
+
+
+class ConversationEvent(BaseModel):
+
+    type: str  # text_delta, agent_changed, tool_started, tool_finished, input_blocked, output_blocked, turn_completed, error
+    customer_id: int
+    agent_name: Optional[str] = None
+    text: Optional[str] = None
+    data: dict = {}
+    turn_id: Optional[str] = None  # correlation ID shared with the turn's log records
+
+
+class AgentHookEvent(BaseModel):
+
+    type: str  # agent_started, agent_finished, handoff, tool_started, tool_finished
+    customer_id: int
+    agent_name: str
+    tool: Optional[str] = None
+    source_agent: Optional[str] = None  # handoffs only
+    detail: Optional[str] = None  # tool result (truncated)
+    timestamp: float
+    turn_id: Optional[str] = None
+    turn_elapsed_ms: Optional[float] = None  # since the turn started, when published
+
+
+class BatchConversation(BaseModel):
+
+    customer_id: int
+    turns: list[str]
+    id: Optional[str] = None  # defaults to the input line number
+
+
+class BatchToolCall(BaseModel):
+
+    tool: str
+    agent_name: Optional[str] = None
+    output: Optional[str] = None
+    started_at_seconds: float
+    elapsed_seconds: Optional[float] = None
+
+
+class BatchHandoff(BaseModel):
+
+    from_agent: str
+    to_agent: str
+    at_seconds: float
+    # Set when the local intent router picked the agent instead of a handoff
+    routed: Optional[str] = None
+
+
+class BatchTurnResult(BaseModel):
+
+    message: str
+    outcome: str  # completed, input_blocked, output_blocked, error
+    agent_name: Optional[str] = None
+    response: Optional[str] = None
+    error: Optional[str] = None
+    handoffs: list[BatchHandoff] = []
+    tool_calls: list[BatchToolCall] = []
+    first_token_seconds: Optional[float] = None
+    elapsed_seconds: float
+    turn_id: Optional[str] = None  # matches turn_id in the JSON logs
+
+
+class BatchConversationResult(BaseModel):
+
+    id: str
+    customer_id: Optional[int] = None
+    status: str  # completed, error, invalid
+    error: Optional[str] = None
+    final_agent: Optional[str] = None
+    turns: list[BatchTurnResult] = []
+    elapsed_seconds: float = 0.0
@@ -11,6 +11,7 @@ from my_agents.technical_agent import technical_agent
 from my_agents.billing_agent import billing_agent
 from my_agents.order_agent import order_agent
 from my_agents.account_agent import account_agent
+from my_agents.summary_agent import conversation_summary_agent
 
 __all__ = [
     "triage_agent",
@@ -18,4 +19,5 @@ __all__ = [
     "billing_agent",
     "order_agent",
     "account_agent",
+    "conversation_summary_agent",
 ]
@@ -1,5 +1,6 @@
-from agents import Agent, RunContextWrapper
-from models import UserAccountContext
+from agents import Agent
+
+from instructions import CachedInstructions, customer_section
 from tools import (
     reset_user_password,
     enable_two_factor_auth,
@@ -10,15 +11,10 @@ from tools import (
 )
 
 
-def dynamic_account_agent_instructions(
-    wrapper: RunContextWrapper[UserAccountContext],
-    agent: Agent[UserAccountContext],
-):
-    return f"""
+ACCOUNT_AGENT_INSTRUCTIONS = """
     IMPORTANT: Always respond in the same language the customer uses. If they write in Korean, respond in Korean. If they write in English, respond in English.
 
-    You are an Account Management specialist helping {wrapper.context.name}.
-    Customer tier: {wrapper.context.tier} {"(Premium Account Services)" if wrapper.context.tier != "basic" else ""}
+    You are an Account Management specialist helping the customer described under CURRENT CUSTOMER below.
 
     YOUR ROLE: Handle account access, security, and profile management issues.
 
@@ -57,9 +53,15 @@ def dynamic_account_agent_instructions(
     - Privacy and notification settings
     - Data export capabilities
     - Account backup and recovery
-    
-    {"PREMIUM FEATURES: Enhanced security options and priority account recovery services." if wrapper.context.tier != "basic" else ""}
-    """
+"""
+
+dynamic_account_agent_instructions = CachedInstructions(
+    ACCOUNT_AGENT_INSTRUCTIONS,
+    customer_section(
+        premium_label="Premium Account Services",
+        premium_note="PREMIUM FEATURES: Enhanced security options and priority account recovery services.",
+    ),
+)
 
 
 account_agent = Agent(
@@ -1,5 +1,6 @@
-from agents import Agent, RunContextWrapper
-from models import UserAccountContext
+from agents import Agent
+
+from instructions import CachedInstructions, customer_section
 from tools import (
     lookup_billing_history,
     process_refund_request,
@@ -9,15 +10,10 @@ from tools import (
 )
 
 
-def dynamic_billing_agent_instructions(
-    wrapper: RunContextWrapper[UserAccountContext],
-    agent: Agent[UserAccountContext],
-):
-    return f"""
+BILLING_AGENT_INSTRUCTIONS = """
     IMPORTANT: Always respond in the same language the customer uses. If they write in Korean, respond in Korean. If they write in English, respond in English.
 
-    You are a Billing Support specialist helping {wrapper.context.name}.
-    Customer tier: {wrapper.context.tier} {"(Premium Billing Support)" if wrapper.context.tier != "basic" else ""}
+    You are a Billing Support specialist helping the customer described under CURRENT CUSTOMER below.
 
     YOUR ROLE: Resolve billing, payment, and subscription issues.
 
@@ -50,9 +46,15 @@ def dynamic_billing_agent_instructions(
     - Premium customers get priority processing
     - Always explain charges clearly
     - Offer payment plan options when helpful
-    
-    {"PREMIUM BENEFITS: Fast-track refund processing and flexible payment options available." if wrapper.context.tier != "basic" else ""}
-    """
+"""
+
+dynamic_billing_agent_instructions = CachedInstructions(
+    BILLING_AGENT_INSTRUCTIONS,
+    customer_section(
+        premium_label="Premium Billing Support",
+        premium_note="PREMIUM BENEFITS: Fast-track refund processing and flexible payment options available.",
+    ),
+)
 
 
 billing_agent = Agent(
@@ -1,5 +1,6 @@
-from agents import Agent, RunContextWrapper
-from models import UserAccountContext
+from agents import Agent
+
+from instructions import CachedInstructions, customer_section
 from tools import (
     lookup_order_status,
     initiate_return_process,
@@ -9,15 +10,10 @@ from tools import (
 )
 
 
-def dynamic_order_agent_instructions(
-    wrapper: RunContextWrapper[UserAccountContext],
-    agent: Agent[UserAccountContext],
-):
-    return f"""
+ORDER_AGENT_INSTRUCTIONS = """
     IMPORTANT: Always respond in the same language the customer uses. If they write in Korean, respond in Korean. If they write in English, respond in English.
 
-    You are an Order Management specialist helping {wrapper.context.name}.
-    Customer tier: {wrapper.context.tier} {"(Premium Shipping)" if wrapper.context.tier != "basic" else ""}
+    You are an Order Management specialist helping the customer described under CURRENT CUSTOMER below.
 
     YOUR ROLE: Handle order status, shipping, returns, and delivery issues.
 
@@ -49,9 +45,15 @@ def dynamic_order_agent_instructions(
     - Free returns for premium customers
     - Exchange options available
     - Refund processing time: 3-5 business days
-    
-    {"PREMIUM PERKS: Free expedited shipping and returns, priority processing." if wrapper.context.tier != "basic" else ""}
-    """
+"""
+
+dynamic_order_agent_instructions = CachedInstructions(
+    ORDER_AGENT_INSTRUCTIONS,
+    customer_section(
+        premium_label="Premium Shipping",
+        premium_note="PREMIUM PERKS: Free expedited shipping and returns, priority processing.",
+    ),
+)
 
 
 order_agent = Agent(
@@ -1,5 +1,6 @@
-from agents import Agent, RunContextWrapper
-from models import UserAccountContext
+from agents import Agent
+
+from instructions import CachedInstructions, customer_section
 from tools import (
     run_diagnostic_check,
     provide_troubleshooting_steps,
@@ -9,15 +10,10 @@ from tools import (
 from output_guardrails import technical_output_guardrail
 
 
-def dynamic_technical_agent_instructions(
-    wrapper: RunContextWrapper[UserAccountContext],
-    agent: Agent[UserAccountContext],
-):
-    return f"""
+TECHNICAL_AGENT_INSTRUCTIONS = """
     IMPORTANT: Always respond in the same language the customer uses. If they write in Korean, respond in Korean. If they write in English, respond in English.
 
-    You are a Technical Support specialist helping {wrapper.context.name}.
-    Customer tier: {wrapper.context.tier} {"(Premium Support)" if wrapper.context.tier != "basic" else ""}
+    You are a Technical Support specialist helping the customer described under CURRENT CUSTOMER below.
 
     YOUR ROLE: Solve technical issues with our products and services.
 
@@ -50,9 +46,15 @@ def dynamic_technical_agent_instructions(
     - Be patient and explain technical steps clearly
     - Confirm each step works before moving to the next
     - Document solutions for future reference
-    
-    {"PREMIUM PRIORITY: Offer direct escalation to senior engineers if standard solutions don't work." if wrapper.context.tier != "basic" else ""}
-    """
+"""
+
+dynamic_technical_agent_instructions = CachedInstructions(
+    TECHNICAL_AGENT_INSTRUCTIONS,
+    customer_section(
+        premium_label="Premium Support",
+        premium_note="PREMIUM PRIORITY: Offer direct escalation to senior engineers if standard solutions don't work.",
+    ),
+)
 
 
 technical_agent = Agent(
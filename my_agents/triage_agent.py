@@ -6,6 +6,9 @@ and routes them to appropriate specialist agents (technical, billing, order,
 or account management).
 """
 
+import hashlib
+import time
+
 from agents import (
     Agent,
     RunContextWrapper,
@@ -14,7 +17,13 @@ from agents import (
     GuardrailFunctionOutput,
 )
 from agents.extensions.handoff_prompt import RECOMMENDED_PROMPT_PREFIX
+import config
+import metrics
+from instructions import CachedInstructions, customer_section
 from models import UserAccountContext, InputGuardRailOutput
+from model_provider import get_run_config
+from topic_classifier import TopicPreClassifier, load_model
+from verdict_cache import VerdictCache, has_history, latest_user_text
 from my_agents.account_agent import account_agent
 from my_agents.technical_agent import technical_agent
 from my_agents.order_agent import order_agent
@@ -38,39 +47,79 @@ input_guardrail_agent = Agent(
 )
 
 
+# Verdicts keyed on the user message of turns without history; the namespace
+# changes with the guardrail prompt so edited instructions never reuse old verdicts
+off_topic_verdict_cache = (
+    VerdictCache(
+        InputGuardRailOutput,
+        namespace=hashlib.sha256(input_guardrail_agent.instructions.encode("utf-8")).hexdigest(),
+        db_path=config.GUARDRAIL_CACHE_DB or None,
+    )
+    if config.GUARDRAIL_CACHE_ENABLED
+    else None
+)
+
+# Answers clearly on- or off-topic messages locally; the rest go to the LLM
+topic_pre_classifier = (
+    TopicPreClassifier(load_model()) if config.TOPIC_CLASSIFIER_ENABLED else None
+)
+
+
 @input_guardrail
 async def off_topic_guardrail(
     wrapper: RunContextWrapper[UserAccountContext],
     agent: Agent[UserAccountContext],
     input: str,
 ) -> GuardrailFunctionOutput:
-    result = await Runner.run(
-        input_guardrail_agent,
-        input,
-        context=wrapper.context,
+    started = time.perf_counter()
+    path = "cache"
+    message = latest_user_text(input)
+    # The LLM judges the whole conversation, so "yes" or "the second one" only
+    # means the same thing across customers when there is no history around it
+    cache = off_topic_verdict_cache if message and not has_history(input) else None
+    verdict = cache.get(message) if cache else None
+
+    if verdict is None and message and topic_pre_classifier:
+        local = topic_pre_classifier.classify(message)
+        path = "classifier"
+        if local.confident:
+            verdict = InputGuardRailOutput(
+                is_off_topic=local.off_topic,
+                reason=(
+                    f"Local classifier ({local.source}, "
+                    f"p(on-topic)={local.on_topic_probability:.2f})"
+                ),
+            )
+
+    if verdict is None:
+        path = "llm"
+        result = await Runner.run(
+            input_guardrail_agent,
+            input,
+            context=wrapper.context,
+            run_config=get_run_config(),
+        )
+        verdict = result.final_output
+        metrics.record_usage(input_guardrail_agent.name, result.context_wrapper.usage)
+        if cache:
+            cache.put(message, verdict)
+
+    metrics.record_guardrail(
+        "off_topic_input", path, time.perf_counter() - started, verdict.is_off_topic
     )
-
     return GuardrailFunctionOutput(
-        output_info=result.final_output,
-        tripwire_triggered=result.final_output.is_off_topic,
+        output_info=verdict,
+        tripwire_triggered=verdict.is_off_topic,
     )
 
 
-def dynamic_triage_agent_instructions(
-    wrapper: RunContextWrapper[UserAccountContext],
-    agent: Agent[UserAccountContext],
-):
-    return f"""
+TRIAGE_AGENT_INSTRUCTIONS = f"""
     IMPORTANT: Always respond in the same language the customer uses. If the customer writes in Korean, respond in Korean. If they write in English, respond in English. Support all languages naturally.
 
     {RECOMMENDED_PROMPT_PREFIX}
 
     You are a customer support agent. You ONLY help customers with their questions about their User Account, Billing, Orders, or Technical Support.
-    You call customers by their name.
-    
-    The customer's name is {wrapper.context.name}.
-    The customer's email is {wrapper.context.email}.
-    The customer's tier is {wrapper.context.tier}.
+    You call customers by their name; their details are under CURRENT CUSTOMER below.
     
     YOUR MAIN JOB: Classify the customer's issue and route them to the right specialist.
     
@@ -115,7 +164,12 @@ def dynamic_triage_agent_instructions(
     SPECIAL HANDLING:
     - Multiple issues: Handoff to the specialist for the most urgent issue first
     - Only ask clarifying questions if you truly cannot determine which specialist to route to
-    """
+"""
+
+dynamic_triage_agent_instructions = CachedInstructions(
+    TRIAGE_AGENT_INSTRUCTIONS,
+    customer_section(include_email=True),
+)
 
 
 triage_agent = Agent(
@@ -127,4 +181,6 @@ triage_agent = Agent(
         account_agent,
         order_agent,
     ],
+    # ConversationService also adds this to turns that start on a specialist
+    input_guardrails=[off_topic_guardrail] if config.INPUT_GUARDRAIL_ENABLED else [],
 )
\ No newline at end of file
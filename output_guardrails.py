@@ -4,8 +4,23 @@ Output guardrails for customer support agents.
 This module implements output guardrails to ensure agents only provide
 information appropriate to their domain (e.g., technical agents shouldn't
 discuss billing).
+
+Guarded responses can also be checked while they stream: StreamingOutputGuard
+checks the response in chunks, holds back only the text no check has covered
+yet, and lets the caller cancel the generation as soon as a chunk trips. The
+SDK guardrail then reuses the streamed verdict instead of checking the whole
+answer again.
+
+Before any LLM check, the lexical screen in output_screen.py clears text with
+no billing, order or account signals locally.
 """
 
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from contextvars import ContextVar
+from typing import Any, Optional
+
 from agents import (
     Agent,
     output_guardrail,
@@ -13,11 +28,20 @@ from agents import (
     RunContextWrapper,
     GuardrailFunctionOutput,
 )
+
+import config
+import metrics
 from models import TechnicalOutputGuardRailOutput, UserAccountContext
 from logging_config import get_logger
+from model_provider import get_run_config
+from output_screen import OutputScreen
+from tracing import app_span
 
 logger = get_logger(__name__)
 
+# Checks a piece of agent output; returns (verdict, tripwire_triggered)
+OutputCheck = Callable[[str, UserAccountContext], Awaitable[tuple[Any, bool]]]
+
 
 technical_output_guardrail_agent = Agent(
     name="Technical Support Guardrail",
@@ -34,6 +58,188 @@ technical_output_guardrail_agent = Agent(
     output_type=TechnicalOutputGuardRailOutput,
 )
 
+# Metrics label for check_technical_output (streamed chunks and whole answers alike)
+_TECHNICAL_OUTPUT = "technical_output"
+
+# Clears text with no billing, order or account signals; the rest go to the LLM
+technical_output_screen = OutputScreen() if config.OUTPUT_SCREEN_ENABLED else None
+
+
+async def check_technical_output(
+    text: str, context: UserAccountContext
+) -> tuple[TechnicalOutputGuardRailOutput, bool]:
+    """Check whether technical support text strays off domain, locally when it clearly doesn't."""
+    started = time.perf_counter()
+    if technical_output_screen is not None and technical_output_screen.screen(text).clean:
+        elapsed = time.perf_counter() - started
+        technical_output_screen.record("cleared", elapsed)
+        metrics.record_guardrail(_TECHNICAL_OUTPUT, "cleared", elapsed, False)
+        validation = TechnicalOutputGuardRailOutput(
+            contains_off_topic=False,
+            contains_billing_data=False,
+            contains_account_data=False,
+            reason="Local screen: no billing, order or account signals",
+        )
+        return validation, False
+
+    # Streamed chunk checks run outside the SDK guardrail span; give each LLM check its own
+    with app_span("technical_output_check", data={"chars": len(text)}) as span:
+        result = await Runner.run(
+            technical_output_guardrail_agent,
+            text,
+            context=context,
+            run_config=get_run_config(),
+        )
+
+        validation = result.final_output
+
+        triggered = (
+            validation.contains_off_topic
+            or validation.contains_billing_data
+            or validation.contains_account_data
+        )
+        span.span_data.data["triggered"] = triggered
+    elapsed = time.perf_counter() - started
+    if technical_output_screen is not None:
+        technical_output_screen.record("llm", elapsed, triggered)
+    metrics.record_guardrail(_TECHNICAL_OUTPUT, "llm", elapsed, triggered)
+    metrics.record_usage(technical_output_guardrail_agent.name, result.context_wrapper.usage)
+    return validation, triggered
+
+
+class StreamingOutputGuard:
+    """
+    Checks a streamed response in chunks while it is generated.
+
+    Text is released only once a passing check has covered it, so at most
+    about `chunk_chars` of unchecked text (more while a check is in flight)
+    is held back. Each check covers the new text plus `overlap_chars` of
+    already verified text, so phrases split across chunk boundaries are still
+    seen whole. Checks run in the background and never pause generation.
+
+    One guard serves a whole turn: it tracks the current segment (one model
+    response from one agent) and starts a new one when text arrives after
+    the previous segment was finished.
+    """
+
+    def __init__(
+        self,
+        context: UserAccountContext,
+        check: Optional[OutputCheck] = None,
+        chunk_chars: int = config.OUTPUT_GUARDRAIL_CHUNK_CHARS,
+        overlap_chars: int = config.OUTPUT_GUARDRAIL_OVERLAP_CHARS,
+    ):
+        if chunk_chars < 1:
+            raise ValueError("chunk_chars must be at least 1")
+        self.context = context
+        self.chunk_chars = chunk_chars
+        self.overlap_chars = overlap_chars
+        self.checks = 0
+        self.reset(check)
+
+    def reset(self, check: Optional[OutputCheck]) -> None:
+        """Start a new segment checked by `check` (None passes text through unchecked)."""
+        self.check = check
+        self.verdict: Any = None
+        self.tripped = False
+        self._text = ""
+        self._fed = 0
+        self._verified = 0
+        self._released = 0
+        self._task: Optional[asyncio.Task] = None
+        self._finished = False
+        self._lock = asyncio.Lock()
+
+    @property
+    def active(self) -> bool:
+        return self.check is not None
+
+    def feed(self, delta: str) -> None:
+        """Add streamed text; starts a background check once a chunk is unchecked."""
+        if self._finished:
+            if self._fed >= len(self._text):
+                # Text after a finished segment belongs to the next model response
+                self.reset(self.check)
+            else:
+                # finish(output) already took the full text; these deltas repeat it
+                self._fed += len(delta)
+                return
+        self._text += delta
+        self._fed += len(delta)
+        self._maybe_check()
+
+    def release(self) -> str:
+        """Return verified text not yet handed out."""
+        if self.tripped:
+            return ""
+        text = self._text[self._released : self._verified]
+        self._released = self._verified
+        return text
+
+    async def finish(self, output: Optional[str] = None) -> tuple[Any, bool]:
+        """
+        Check whatever the segment has left unchecked and return its verdict.
+
+        Args:
+            output: The complete response, when known (the SDK guardrail passes
+                it). The consumer may not have fed every delta yet.
+
+        Returns:
+            (verdict, tripwire_triggered) for the whole segment
+        """
+        if self.check is None:
+            return None, False
+        async with self._lock:
+            if output is not None and not output.startswith(self._text):
+                # Deltas from another response are mixed in; check the answer on its own
+                return await self.check(output, self.context)
+            if output is not None:
+                self._text = output
+            self._finished = True
+            if self._task is not None:
+                await asyncio.shield(self._task)
+            if not self.tripped and self._verified < len(self._text):
+                await self._check_through(len(self._text))
+            return self.verdict, self.tripped
+
+    def close(self) -> None:
+        """Cancel a check still in flight (e.g. after the run was cancelled)."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _maybe_check(self) -> None:
+        if (
+            self._task is None
+            and not self.tripped
+            and len(self._text) - self._verified >= self.chunk_chars
+        ):
+            self._task = asyncio.create_task(self._check_through(len(self._text)))
+
+    async def _check_through(self, end: int) -> None:
+        start = max(0, self._verified - self.overlap_chars)
+        try:
+            validation, triggered = await self.check(self._text[start:end], self.context)
+        finally:
+            self._task = None
+        self.checks += 1
+        if triggered:
+            self.verdict = validation
+            self.tripped = True
+            return
+        if self.verdict is None:
+            self.verdict = validation
+        self._verified = max(self._verified, end)
+        if not self._finished:
+            # Text that arrived during the check may already fill the next chunk
+            self._maybe_check()
+
+
+# Guard for the current turn; set by ConversationService before starting a run
+active_stream_guard: ContextVar[Optional[StreamingOutputGuard]] = ContextVar(
+    "active_stream_guard", default=None
+)
+
 
 @output_guardrail
 async def technical_output_guardrail(
@@ -41,33 +247,42 @@ async def technical_output_guardrail(
     agent: Agent[UserAccountContext],
     output: str,
 ) -> GuardrailFunctionOutput:
-    logger.debug(f"Running output guardrail for agent '{agent.name}'")
+    logger.debug("Running output guardrail for agent '%s'", agent.name)
 
-    result = await Runner.run(
-        technical_output_guardrail_agent,
-        output,
-        context=wrapper.context,
-    )
-
-    validation = result.final_output
-
-    triggered = (
-        validation.contains_off_topic
-        or validation.contains_billing_data
-        or validation.contains_account_data
-    )
+    guard = active_stream_guard.get()
+    if guard is not None and guard.check is check_technical_output:
+        # Most of the answer was already checked while it streamed
+        validation, triggered = await guard.finish(output)
+    else:
+        validation, triggered = await check_technical_output(output, wrapper.context)
 
     if triggered:
         logger.warning(
-            f"Output guardrail triggered for agent '{agent.name}' - "
-            f"Off-topic: {validation.contains_off_topic}, "
-            f"Billing: {validation.contains_billing_data}, "
-            f"Account: {validation.contains_account_data}"
+            "Output guardrail triggered for agent '%s' - Off-topic: %s, Billing: %s, Account: %s",
+            agent.name,
+            validation.contains_off_topic,
+            validation.contains_billing_data,
+            validation.contains_account_data,
         )
     else:
-        logger.debug(f"Output guardrail passed for agent '{agent.name}'")
+        logger.debug("Output guardrail passed for agent '%s'", agent.name)
 
     return GuardrailFunctionOutput(
         output_info=validation,
         tripwire_triggered=triggered,
-    )
\ No newline at end of file
+    )
+
+
+# Output guardrails that can check a response while it streams, by guardrail name
+STREAMING_OUTPUT_CHECKS: dict[str, OutputCheck] = {
+    technical_output_guardrail.get_name(): check_technical_output,
+}
+
+
+def streaming_check_for(agent: Agent[Any]) -> Optional[OutputCheck]:
+    """Return the streaming check for the first guardrail on `agent` that has one."""
+    for guardrail in agent.output_guardrails:
+        check = STREAMING_OUTPUT_CHECKS.get(guardrail.get_name())
+        if check is not None:
+            return check
+    return None
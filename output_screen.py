@@ -0,0 +1,136 @@
+"""
+Lexical pre-screen for the technical output guardrail.
+
+Most technical answers never mention billing, orders or account data, yet
+each one used to cost a guardrail LLM call. OutputScreen looks for the
+signals that guardrail cares about:
+
+- multilingual billing, order and account term lists
+- currency amounts ("$49.99", "10,000원", "20 euros")
+- IDs minted by the billing, order and account tools (REF-, 1Z, RET-,
+  RST-, VER-, EXP-)
+
+Text with no hits is cleared locally. Anything suspicious still goes to the
+LLM check, so the screen can only make the guardrail cheaper, never more
+permissive about what it flags. Per-path counts and latencies are kept for
+benchmark reports.
+"""
+
+import re
+import threading
+from collections import deque
+from dataclasses import dataclass
+
+from topic_classifier import term_pattern
+from verdict_cache import normalize_text
+
+# Terms a technical answer has no business using. Generic words that
+# troubleshooting steps need ("app", "update", "settings", "log in again")
+# are deliberately left out.
+SCREEN_LEXICON: dict[str, tuple[str, ...]] = {
+    "billing": (
+        "refund", "refunded", "charged", "invoice", "billing", "payment", "subscription",
+        "credit card", "receipt", "billing cycle", "환불", "결제", "청구", "구독", "카드",
+        "reembolso", "cobro", "factura", "suscripción", "tarjeta", "返金", "請求",
+        "支払い", "サブスク", "クレジットカード",
+    ),
+    "order": (
+        "tracking number", "shipping", "shipped", "shipment", "delivery", "return label",
+        "배송", "반품", "택배", "운송장", "envío", "entrega", "devolución", "seguimiento",
+        "配送", "返品", "発送", "追跡番号",
+    ),
+    "account": (
+        "password", "reset link", "reset token", "verification code", "two-factor", "2fa",
+        "change your email", "delete your account", "account deletion", "비밀번호",
+        "인증 코드", "계정 삭제", "contraseña", "código de verificación", "eliminar tu cuenta",
+        "パスワード", "認証コード", "アカウント削除",
+    ),
+}
+
+# IDs produced by the billing, order and account tools (see tools.py)
+_ID_PATTERN = re.compile(r"\b(?:ref|ret|rst|ver|exp)-\d{4,}\b|\b1z\d{6,}\b")
+
+# "$49.99", "₩10,000", "10,000원", "20 euros", "1500円"
+_CURRENCY_PATTERN = re.compile(
+    r"[$€£¥₩]\s?\d[\d,]*(?:\.\d+)?"
+    r"|\d[\d,]*(?:\.\d+)?\s?(?:usd|eur|krw|jpy|dollars?|euros?|원|円|달러|ドル|dólares)"
+)
+
+_LEXICON_PATTERNS: dict[str, re.Pattern] = {
+    category: term_pattern(terms) for category, terms in SCREEN_LEXICON.items()
+}
+
+# Latency samples kept per path for percentiles
+_SAMPLE_WINDOW = 10000
+
+
+@dataclass(frozen=True)
+class ScreenResult:
+    """Screen outcome; `hits` names the signals found (empty means clean)."""
+
+    hits: tuple[str, ...]
+
+    @property
+    def clean(self) -> bool:
+        return not self.hits
+
+
+def screen_hits(text: str) -> tuple[str, ...]:
+    """Return the names of the signals present in `text`."""
+    normalized = normalize_text(text)
+    hits = [category for category, pattern in _LEXICON_PATTERNS.items() if pattern.search(normalized)]
+    if _CURRENCY_PATTERN.search(normalized):
+        hits.append("currency")
+    if _ID_PATTERN.search(normalized):
+        hits.append("id")
+    return tuple(hits)
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(pct / 100 * len(sorted_values)))]
+
+
+class OutputScreen:
+    """Local screen with per-path statistics (cleared locally vs escalated to the LLM)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies: dict[str, deque[float]] = {}
+        self.counts: dict[str, int] = {}
+        self.llm_trips = 0
+
+    def screen(self, text: str) -> ScreenResult:
+        return ScreenResult(screen_hits(text))
+
+    def record(self, path: str, seconds: float, tripped: bool = False) -> None:
+        """Record one guardrail check that took `path` ("cleared" or "llm")."""
+        with self._lock:
+            self.counts[path] = self.counts.get(path, 0) + 1
+            self._latencies.setdefault(path, deque(maxlen=_SAMPLE_WINDOW)).append(seconds)
+            if tripped:
+                self.llm_trips += 1
+
+    def stats(self) -> dict:
+        """Pass rates and latency percentiles (milliseconds) for each path."""
+        with self._lock:
+            total = sum(self.counts.values())
+            paths = {}
+            for path, samples in self._latencies.items():
+                ordered = sorted(samples)
+                paths[path] = {
+                    "count": self.counts[path],
+                    "p50_ms": _percentile(ordered, 50) * 1000,
+                    "p95_ms": _percentile(ordered, 95) * 1000,
+                    "max_ms": ordered[-1] * 1000,
+                }
+            escalated = self.counts.get("llm", 0)
+            return {
+                "checks": total,
+                "cleared_rate": self.counts.get("cleared", 0) / total if total else 0.0,
+                "llm_pass_rate": (escalated - self.llm_trips) / escalated if escalated else 0.0,
+                "llm_trips": self.llm_trips,
+                "paths": paths,
+            }
+
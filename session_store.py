@@ -0,0 +1,746 @@
+"""
+Consolidated conversation storage.
+
+This module keeps every customer's conversation history in one SQLite
+database (or a fixed number of shards) keyed by customer ID and session ID,
+instead of one database file per customer. Each shard runs in WAL mode
+behind a bounded connection pool, and every query uses a fixed SQL string
+so sqlite3's per-connection statement cache reuses the prepared statement.
+
+CustomerSession adapts the store to the Agents SDK session protocol, so it
+can be passed to Runner.run / Runner.run_streamed like SQLiteSession.
+"""
+
+import asyncio
+import atexit
+import json
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from agents import SessionABC, TResponseInputItem
+
+import config
+import metrics
+from logging_config import get_logger
+from tracing import app_span
+
+logger = get_logger(__name__)
+
+# Reads and writes the agent run waits for, and write-behind flushes
+_READ_SECONDS = metrics.SESSION_SECONDS.labels("read")
+_WRITE_SECONDS = metrics.SESSION_SECONDS.labels("write")
+_WRITE_BATCH_SECONDS = metrics.SESSION_SECONDS.labels("write_batch")
+
+
+# =============================================================================
+# SQL STATEMENTS
+# =============================================================================
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS support_sessions (
+        customer_id INTEGER NOT NULL,
+        session_id TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (customer_id, session_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS support_messages (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        customer_id INTEGER NOT NULL,
+        session_id TEXT NOT NULL,
+        message_data TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_support_messages_conversation
+    ON support_messages (customer_id, session_id, id)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS support_summaries (
+        customer_id INTEGER NOT NULL,
+        session_id TEXT NOT NULL,
+        summary TEXT NOT NULL,
+        through_id INTEGER NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (customer_id, session_id)
+    )
+    """,
+)
+
+_SQL_TOUCH_SESSION = """
+    INSERT INTO support_sessions (customer_id, session_id) VALUES (?, ?)
+    ON CONFLICT (customer_id, session_id) DO UPDATE SET updated_at = CURRENT_TIMESTAMP
+"""
+_SQL_INSERT_MESSAGE = """
+    INSERT INTO support_messages (customer_id, session_id, message_data) VALUES (?, ?, ?)
+"""
+_SQL_SELECT_ALL = """
+    SELECT id, message_data FROM support_messages
+    WHERE customer_id = ? AND session_id = ?
+    ORDER BY id ASC
+"""
+_SQL_SELECT_LATEST = """
+    SELECT id, message_data FROM support_messages
+    WHERE customer_id = ? AND session_id = ?
+    ORDER BY id DESC
+    LIMIT ?
+"""
+_SQL_SELECT_PAGE = """
+    SELECT id, message_data FROM support_messages
+    WHERE customer_id = ? AND session_id = ? AND id < ?
+    ORDER BY id DESC
+    LIMIT ?
+"""
+_SQL_SELECT_SINCE = """
+    SELECT id, message_data FROM support_messages
+    WHERE customer_id = ? AND session_id = ? AND id >= ?
+    ORDER BY id ASC
+"""
+_SQL_HAS_OLDER = """
+    SELECT EXISTS (
+        SELECT 1 FROM support_messages
+        WHERE customer_id = ? AND session_id = ? AND id < ?
+    )
+"""
+_SQL_SELECT_AFTER = """
+    SELECT id, message_data FROM support_messages
+    WHERE customer_id = ? AND session_id = ? AND id > ?
+    ORDER BY id ASC
+"""
+_SQL_SELECT_SUMMARY = """
+    SELECT summary, through_id FROM support_summaries
+    WHERE customer_id = ? AND session_id = ?
+"""
+_SQL_UPSERT_SUMMARY = """
+    INSERT INTO support_summaries (customer_id, session_id, summary, through_id)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT (customer_id, session_id) DO UPDATE SET
+        summary = excluded.summary,
+        through_id = excluded.through_id,
+        updated_at = CURRENT_TIMESTAMP
+"""
+_SQL_POP_LATEST = """
+    DELETE FROM support_messages
+    WHERE id = (
+        SELECT id FROM support_messages
+        WHERE customer_id = ? AND session_id = ?
+        ORDER BY id DESC
+        LIMIT 1
+    )
+    RETURNING message_data
+"""
+_SQL_DELETE_MESSAGES = "DELETE FROM support_messages WHERE customer_id = ? AND session_id = ?"
+_SQL_DELETE_SESSION = "DELETE FROM support_sessions WHERE customer_id = ? AND session_id = ?"
+_SQL_DELETE_SUMMARY = "DELETE FROM support_summaries WHERE customer_id = ? AND session_id = ?"
+
+
+# =============================================================================
+# CONNECTION POOL
+# =============================================================================
+
+
+class ConnectionPool:
+    """
+    Bounded pool of SQLite connections for one database file.
+
+    At most `max_size` connections exist at once; callers beyond that wait up
+    to `timeout` seconds. Idle connections are reused, so the statement cache
+    on each connection stays warm across requests.
+
+    An in-memory database gets a single connection that callers take in
+    turn: shared-cache connections fail with "database table is locked"
+    under concurrent reads and writes, and busy_timeout does not apply to
+    those table locks.
+    """
+
+    def __init__(self, db_path: str, max_size: int, timeout: float):
+        self.db_path = db_path
+        self._is_memory_db = db_path == ":memory:"
+        self.max_size = 1 if self._is_memory_db else max_size
+        self.timeout = timeout
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._closed = False
+
+        # Statistics for contention monitoring
+        self.acquisitions = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._is_memory_db:
+            conn = sqlite3.connect(
+                ":memory:",
+                check_same_thread=False,
+                cached_statements=config.SESSION_STATEMENT_CACHE_SIZE,
+            )
+        else:
+            conn = sqlite3.connect(
+                self.db_path,
+                check_same_thread=False,
+                cached_statements=config.SESSION_STATEMENT_CACHE_SIZE,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={config.SQLITE_BUSY_TIMEOUT_MS}")
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection, returning it to the pool afterwards."""
+        if self._closed:
+            raise RuntimeError(f"Connection pool for {self.db_path} is closed")
+
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(
+                f"Timed out after {self.timeout}s waiting for a connection to {self.db_path}"
+            )
+        waited = time.perf_counter() - start
+        self.acquisitions += 1
+        self.total_wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+# =============================================================================
+# WRITE-BEHIND QUEUE
+# =============================================================================
+
+@dataclass
+class PendingWrite:
+    """One queued add_items call, already serialized to message_data rows."""
+
+    customer_id: int
+    session_id: str
+    rows: list[str]
+    attempts: int = 0
+
+
+# Dropped writes kept for inspection after their last attempt
+_DEAD_LETTER_LIMIT = 1000
+
+
+class WriteBehindQueue:
+    """
+    Buffers session writes and flushes them in grouped transactions.
+
+    A background thread flushes every `flush_interval` seconds, or as soon as
+    `max_items` items are pending. Callers that need read-your-writes call
+    flush_for() first, which flushes synchronously if that conversation has
+    anything pending. close() (also registered with atexit) flushes the rest.
+
+    Items are serialized when queued, so an item that cannot be stored fails
+    in the caller. `write_batch` returns the writes it could not commit (e.g.
+    the entries of a shard whose transaction failed); only those are queued
+    again, ahead of newer writes. A write that fails `max_attempts` flushes
+    is logged and moved to `dead_letters` so it cannot block later writes.
+    """
+
+    def __init__(
+        self,
+        write_batch: Callable[[list[PendingWrite]], list[PendingWrite]],
+        max_items: int = config.SESSION_WRITE_BEHIND_MAX_ITEMS,
+        flush_interval: float = config.SESSION_WRITE_BEHIND_FLUSH_SECONDS,
+        max_attempts: int = config.SESSION_WRITE_BEHIND_MAX_ATTEMPTS,
+    ):
+        self._write_batch = write_batch
+        self.max_items = max_items
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+
+        self._pending: list[PendingWrite] = []
+        self._pending_items = 0
+        self._pending_keys: dict[tuple[int, str], int] = {}
+        self._condition = threading.Condition()
+        # Serializes flushes so a reader waits for any flush already in progress
+        self._flush_lock = threading.Lock()
+        self._closed = False
+
+        # Statistics for monitoring
+        self.flushes = 0
+        self.flushed_items = 0
+        self.failed_flushes = 0
+        self.dead_letters: deque[PendingWrite] = deque(maxlen=_DEAD_LETTER_LIMIT)
+        self.dead_lettered = 0
+
+        self._thread = threading.Thread(
+            target=self._run, name="session-write-behind", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    def enqueue(self, customer_id: int, session_id: str, items: list[TResponseInputItem]) -> None:
+        """
+        Queue items for a conversation without waiting for the database.
+
+        Raises:
+            TypeError, ValueError: If an item cannot be serialized to JSON
+        """
+        if not items:
+            return
+        rows = [json.dumps(item) for item in items]
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Write-behind queue is closed")
+            self._pending.append(PendingWrite(customer_id, session_id, rows))
+            self._pending_items += len(rows)
+            key = (customer_id, session_id)
+            self._pending_keys[key] = self._pending_keys.get(key, 0) + 1
+            if self._pending_items >= self.max_items:
+                self._condition.notify()
+
+    def has_pending(self, customer_id: int, session_id: str) -> bool:
+        with self._condition:
+            return (customer_id, session_id) in self._pending_keys
+
+    def flush_for(self, customer_id: int, session_id: str) -> None:
+        """
+        Flush pending writes if this conversation has any (or one is being flushed).
+
+        Raises:
+            RuntimeError: If this conversation's writes could not be committed yet
+        """
+        if self.has_pending(customer_id, session_id):
+            self.flush()
+            if self.has_pending(customer_id, session_id):
+                raise RuntimeError(
+                    f"Queued writes for customer {customer_id} could not be written yet"
+                )
+        else:
+            # A background flush may still be writing this conversation's items
+            with self._flush_lock:
+                pass
+
+    def flush(self) -> None:
+        """Write everything pending, grouped into as few transactions as possible."""
+        with self._flush_lock:
+            with self._condition:
+                batch = self._pending
+                self._pending = []
+                self._pending_items = 0
+                self._pending_keys = {}
+            if not batch:
+                return
+            failed = self._write_batch(batch)
+            failed_ids = {id(entry) for entry in failed}
+            self.flushes += 1
+            self.flushed_items += sum(
+                len(entry.rows) for entry in batch if id(entry) not in failed_ids
+            )
+            if failed:
+                self.failed_flushes += 1
+                self._requeue(failed)
+
+    def _requeue(self, failed: list[PendingWrite]) -> None:
+        retry = []
+        for entry in failed:
+            entry.attempts += 1
+            if entry.attempts < self.max_attempts:
+                retry.append(entry)
+                continue
+            self.dead_letters.append(entry)
+            self.dead_lettered += 1
+            logger.error(
+                "Dropped %d queued item(s) for customer %s session %s after %d failed attempts",
+                len(entry.rows),
+                entry.customer_id,
+                entry.session_id,
+                entry.attempts,
+            )
+        if not retry:
+            return
+        # Back in front of newer writes so each conversation keeps its order
+        with self._condition:
+            self._pending[:0] = retry
+            self._pending_items += sum(len(entry.rows) for entry in retry)
+            for entry in retry:
+                key = (entry.customer_id, entry.session_id)
+                self._pending_keys[key] = self._pending_keys.get(key, 0) + 1
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if self._closed:
+                    return
+                if self._pending_items < self.max_items:
+                    self._condition.wait(self.flush_interval)
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error("Write-behind flush failed, will retry: %s", e, exc_info=True)
+
+    def close(self) -> None:
+        """Stop the background thread and flush what is left, retrying failed writes."""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        for _ in range(self.max_attempts):
+            self.flush()
+            with self._condition:
+                if not self._pending:
+                    return
+
+
+def _decode_rows(rows: list[tuple[int, str]]) -> list[TResponseInputItem]:
+    items = []
+    for _, message_data in rows:
+        try:
+            items.append(json.loads(message_data))
+        except json.JSONDecodeError:
+            # Skip invalid JSON entries
+            continue
+    return items
+
+
+# =============================================================================
+# SESSION STORE
+# =============================================================================
+
+
+@dataclass(frozen=True)
+class HistoryPage:
+    """A contiguous window of a conversation, oldest item first."""
+
+    items: list[TResponseInputItem]
+    first_id: Optional[int]
+    """Row ID of the oldest item in the window; the cursor for loading older items."""
+    has_older: bool
+
+
+_NO_CURSOR = 2**63 - 1
+
+
+class SessionStore:
+    """
+    Conversation history for all customers in a fixed set of SQLite shards.
+
+    A customer always maps to the same shard (customer_id modulo the shard
+    count), so one conversation never spans files.
+    """
+
+    def __init__(
+        self,
+        db_path: str | Path = config.DB_NAME,
+        shards: int = config.SESSION_DB_SHARDS,
+        pool_size: int = config.SESSION_POOL_SIZE,
+        pool_timeout: float = config.SESSION_POOL_TIMEOUT_SECONDS,
+        write_behind: bool = config.SESSION_WRITE_BEHIND,
+    ):
+        if shards < 1:
+            raise ValueError("Session store needs at least one shard")
+
+        self.db_path = str(db_path)
+        self._pools = [
+            ConnectionPool(shard_path, pool_size, pool_timeout)
+            for shard_path in self._shard_paths(self.db_path, shards)
+        ]
+        for pool in self._pools:
+            with pool.connection() as conn:
+                for statement in _SCHEMA:
+                    conn.execute(statement)
+                conn.commit()
+
+        self._write_behind = WriteBehindQueue(self._write_batch) if write_behind else None
+        logger.info(
+            "Session store ready: %s (%d shard(s), pool size %d, write-behind %s)",
+            self.db_path,
+            shards,
+            pool_size,
+            "on" if write_behind else "off",
+        )
+
+    @staticmethod
+    def _shard_paths(db_path: str, shards: int) -> list[str]:
+        if shards == 1 or db_path == ":memory:":
+            return [db_path] * shards
+        path = Path(db_path)
+        return [str(path.with_name(f"{path.stem}-shard{i}{path.suffix}")) for i in range(shards)]
+
+    @property
+    def pools(self) -> list[ConnectionPool]:
+        return list(self._pools)
+
+    def _pool_for(self, customer_id: int) -> ConnectionPool:
+        return self._pools[customer_id % len(self._pools)]
+
+    @property
+    def write_behind(self) -> Optional[WriteBehindQueue]:
+        return self._write_behind
+
+    def _sync(self, customer_id: int, session_id: str) -> None:
+        """Make queued writes for a conversation visible before reading or changing it."""
+        if self._write_behind is not None:
+            self._write_behind.flush_for(customer_id, session_id)
+
+    def _write_batch(self, batch: list[PendingWrite]) -> list[PendingWrite]:
+        """Write queued add_items calls with one transaction per shard; return the unwritten ones."""
+        with _WRITE_BATCH_SECONDS.time():
+            return self._write_batch_by_shard(batch)
+
+    def _write_batch_by_shard(self, batch: list[PendingWrite]) -> list[PendingWrite]:
+        by_pool: dict[int, list[PendingWrite]] = {}
+        for entry in batch:
+            by_pool.setdefault(entry.customer_id % len(self._pools), []).append(entry)
+
+        failed: list[PendingWrite] = []
+        for pool_index, entries in by_pool.items():
+            conversations = list(dict.fromkeys((e.customer_id, e.session_id) for e in entries))
+            rows = [
+                (entry.customer_id, entry.session_id, message_data)
+                for entry in entries
+                for message_data in entry.rows
+            ]
+            try:
+                with self._pools[pool_index].connection() as conn:
+                    with conn:
+                        conn.executemany(_SQL_TOUCH_SESSION, conversations)
+                        conn.executemany(_SQL_INSERT_MESSAGE, rows)
+            except Exception as e:
+                # Other shards' transactions stand; only this shard is retried
+                logger.error(
+                    "Write-behind flush of shard %d failed (%d item(s)): %s",
+                    pool_index,
+                    len(rows),
+                    e,
+                    exc_info=True,
+                )
+                failed.extend(entries)
+        return failed
+
+    def flush(self) -> None:
+        """Durably write any queued items."""
+        if self._write_behind is not None:
+            self._write_behind.flush()
+
+    def get_items(
+        self, customer_id: int, session_id: str, limit: Optional[int] = None
+    ) -> list[TResponseInputItem]:
+        """Return a conversation's items in chronological order (latest `limit` if given)."""
+        self._sync(customer_id, session_id)
+        with self._pool_for(customer_id).connection() as conn:
+            if limit is None:
+                rows = conn.execute(_SQL_SELECT_ALL, (customer_id, session_id)).fetchall()
+            else:
+                rows = conn.execute(
+                    _SQL_SELECT_LATEST, (customer_id, session_id, limit)
+                ).fetchall()
+                rows.reverse()
+        return _decode_rows(rows)
+
+    def get_page(
+        self,
+        customer_id: int,
+        session_id: str,
+        limit: int,
+        before_id: Optional[int] = None,
+    ) -> HistoryPage:
+        """
+        Return up to `limit` items older than `before_id` (or the latest items).
+
+        Pass the returned page's `first_id` as `before_id` to page backwards.
+        """
+        self._sync(customer_id, session_id)
+        cursor = _NO_CURSOR if before_id is None else before_id
+        with self._pool_for(customer_id).connection() as conn:
+            # Fetch one extra row to learn whether an older page exists
+            rows = conn.execute(
+                _SQL_SELECT_PAGE, (customer_id, session_id, cursor, limit + 1)
+            ).fetchall()
+        has_older = len(rows) > limit
+        rows = rows[:limit]
+        rows.reverse()
+        return HistoryPage(
+            items=_decode_rows(rows),
+            first_id=rows[0][0] if rows else before_id,
+            has_older=has_older,
+        )
+
+    def get_page_since(self, customer_id: int, session_id: str, from_id: int) -> HistoryPage:
+        """Return every item from row `from_id` onwards."""
+        self._sync(customer_id, session_id)
+        with self._pool_for(customer_id).connection() as conn:
+            rows = conn.execute(_SQL_SELECT_SINCE, (customer_id, session_id, from_id)).fetchall()
+            (has_older,) = conn.execute(
+                _SQL_HAS_OLDER, (customer_id, session_id, from_id)
+            ).fetchone()
+        return HistoryPage(
+            items=_decode_rows(rows),
+            first_id=rows[0][0] if rows else from_id,
+            has_older=bool(has_older),
+        )
+
+    def get_rows_after(
+        self, customer_id: int, session_id: str, after_id: int
+    ) -> list[tuple[int, TResponseInputItem]]:
+        """Return (row ID, item) pairs newer than `after_id`, oldest first."""
+        self._sync(customer_id, session_id)
+        with self._pool_for(customer_id).connection() as conn:
+            rows = conn.execute(_SQL_SELECT_AFTER, (customer_id, session_id, after_id)).fetchall()
+        decoded = []
+        for row_id, message_data in rows:
+            try:
+                decoded.append((row_id, json.loads(message_data)))
+            except json.JSONDecodeError:
+                continue
+        return decoded
+
+    def get_summary(self, customer_id: int, session_id: str) -> tuple[Optional[str], int]:
+        """Return (summary text, last row ID it covers); (None, 0) if there is none."""
+        with self._pool_for(customer_id).connection() as conn:
+            row = conn.execute(_SQL_SELECT_SUMMARY, (customer_id, session_id)).fetchone()
+        return (row[0], row[1]) if row else (None, 0)
+
+    def save_summary(self, customer_id: int, session_id: str, summary: str, through_id: int) -> None:
+        """Persist the rolling summary covering every item up to `through_id`."""
+        with self._pool_for(customer_id).connection() as conn:
+            with conn:
+                conn.execute(_SQL_UPSERT_SUMMARY, (customer_id, session_id, summary, through_id))
+
+    def add_items(self, customer_id: int, session_id: str, items: list[TResponseInputItem]) -> None:
+        """Append items to a conversation (queued when write-behind is enabled)."""
+        if not items:
+            return
+        if self._write_behind is not None:
+            self._write_behind.enqueue(customer_id, session_id, items)
+            return
+        with self._pool_for(customer_id).connection() as conn:
+            with conn:
+                conn.execute(_SQL_TOUCH_SESSION, (customer_id, session_id))
+                conn.executemany(
+                    _SQL_INSERT_MESSAGE,
+                    [(customer_id, session_id, json.dumps(item)) for item in items],
+                )
+
+    def pop_item(self, customer_id: int, session_id: str) -> Optional[TResponseInputItem]:
+        """Remove and return the most recent item of a conversation."""
+        self._sync(customer_id, session_id)
+        with self._pool_for(customer_id).connection() as conn:
+            with conn:
+                result = conn.execute(_SQL_POP_LATEST, (customer_id, session_id)).fetchone()
+        if result is None:
+            return None
+        try:
+            return json.loads(result[0])
+        except json.JSONDecodeError:
+            # Return None for corrupted JSON entries (already deleted)
+            return None
+
+    def clear_session(self, customer_id: int, session_id: str) -> None:
+        """Delete every item of a conversation."""
+        self._sync(customer_id, session_id)
+        with self._pool_for(customer_id).connection() as conn:
+            with conn:
+                conn.execute(_SQL_DELETE_MESSAGES, (customer_id, session_id))
+                conn.execute(_SQL_DELETE_SESSION, (customer_id, session_id))
+                conn.execute(_SQL_DELETE_SUMMARY, (customer_id, session_id))
+
+    def close(self) -> None:
+        if self._write_behind is not None:
+            self._write_behind.close()
+        for pool in self._pools:
+            pool.close()
+
+
+_store: Optional[SessionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    """Return the process-wide session store, creating it on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SessionStore()
+    return _store
+
+
+# =============================================================================
+# AGENTS SDK SESSION ADAPTER
+# =============================================================================
+
+
+class CustomerSession(SessionABC):
+    """Agents SDK session for one customer's conversation in the shared store."""
+
+    def __init__(
+        self,
+        customer_id: int,
+        session_id: str = config.SESSION_ID,
+        store: Optional[SessionStore] = None,
+    ):
+        self.customer_id = customer_id
+        self.session_id = session_id
+        self.store = store or get_session_store()
+
+    async def get_items(self, limit: int | None = None) -> list[TResponseInputItem]:
+        with _READ_SECONDS.time(), app_span("session.read"):
+            return await asyncio.to_thread(
+                self.store.get_items, self.customer_id, self.session_id, limit
+            )
+
+    async def get_page(self, limit: int, before_id: Optional[int] = None) -> HistoryPage:
+        """Return up to `limit` items older than `before_id`, or the latest items."""
+        return await asyncio.to_thread(
+            self.store.get_page, self.customer_id, self.session_id, limit, before_id
+        )
+
+    async def get_page_since(self, from_id: int) -> HistoryPage:
+        """Return every item from row `from_id` onwards."""
+        return await asyncio.to_thread(
+            self.store.get_page_since, self.customer_id, self.session_id, from_id
+        )
+
+    async def add_items(self, items: list[TResponseInputItem]) -> None:
+        with _WRITE_SECONDS.time(), app_span("session.write", data={"items": len(items)}):
+            if self.store.write_behind is not None:
+                # Only appends to an in-memory queue, no need for a worker thread
+                self.store.add_items(self.customer_id, self.session_id, items)
+                return
+            await asyncio.to_thread(self.store.add_items, self.customer_id, self.session_id, items)
+
+    async def pop_item(self) -> TResponseInputItem | None:
+        return await asyncio.to_thread(self.store.pop_item, self.customer_id, self.session_id)
+
+    async def clear_session(self) -> None:
+        await asyncio.to_thread(self.store.clear_session, self.customer_id, self.session_id)
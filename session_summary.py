@@ -0,0 +1,238 @@
+"""
+Rolling conversation summarization.
+
+SummarizingSession wraps a CustomerSession and keeps the history sent to the
+model within a token budget. When a conversation grows past the budget, the
+oldest turns are folded into a persisted summary; the model then receives
+the summary plus the recent tail instead of the full history. The raw items
+stay in the session store untouched, so the complete transcript is always
+available for audit.
+"""
+
+import asyncio
+import contextvars
+import json
+from typing import Awaitable, Callable, Optional
+
+from agents import Runner, SessionABC, TResponseInputItem
+
+import config
+import metrics
+from logging_config import get_logger
+from model_provider import get_run_config
+from my_agents.summary_agent import conversation_summary_agent
+from session_store import CustomerSession, HistoryPage
+from tracing import app_span
+
+logger = get_logger(__name__)
+
+_READ_SECONDS = metrics.SESSION_SECONDS.labels("read")
+
+Summarizer = Callable[[Optional[str], list[TResponseInputItem]], Awaitable[str]]
+
+
+def estimate_tokens(item: TResponseInputItem | str) -> int:
+    """Rough token count (about four characters per token) without a tokenizer."""
+    text = item if isinstance(item, str) else json.dumps(item, ensure_ascii=False)
+    return len(text) // 4 + 1
+
+
+def _content_text(content) -> str:
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return ""
+
+
+def format_transcript(items: list[TResponseInputItem]) -> str:
+    """Render session items as a plain-text transcript for summarization."""
+    lines = []
+    for item in items:
+        item_type = item.get("type", "message")
+        if item_type == "message" or "role" in item:
+            role = item.get("role", "assistant").title()
+            lines.append(f"{role}: {_content_text(item.get('content'))}")
+        elif item_type == "function_call":
+            lines.append(f"Tool call: {item.get('name')}({item.get('arguments', '')})")
+        elif item_type == "function_call_output":
+            lines.append(f"Tool result: {item.get('output', '')}")
+    return "\n".join(lines)
+
+
+async def summarize_with_agent(
+    previous_summary: Optional[str], items: list[TResponseInputItem]
+) -> str:
+    """Fold transcript items into the previous summary using the summary agent."""
+    prompt = (
+        f"PREVIOUS SUMMARY:\n{previous_summary or '(none)'}\n\n"
+        f"NEXT PART OF THE TRANSCRIPT:\n{format_transcript(items)}"
+    )
+    result = await Runner.run(conversation_summary_agent, prompt, run_config=get_run_config())
+    return result.final_output
+
+
+class SummarizingSession(SessionABC):
+    """
+    Session wrapper that bounds the history sent to the model.
+
+    get_items() returns a summary item followed by every item newer than the
+    summary. After each add_items(), if the summary plus that tail exceeds
+    `token_budget`, the oldest turns are summarized until the tail fits in
+    `recent_tokens` (or only the latest turn remains). The tail always starts
+    at a user message, so tool calls and their outputs are never split.
+
+    The SDK saves items before the first model call and at each handoff, so
+    folding runs in a background task instead of inside add_items(); the
+    turn never waits for the summarizer. The next get_items() waits for a
+    fold still in flight, so it reads the folded history.
+    """
+
+    def __init__(
+        self,
+        session: CustomerSession,
+        token_budget: int = config.HISTORY_TOKEN_BUDGET,
+        recent_tokens: int = config.HISTORY_RECENT_TOKENS,
+        summarizer: Summarizer = summarize_with_agent,
+    ):
+        if recent_tokens >= token_budget:
+            raise ValueError("recent_tokens must be smaller than token_budget")
+
+        self.session = session
+        self.session_id = session.session_id
+        self.customer_id = session.customer_id
+        self.store = session.store
+        self.token_budget = token_budget
+        self.recent_tokens = recent_tokens
+        self.summarizer = summarizer
+        self._fold_lock = asyncio.Lock()
+        self._fold_task: Optional[asyncio.Task] = None
+        self._fold_requested = False
+
+    @staticmethod
+    def _summary_item(summary: str) -> TResponseInputItem:
+        return {
+            "role": "system",
+            "content": f"Summary of the earlier conversation with this customer:\n{summary}",
+        }
+
+    async def _load_window(self) -> tuple[Optional[str], list[tuple[int, TResponseInputItem]]]:
+        summary, through_id = await asyncio.to_thread(
+            self.store.get_summary, self.customer_id, self.session_id
+        )
+        rows = await asyncio.to_thread(
+            self.store.get_rows_after, self.customer_id, self.session_id, through_id
+        )
+        return summary, rows
+
+    async def get_items(self, limit: int | None = None) -> list[TResponseInputItem]:
+        await self.wait_for_fold()
+        with _READ_SECONDS.time(), app_span("session.read"):
+            summary, rows = await self._load_window()
+        items = [item for _, item in rows]
+        if limit is not None:
+            items = items[-limit:] if limit > 0 else []
+        if summary:
+            items.insert(0, self._summary_item(summary))
+        return items
+
+    async def add_items(self, items: list[TResponseInputItem]) -> None:
+        await self.session.add_items(items)
+        self._schedule_fold()
+
+    def _schedule_fold(self) -> None:
+        self._fold_requested = True
+        if self._fold_task is None or self._fold_task.done():
+            # A fresh context keeps the summarizer run out of the turn's trace
+            self._fold_task = asyncio.create_task(
+                self._fold_in_background(), context=contextvars.Context()
+            )
+
+    async def _fold_in_background(self) -> None:
+        # Items added while a fold runs get another check once it finishes
+        while self._fold_requested:
+            self._fold_requested = False
+            try:
+                await self.fold_if_needed()
+            except Exception as e:
+                # Summarization is an optimization; the raw history is already saved
+                logger.error(
+                    "Failed to summarize conversation %s: %s", self.customer_id, e, exc_info=True
+                )
+
+    async def wait_for_fold(self) -> None:
+        """Wait for a background fold in progress, if any."""
+        task = self._fold_task
+        if task is not None and not task.done():
+            # Shielded so a cancelled reader does not cancel the fold
+            await asyncio.shield(task)
+
+    async def fold_if_needed(self) -> bool:
+        """
+        Summarize the oldest turns if the window exceeds the token budget.
+
+        Returns:
+            True if a new summary was written
+        """
+        async with self._fold_lock:
+            summary, rows = await self._load_window()
+            sizes = [estimate_tokens(item) for _, item in rows]
+            total = sum(sizes) + (estimate_tokens(summary) if summary else 0)
+            if total <= self.token_budget:
+                return False
+
+            # Keep the newest items that fit in recent_tokens...
+            keep_from = len(rows)
+            kept = 0
+            while keep_from > 0 and kept + sizes[keep_from - 1] <= self.recent_tokens:
+                keep_from -= 1
+                kept += sizes[keep_from]
+
+            # ...then move the cut back to the start of that user turn
+            cut = min(keep_from, len(rows) - 1)
+            while cut > 0 and rows[cut][1].get("role") != "user":
+                cut -= 1
+            if cut == 0:
+                logger.debug(
+                    "No turn boundary to fold for customer %s (%d estimated tokens)",
+                    self.customer_id,
+                    total,
+                )
+                return False
+
+            folded = [item for _, item in rows[:cut]]
+            new_summary = await self.summarizer(summary, folded)
+            through_id = rows[cut - 1][0]
+            await asyncio.to_thread(
+                self.store.save_summary,
+                self.customer_id,
+                self.session_id,
+                new_summary,
+                through_id,
+            )
+            logger.info(
+                "Folded %d items into summary for customer %s (~%d -> ~%d tokens)",
+                len(folded),
+                self.customer_id,
+                total,
+                estimate_tokens(new_summary) + sum(sizes[cut:]),
+            )
+            return True
+
+    async def pop_item(self) -> TResponseInputItem | None:
+        return await self.session.pop_item()
+
+    async def clear_session(self) -> None:
+        # A fold finishing after the clear would save a stale summary
+        await self.wait_for_fold()
+        await self.session.clear_session()
+
+    async def get_full_history(self) -> list[TResponseInputItem]:
+        """Return every raw item of the conversation, ignoring the summary."""
+        return await self.session.get_items()
+
+    async def get_page(self, limit: int, before_id: Optional[int] = None) -> HistoryPage:
+        return await self.session.get_page(limit, before_id)
+
+    async def get_page_since(self, from_id: int) -> HistoryPage:
+        return await self.session.get_page_since(from_id)
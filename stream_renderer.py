@@ -0,0 +1,91 @@
+"""
+Incremental rendering of streamed agent responses.
+
+StreamRenderer accumulates response deltas and pushes them to a Streamlit
+placeholder at a bounded frame rate. Each delta is escaped once when it
+arrives, and the text is built from a list of parts instead of repeated
+string concatenation, so a long answer costs O(n) escaping work plus at
+most STREAM_RENDER_HZ UI updates per second.
+"""
+
+import time
+from typing import Callable, Protocol
+
+import config
+
+
+class TextPlaceholder(Protocol):
+    def write(self, *args, **kwargs): ...
+
+    def empty(self): ...
+
+
+def escape_markdown_dollars(text: str) -> str:
+    """Escape `$` so Streamlit does not render it as LaTeX."""
+    return text.replace("$", "\\$")
+
+
+class StreamRenderer:
+    """
+    Coalesces streamed text deltas into rate-limited placeholder updates.
+
+    Call append() for every delta, reset() when a new message starts (for
+    example after a handoff), and flush() once the stream ends so the final
+    text is always shown.
+    """
+
+    def __init__(
+        self,
+        placeholder: TextPlaceholder,
+        render_hz: float = config.STREAM_RENDER_HZ,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.placeholder = placeholder
+        self.min_interval = 1.0 / render_hz if render_hz > 0 else 0.0
+        self._clock = clock
+        self._parts: list[str] = []
+        self._rendered_parts = 0
+        self._last_render = float("-inf")
+        self.renders = 0
+
+    @property
+    def text(self) -> str:
+        """The escaped text received so far."""
+        return "".join(self._parts)
+
+    def append(self, delta: str) -> None:
+        """Buffer a delta and render if the frame interval has elapsed."""
+        if not delta:
+            return
+        self._parts.append(escape_markdown_dollars(delta))
+        now = self._clock()
+        if now - self._last_render >= self.min_interval:
+            self._render(now)
+
+    def flush(self) -> None:
+        """Render any buffered text that has not been shown yet."""
+        if self._rendered_parts != len(self._parts):
+            self._render(self._clock())
+
+    def reset(self, placeholder: TextPlaceholder) -> None:
+        """Flush the current message and start a new one in `placeholder`."""
+        self.flush()
+        self.placeholder = placeholder
+        self._parts = []
+        self._rendered_parts = 0
+        self._last_render = float("-inf")
+
+    def clear(self) -> None:
+        """Discard the current message and empty its placeholder."""
+        self._parts = []
+        self._rendered_parts = 0
+        self.placeholder.empty()
+
+    def _render(self, now: float) -> None:
+        # Collapse the parts so the next join only touches new deltas
+        text = "".join(self._parts)
+        self._parts = [text]
+        self._rendered_parts = 1
+        self._last_render = now
+        self.renders += 1
+        self.placeholder.write(text)
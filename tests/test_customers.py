@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+import config
+from customers import JsonCustomerStore, SQLiteCustomerStore
+
+CUSTOMERS = [
+    {"customer_id": 1, "name": "Anna Smith", "email": "anna@example.com", "tier": "premium"},
+    {"customer_id": 2, "name": "Ann Lee", "email": "ann@example.com", "tier": "basic"},
+    {"customer_id": 12, "name": "Bob Annison", "email": None, "tier": "basic"},
+    {"customer_id": 21, "name": "Joanna Park", "email": None, "tier": "enterprise"},
+    {"customer_id": 3, "name": "Carl Jones", "email": None, "tier": "basic"},
+    {"customer_id": 120, "name": "Dan Brown", "email": None, "tier": "premium"},
+]
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "json":
+        path = tmp_path / "customers.json"
+        path.write_text(json.dumps(CUSTOMERS))
+        yield JsonCustomerStore(path)
+    else:
+        store = SQLiteCustomerStore(tmp_path / "customers.db")
+        store.upsert_many(CUSTOMERS)
+        yield store
+        store.close()
+
+
+def ids(customers):
+    return [customer["customer_id"] for customer in customers]
+
+
+def test_search_ranks_name_then_word_then_substring(store):
+    # Full-name prefixes by name, then a later word, then substrings
+    matches, more = store.search("Ann", limit=10)
+    assert ids(matches) == [2, 1, 12, 21]
+    assert not more
+
+
+def test_search_by_id_prefix(store):
+    matches, _ = store.search("12", limit=10)
+    assert ids(matches) == [12, 120]
+
+
+def test_empty_query_lists_everyone_by_name(store):
+    matches, _ = store.search("  ", limit=10)
+    assert ids(matches) == [2, 1, 12, 3, 120, 21]
+
+
+def test_search_pages(store):
+    first, more = store.search("ann", limit=2)
+    second, more_after = store.search("ann", limit=2, offset=2)
+    assert (ids(first), more) == ([2, 1], True)
+    assert (ids(second), more_after) == ([12, 21], False)
+
+
+def test_substring_scan_is_bounded(store, monkeypatch):
+    # "Joanna Park" is only found by the substring scan, which stops after two names
+    monkeypatch.setattr(config, "CUSTOMER_SEARCH_SUBSTRING_SCAN_LIMIT", 2)
+    matches, _ = store.search("ann", limit=10)
+    assert ids(matches) == [2, 1, 12]
+
+
+def test_closed_sqlite_store_raises(tmp_path):
+    store = SQLiteCustomerStore(tmp_path / "customers.db")
+    store.upsert_many(CUSTOMERS)
+    assert store.get_by_id(1)["name"] == "Anna Smith"
+    store.close()
+    with pytest.raises(RuntimeError):
+        store.get_by_id(1)
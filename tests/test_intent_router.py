@@ -0,0 +1,53 @@
+import pytest
+
+from intent_router import INTENTS, IntentRouter
+
+
+@pytest.fixture(scope="module")
+def router():
+    return IntentRouter.train()
+
+
+def test_single_keyword_category_routes_by_rule(router):
+    decision = router.route("I need a refund")
+    assert (decision.intent, decision.source) == ("billing", "rule")
+
+
+def test_keywords_from_several_intents_fall_back(router):
+    assert router.route("My refund for the order").intent is None
+
+
+def test_off_topic_terms_never_route(router):
+    loose = IntentRouter(router.models, threshold=0.0)
+    assert loose.route("Tell me a joke about refunds").source == "fallback"
+
+
+def test_threshold_decides_model_routes(router):
+    text = "My card got declined"
+    confidence = max(router.scores(text).values())
+    below = IntentRouter(router.models, threshold=confidence + 0.01).route(text)
+    at = IntentRouter(router.models, threshold=confidence).route(text)
+    assert below.source == "fallback"
+    assert at.source == "model"
+    assert at.intent == "billing"
+
+
+def test_scores_are_shares_over_intents(router):
+    scores = router.scores("The app won't load")
+    assert set(scores) == set(INTENTS)
+    assert sum(scores.values()) == pytest.approx(1.0)
+
+
+def test_missing_intent_model_is_rejected(router):
+    models = dict(router.models)
+    del models["order"]
+    with pytest.raises(ValueError):
+        IntentRouter(models)
+
+
+def test_router_round_trips_through_json(router, tmp_path):
+    path = tmp_path / "router.json"
+    router.save(path)
+    loaded = IntentRouter.load(path)
+    text = "Where is my parcel?"
+    assert loaded.scores(text) == pytest.approx(router.scores(text))
@@ -0,0 +1,99 @@
+import asyncio
+
+from models import UserAccountContext
+from output_guardrails import StreamingOutputGuard
+
+CONTEXT = UserAccountContext(customer_id=1, name="Anna Smith")
+
+
+class RecordingCheck:
+    """Output check that records what it saw and trips on a banned word."""
+
+    def __init__(self, banned: str = "refund"):
+        self.banned = banned
+        self.seen: list[str] = []
+
+    async def __call__(self, text: str, context: UserAccountContext):
+        self.seen.append(text)
+        await asyncio.sleep(0)
+        triggered = self.banned in text
+        return {"triggered": triggered}, triggered
+
+
+async def stream(guard: StreamingOutputGuard, deltas: list[str]) -> str:
+    released = ""
+    for delta in deltas:
+        guard.feed(delta)
+        # Let background checks run between deltas, as they would between model events
+        for _ in range(3):
+            await asyncio.sleep(0)
+        released += guard.release()
+    return released
+
+
+def test_chunks_overlap_and_release_only_checked_text():
+    async def run():
+        check = RecordingCheck()
+        guard = StreamingOutputGuard(CONTEXT, check, chunk_chars=10, overlap_chars=3)
+        text = "abcdefghij" "klmnopqrst" "uvwxy"
+        released = await stream(guard, [text[i : i + 5] for i in range(0, len(text), 5)])
+        # The last five characters are below a chunk and still unchecked
+        assert released == text[:20]
+        verdict, tripped = await guard.finish()
+        assert not tripped
+        assert verdict == {"triggered": False}
+        assert released + guard.release() == text
+        return check.seen
+
+    seen = asyncio.run(run())
+    assert seen == ["abcdefghij", "hijklmnopqrst", "rstuvwxy"]
+
+
+def test_phrase_split_across_chunks_trips():
+    async def run():
+        check = RecordingCheck()
+        guard = StreamingOutputGuard(CONTEXT, check, chunk_chars=10, overlap_chars=4)
+        released = await stream(guard, ["You can get a ", "ref", "und by", " calling us."])
+        verdict, tripped = await guard.finish()
+        return guard, released, verdict, tripped
+
+    guard, released, verdict, tripped = asyncio.run(run())
+    assert tripped
+    assert verdict == {"triggered": True}
+    assert "ref" not in released
+    assert guard.release() == ""
+
+
+def test_finish_checks_full_output_the_consumer_has_not_fed():
+    async def run():
+        check = RecordingCheck()
+        guard = StreamingOutputGuard(CONTEXT, check, chunk_chars=100, overlap_chars=10)
+        guard.feed("Restart the ")
+        return await guard.finish("Restart the app, then ask billing for a refund.")
+
+    assert asyncio.run(run()) == ({"triggered": True}, True)
+
+
+def test_guard_without_check_passes_text_through():
+    async def run():
+        guard = StreamingOutputGuard(CONTEXT, None, chunk_chars=10)
+        guard.feed("anything at all, including a refund")
+        return guard.active, await guard.finish()
+
+    assert asyncio.run(run()) == (False, (None, False))
+
+
+def test_text_after_a_finished_segment_starts_a_new_one():
+    async def run():
+        check = RecordingCheck()
+        guard = StreamingOutputGuard(CONTEXT, check, chunk_chars=50, overlap_chars=5)
+        guard.feed("First answer.")
+        await guard.finish()
+        guard.release()
+        guard.feed("Second answer.")
+        await guard.finish()
+        return check.seen, guard.release()
+
+    seen, released = asyncio.run(run())
+    assert seen == ["First answer.", "Second answer."]
+    assert released == "Second answer."
@@ -0,0 +1,108 @@
+import pytest
+
+from topic_classifier import (
+    SEED_EXAMPLES,
+    NgramTopicModel,
+    TopicPreClassifier,
+    calibration_report,
+    lexicon_hits,
+    load_model,
+)
+from verdict_cache import normalize_text
+
+
+class FixedModel:
+    """Stand-in model that scores every message the same."""
+
+    def __init__(self, probability: float):
+        self.probability = probability
+
+    def predict_proba(self, normalized: str) -> float:
+        return self.probability
+
+
+def classifier(probability: float) -> TopicPreClassifier:
+    return TopicPreClassifier(
+        FixedModel(probability), on_threshold=0.85, off_threshold=0.1, lexicon_threshold=0.7
+    )
+
+
+@pytest.fixture(scope="module")
+def seed_classifier():
+    return TopicPreClassifier(load_model(""))
+
+
+def test_small_talk_matches_whole_messages_only():
+    assert lexicon_hits(normalize_text("Hello!")) == (["small_talk"], 0)
+    assert lexicon_hits(normalize_text("Hello, explain quantum physics")) == ([], 0)
+    assert lexicon_hits(normalize_text("Hi, write a story about dragons")) == ([], 0)
+
+
+def test_lexicon_hit_needs_model_agreement():
+    # "refund" is support vocabulary, but the model decides whether that is enough
+    assert classifier(0.75).classify("I want a refund").source == "lexicon"
+    assert not classifier(0.75).classify("I want a refund").off_topic
+    assert not classifier(0.5).classify("I want a refund").confident
+
+
+def test_lexicon_hit_never_blocks_locally():
+    # Keywords and model disagree: the LLM decides
+    verdict = classifier(0.05).classify("I want a refund")
+    assert not verdict.confident
+    assert classifier(0.05).classify("Tell me something").off_topic
+
+
+def test_off_topic_terms_cancel_lexicon_hit():
+    verdict = classifier(0.75).classify("Refund me for the joke")
+    assert not verdict.confident
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Hello, explain quantum physics to me",
+        "Hi, write a story about dragons",
+        "What is the best app to learn French?",
+        "How do I return a serve in tennis?",
+    ],
+)
+def test_off_topic_requests_with_support_words_do_not_pass(seed_classifier, text):
+    verdict = seed_classifier.classify(text)
+    assert verdict.off_topic is not False, verdict
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "I was charged twice for my subscription",
+        "Where is my order?",
+        "Hello",
+        "비밀번호를 잊어버렸어요",
+    ],
+)
+def test_support_requests_pass_locally(seed_classifier, text):
+    verdict = seed_classifier.classify(text)
+    assert verdict.off_topic is False, verdict
+
+
+def test_thresholds_must_be_ordered():
+    model = FixedModel(0.5)
+    with pytest.raises(ValueError):
+        TopicPreClassifier(model, on_threshold=0.8, off_threshold=0.1, lexicon_threshold=0.9)
+    with pytest.raises(ValueError):
+        TopicPreClassifier(model, on_threshold=0.8, off_threshold=0.3, lexicon_threshold=0.2)
+
+
+def test_calibration_report_matches_classifier(seed_classifier):
+    report = calibration_report(seed_classifier.model, list(SEED_EXAMPLES))
+    decided = sum(seed_classifier.classify(text).confident for text, _ in SEED_EXAMPLES)
+    assert report["current"]["coverage"] == pytest.approx(decided / len(SEED_EXAMPLES))
+
+
+def test_model_round_trips_through_json(tmp_path):
+    model = NgramTopicModel(buckets=2**12).fit(SEED_EXAMPLES, epochs=5)
+    path = tmp_path / "model.json"
+    model.save(path)
+    loaded = NgramTopicModel.load(path)
+    text = normalize_text("Where is my parcel?")
+    assert loaded.predict_proba(text) == pytest.approx(model.predict_proba(text))
@@ -0,0 +1,88 @@
+import pytest
+
+from models import InputGuardRailOutput
+from verdict_cache import VerdictCache, has_history, latest_user_text
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+ON_TOPIC = InputGuardRailOutput(is_off_topic=False, reason="")
+OFF_TOPIC = InputGuardRailOutput(is_off_topic=True, reason="weather")
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def test_hits_match_normalized_text(clock):
+    cache = VerdictCache(InputGuardRailOutput, ttl_seconds=60, clock=clock)
+    cache.put("Where is my order?", ON_TOPIC)
+    assert cache.get("  where IS my   order!!") == ON_TOPIC
+    assert cache.get("where is my refund") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = VerdictCache(InputGuardRailOutput, ttl_seconds=60, clock=clock)
+    cache.put("hi", ON_TOPIC)
+    clock.now += 59
+    assert cache.get("hi") == ON_TOPIC
+    clock.now += 1
+    assert cache.get("hi") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = VerdictCache(InputGuardRailOutput, max_entries=2, clock=clock)
+    cache.put("a", ON_TOPIC)
+    cache.put("b", ON_TOPIC)
+    cache.get("a")
+    cache.put("c", OFF_TOPIC)
+    assert cache.get("b") is None
+    assert cache.get("a") == ON_TOPIC
+    assert cache.get("c") == OFF_TOPIC
+    assert cache.stats()["evictions"] == 1
+
+
+def test_namespaces_do_not_share_verdicts(tmp_path, clock):
+    path = tmp_path / "verdicts.db"
+    old = VerdictCache(InputGuardRailOutput, namespace="v1", db_path=path, clock=clock)
+    old.put("tell me a joke", OFF_TOPIC)
+    new = VerdictCache(InputGuardRailOutput, namespace="v2", db_path=path, clock=clock)
+    assert new.get("tell me a joke") is None
+    old.close()
+    new.close()
+
+
+def test_disk_tier_survives_restart(tmp_path, clock):
+    path = tmp_path / "verdicts.db"
+    first = VerdictCache(InputGuardRailOutput, ttl_seconds=60, db_path=path, clock=clock)
+    first.put("tell me a joke", OFF_TOPIC)
+    first.close()
+
+    second = VerdictCache(InputGuardRailOutput, ttl_seconds=60, db_path=path, clock=clock)
+    assert second.get("tell me a joke") == OFF_TOPIC
+    assert second.stats()["disk_hits"] == 1
+    clock.now += 61
+    assert second.get("tell me a joke") is None
+    second.close()
+
+
+def test_guardrail_input_helpers():
+    history = [
+        {"role": "user", "content": "Which plan am I on?"},
+        {"role": "assistant", "content": "Basic. Want to upgrade?"},
+        {"role": "user", "content": [{"type": "input_text", "text": "yes"}]},
+    ]
+    assert latest_user_text(history) == "yes"
+    assert has_history(history)
+    assert not has_history(history[-1:])
+    assert not has_history("yes")
@@ -0,0 +1,130 @@
+import pytest
+
+from session_store import PendingWrite, WriteBehindQueue
+
+
+class FlakyWriter:
+    """write_batch stand-in that fails a customer's writes a set number of times."""
+
+    def __init__(self, failures: dict[int, int] | None = None):
+        self.failures = dict(failures or {})
+        self.batches: list[list[tuple[int, list[str]]]] = []
+        self.written: list[tuple[int, list[str]]] = []
+
+    def __call__(self, batch: list[PendingWrite]) -> list[PendingWrite]:
+        self.batches.append([(entry.customer_id, entry.rows) for entry in batch])
+        failed = []
+        for entry in batch:
+            if self.failures.get(entry.customer_id, 0) > 0:
+                self.failures[entry.customer_id] -= 1
+                failed.append(entry)
+            else:
+                self.written.append((entry.customer_id, entry.rows))
+        return failed
+
+
+@pytest.fixture
+def make_queue():
+    queues = []
+
+    def make(writer, max_attempts=3):
+        # A long interval keeps the background thread out of the way; tests flush by hand
+        queue = WriteBehindQueue(
+            writer, max_items=1000, flush_interval=3600, max_attempts=max_attempts
+        )
+        queues.append(queue)
+        return queue
+
+    yield make
+    for queue in queues:
+        queue.close()
+
+
+def item(text):
+    return {"role": "user", "content": text}
+
+
+def test_flush_groups_pending_writes(make_queue):
+    writer = FlakyWriter()
+    queue = make_queue(writer)
+    queue.enqueue(1, "s", [item("a"), item("b")])
+    queue.enqueue(2, "s", [item("c")])
+    assert queue.has_pending(1, "s")
+
+    queue.flush()
+
+    assert len(writer.batches) == 1
+    assert [customer for customer, _ in writer.written] == [1, 2]
+    assert (queue.flushes, queue.flushed_items, queue.failed_flushes) == (1, 3, 0)
+    assert not queue.has_pending(1, "s")
+
+
+def test_failed_writes_retry_ahead_of_newer_ones(make_queue):
+    writer = FlakyWriter({1: 1})
+    queue = make_queue(writer)
+    queue.enqueue(1, "s", [item("first")])
+    queue.enqueue(2, "s", [item("other")])
+
+    queue.flush()
+    # Only the failed customer's write is queued again
+    assert queue.has_pending(1, "s")
+    assert not queue.has_pending(2, "s")
+    assert queue.flushed_items == 1
+
+    queue.enqueue(1, "s", [item("second")])
+    queue.flush()
+
+    customer_1 = [rows for customer, rows in writer.written if customer == 1]
+    assert customer_1 == [
+        ['{"role": "user", "content": "first"}'],
+        ['{"role": "user", "content": "second"}'],
+    ]
+    assert queue.failed_flushes == 1
+    assert queue.dead_lettered == 0
+
+
+def test_write_is_dead_lettered_after_max_attempts(make_queue):
+    writer = FlakyWriter({1: 10})
+    queue = make_queue(writer, max_attempts=2)
+    queue.enqueue(1, "s", [item("lost")])
+
+    queue.flush()
+    assert queue.has_pending(1, "s")
+    queue.flush()
+
+    assert not queue.has_pending(1, "s")
+    assert queue.dead_lettered == 1
+    (entry,) = queue.dead_letters
+    assert (entry.customer_id, entry.attempts) == (1, 2)
+
+    # Later writes for the conversation are not blocked by the dropped one
+    writer.failures[1] = 0
+    queue.enqueue(1, "s", [item("next")])
+    queue.flush()
+    assert writer.written == [(1, ['{"role": "user", "content": "next"}'])]
+
+
+def test_flush_for_raises_while_writes_are_stuck(make_queue):
+    queue = make_queue(FlakyWriter({1: 10}), max_attempts=5)
+    queue.enqueue(1, "s", [item("a")])
+    with pytest.raises(RuntimeError):
+        queue.flush_for(1, "s")
+    # Another conversation has nothing pending and reads straight through
+    queue.flush_for(2, "s")
+
+
+def test_enqueue_rejects_unserializable_items(make_queue):
+    queue = make_queue(FlakyWriter())
+    with pytest.raises(TypeError):
+        queue.enqueue(1, "s", [{"role": "user", "content": object()}])
+    assert not queue.has_pending(1, "s")
+
+
+def test_close_flushes_what_is_left(make_queue):
+    writer = FlakyWriter({1: 1})
+    queue = make_queue(writer)
+    queue.enqueue(1, "s", [item("a")])
+    queue.close()
+    assert writer.written == [(1, ['{"role": "user", "content": "a"}'])]
+    with pytest.raises(RuntimeError):
+        queue.enqueue(1, "s", [item("b")])
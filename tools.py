@@ -5,14 +5,15 @@ This module provides function tools for technical support, billing,
 order management, and account management operations.
 """
 
-import streamlit as st
 from agents import function_tool, AgentHooks, Agent, Tool, RunContextWrapper
-from models import UserAccountContext
+from models import AgentHookEvent, UserAccountContext
 import random
+import time
 from datetime import datetime, timedelta
 import config
 import constants
-from logging_config import get_logger
+from event_bus import get_event_bus
+from logging_config import current_turn, get_logger
 
 logger = get_logger(__name__)
 
@@ -120,8 +121,11 @@ def escalate_to_engineering(
     )
 
     logger.info(
-        f"Engineering escalation created - Customer: {context.customer_id}, "
-        f"Ticket: {ticket_id}, Priority: {priority}, Issue: {issue_summary[:50]}..."
+        "Engineering escalation created - Customer: %s, Ticket: %s, Priority: %s, Issue: %s...",
+        context.customer_id,
+        ticket_id,
+        priority,
+        issue_summary[:50],
     )
 
     return f"""
@@ -169,16 +173,17 @@ def process_refund_request(
     """
     # Input validation
     if refund_amount <= 0:
-        logger.warning(f"Refund validation failed: amount <= 0 for customer {context.customer_id}")
+        logger.warning("Refund validation failed: amount <= 0 for customer %s", context.customer_id)
         return constants.ERROR_REFUND_AMOUNT_ZERO
     if refund_amount > config.MAX_REFUND_AMOUNT:
         logger.warning(
-            f"Refund validation failed: amount ${refund_amount} exceeds max "
-            f"for customer {context.customer_id}"
+            "Refund validation failed: amount $%s exceeds max for customer %s",
+            refund_amount,
+            context.customer_id,
         )
         return constants.ERROR_REFUND_AMOUNT_MAX
     if not reason or not reason.strip():
-        logger.warning(f"Refund validation failed: no reason for customer {context.customer_id}")
+        logger.warning("Refund validation failed: no reason for customer %s", context.customer_id)
         return constants.ERROR_REFUND_REASON_REQUIRED
 
     processing_days = (
@@ -189,8 +194,11 @@ def process_refund_request(
     refund_id = f"REF-{random.randint(constants.REFUND_ID_MIN, constants.REFUND_ID_MAX)}"
 
     logger.info(
-        f"Refund processed - Customer: {context.customer_id}, "
-        f"Refund ID: {refund_id}, Amount: ${refund_amount}, Reason: {reason[:30]}..."
+        "Refund processed - Customer: %s, Refund ID: %s, Amount: $%s, Reason: %s...",
+        context.customer_id,
+        refund_id,
+        refund_amount,
+        reason[:30],
     )
 
     return f"""
@@ -442,8 +450,10 @@ def deactivate_account(
         feedback: Optional feedback from customer
     """
     logger.warning(
-        f"Account deactivation initiated - Customer: {context.customer_id}, "
-        f"Reason: {reason}, Feedback: {feedback[:30] if feedback else 'None'}..."
+        "Account deactivation initiated - Customer: %s, Reason: %s, Feedback: %s...",
+        context.customer_id,
+        reason,
+        feedback[:30] if feedback else "None",
     )
 
     return f"""
@@ -477,8 +487,34 @@ def export_account_data(context: UserAccountContext, data_types: str) -> str:
     """.strip()
 
 
+def _publish(
+    context: RunContextWrapper[UserAccountContext],
+    type: str,
+    agent: Agent[UserAccountContext],
+    **kwargs,
+) -> None:
+    # Sinks run on their own threads, so carry the turn over explicitly
+    turn = current_turn()
+    get_event_bus().publish(
+        AgentHookEvent(
+            type=type,
+            customer_id=context.context.customer_id,
+            agent_name=agent.name,
+            timestamp=time.time(),
+            turn_id=turn.turn_id if turn is not None else None,
+            turn_elapsed_ms=turn.elapsed_ms() if turn is not None else None,
+            **kwargs,
+        )
+    )
+
+
 class AgentToolUsageLoggingHooks(AgentHooks):
-    """Custom hooks for logging and displaying agent tool usage in Streamlit."""
+    """
+    Publishes agent and tool lifecycle events to the event bus.
+
+    Hooks run inside the agent loop, so they only enqueue; logging, metrics
+    and Streamlit rendering happen in the bus sinks (see event_bus.py).
+    """
 
     async def on_tool_start(
         self,
@@ -486,9 +522,7 @@ class AgentToolUsageLoggingHooks(AgentHooks):
         agent: Agent[UserAccountContext],
         tool: Tool,
     ):
-        logger.debug(f"Agent '{agent.name}' starting tool: {tool.name}")
-        with st.sidebar:
-            st.write(f"🔧 **{agent.name}** starting tool: `{tool.name}`")
+        _publish(context, "tool_started", agent, tool=tool.name)
 
     async def on_tool_end(
         self,
@@ -497,10 +531,13 @@ class AgentToolUsageLoggingHooks(AgentHooks):
         tool: Tool,
         result: str,
     ):
-        logger.debug(f"Agent '{agent.name}' completed tool: {tool.name}")
-        with st.sidebar:
-            st.write(f"🔧 **{agent.name}** used tool: `{tool.name}`")
-            st.code(result)
+        _publish(
+            context,
+            "tool_finished",
+            agent,
+            tool=tool.name,
+            detail=str(result)[: config.EVENT_DETAIL_MAX_CHARS],
+        )
 
     async def on_handoff(
         self,
@@ -508,18 +545,14 @@ class AgentToolUsageLoggingHooks(AgentHooks):
         agent: Agent[UserAccountContext],
         source: Agent[UserAccountContext],
     ):
-        logger.info(f"Agent handoff in hook: {source.name} -> {agent.name}")
-        with st.sidebar:
-            st.write(f"🔄 Handoff: **{source.name}** → **{agent.name}**")
+        _publish(context, "handoff", agent, source_agent=source.name)
 
     async def on_start(
         self,
         context: RunContextWrapper[UserAccountContext],
         agent: Agent[UserAccountContext],
     ):
-        logger.info(f"Agent '{agent.name}' activated for customer {context.context.customer_id}")
-        with st.sidebar:
-            st.write(f"🚀 **{agent.name}** activated")
+        _publish(context, "agent_started", agent)
 
     async def on_end(
         self,
@@ -527,6 +560,4 @@ class AgentToolUsageLoggingHooks(AgentHooks):
         agent: Agent[UserAccountContext],
         output,
     ):
-        logger.info(f"Agent '{agent.name}' completed for customer {context.context.customer_id}")
-        with st.sidebar:
-            st.write(f"🏁 **{agent.name}** completed")
\ No newline at end of file
+        _publish(context, "agent_finished", agent)
@@ -0,0 +1,474 @@
+"""
+Local off-topic pre-classifier.
+
+Runs before the LLM input guardrail and answers the easy cases locally:
+
+1. Keyword lexicons: a message that mentions support vocabulary ("refund",
+   "password", "tracking number", "환불", "contraseña", "注文" ...) and no
+   off-topic vocabulary is on-topic once the model's probability is at
+   least `lexicon_threshold`; support words also appear in off-topic
+   requests ("the best app to learn French"), so a hit alone is not enough.
+2. A small logistic regression over hashed character n-grams (plus lexicon
+   hit features) scores everything else. Character n-grams work across the
+   languages customers write in without a tokenizer.
+
+If the model's on-topic probability is at least `on_threshold`, or at most
+`off_threshold`, the verdict is final; anything in between is escalated to
+the LLM guardrail. The model trains in milliseconds on the built-in seed
+examples, or can be trained on labeled data and saved to JSON.
+
+CLI:
+    python topic_classifier.py train labeled.jsonl --out topic_model.json
+    python topic_classifier.py calibrate labeled.jsonl --model topic_model.json
+
+Labeled JSONL lines look like {"text": "Where is my parcel?", "off_topic": false}.
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import sys
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+import config
+from logging_config import get_logger
+from verdict_cache import normalize_text
+
+logger = get_logger(__name__)
+
+# =============================================================================
+# LEXICONS AND SEED DATA
+# =============================================================================
+
+ON_TOPIC_LEXICON: dict[str, tuple[str, ...]] = {
+    "billing": (
+        "refund", "charge", "charged", "invoice", "billing", "payment", "subscription",
+        "credit card", "receipt", "환불", "결제", "청구", "구독", "reembolso", "cobro",
+        "factura", "suscripción", "pago", "返金", "請求", "支払い", "サブスク",
+    ),
+    "order": (
+        "order", "tracking number", "shipping", "delivery", "package", "parcel", "return",
+        "주문", "배송", "반품", "택배", "pedido", "envío", "entrega", "devolución",
+        "注文", "配送", "返品", "荷物",
+    ),
+    "account": (
+        "password", "log in", "login", "sign in", "account", "two-factor", "2fa",
+        "username", "비밀번호", "로그인", "계정", "contraseña", "cuenta", "iniciar sesión",
+        "パスワード", "ログイン", "アカウント",
+    ),
+    "technical": (
+        "error", "crash", "bug", "not working", "won't load", "install", "update",
+        "app", "오류", "에러", "앱", "설치", "falla", "aplicación", "no funciona",
+        "エラー", "アプリ", "不具合",
+    ),
+    "small_talk": (
+        "hello", "hi", "hey", "thanks", "thank you", "good morning", "안녕하세요",
+        "감사합니다", "hola", "gracias", "こんにちは", "ありがとう",
+    ),
+}
+
+OFF_TOPIC_LEXICON: tuple[str, ...] = (
+    "weather", "recipe", "poem", "joke", "movie", "song", "lyrics", "homework",
+    "essay", "capital of", "president", "football", "soccer", "stock price",
+    "bitcoin", "horoscope", "날씨", "레시피", "농담", "숙제", "clima", "receta",
+    "chiste", "tarea", "天気", "レシピ", "冗談", "宿題",
+)
+
+# Words from the small_talk lexicon match whole messages only ("hi" inside "this" is not a greeting)
+_WHOLE_MESSAGE_CATEGORIES = ("small_talk",)
+
+
+def term_pattern(terms: Iterable[str]) -> re.Pattern:
+    # Latin-script terms match whole words ("app" not in "happy"); CJK terms match anywhere
+    parts = [rf"\b{re.escape(term)}\b" if term.isascii() else re.escape(term) for term in terms]
+    return re.compile("|".join(parts))
+
+
+_ON_TOPIC_PATTERNS: dict[str, re.Pattern] = {
+    category: term_pattern(terms)
+    for category, terms in ON_TOPIC_LEXICON.items()
+    if category not in _WHOLE_MESSAGE_CATEGORIES
+}
+_OFF_TOPIC_PATTERN = term_pattern(OFF_TOPIC_LEXICON)
+_WHOLE_MESSAGE_TERMS: dict[str, frozenset[str]] = {
+    category: frozenset(ON_TOPIC_LEXICON[category]) for category in _WHOLE_MESSAGE_CATEGORIES
+}
+
+SEED_EXAMPLES: tuple[tuple[str, bool], ...] = (
+    # (text, off_topic)
+    ("I was charged twice for my subscription", False),
+    ("Can I get a refund for last month?", False),
+    ("My credit card payment failed", False),
+    ("Please send me my latest invoice", False),
+    ("How do I cancel my plan?", False),
+    ("Where is my order?", False),
+    ("My package never arrived", False),
+    ("Can you give me the tracking number for order 12345", False),
+    ("I want to return a damaged item", False),
+    ("The delivery is late", False),
+    ("I forgot my password", False),
+    ("I can't log in to my account", False),
+    ("How do I change my email address?", False),
+    ("Please enable two-factor authentication", False),
+    ("Delete my account and export my data", False),
+    ("The app keeps crashing when I open it", False),
+    ("I get an error message when uploading", False),
+    ("The website won't load", False),
+    ("How do I set up the integration?", False),
+    ("The sync feature is not working", False),
+    ("Hello", False),
+    ("Hi there, I need some help", False),
+    ("Thanks for your help!", False),
+    ("환불 받고 싶어요", False),
+    ("주문한 상품이 아직 안 왔어요", False),
+    ("비밀번호를 잊어버렸어요", False),
+    ("앱이 계속 꺼져요", False),
+    ("결제가 두 번 됐어요", False),
+    ("Quiero un reembolso", False),
+    ("¿Dónde está mi pedido?", False),
+    ("Olvidé mi contraseña", False),
+    ("La aplicación no funciona", False),
+    ("Me cobraron dos veces", False),
+    ("返金をお願いします", False),
+    ("注文した商品が届きません", False),
+    ("パスワードを忘れました", False),
+    ("アプリがエラーで起動しません", False),
+    ("What's the weather like today?", True),
+    ("Tell me a joke", True),
+    ("Write me a poem about the sea", True),
+    ("Give me a recipe for lasagna", True),
+    ("Who won the football game last night?", True),
+    ("What is the capital of France?", True),
+    ("Can you help with my math homework?", True),
+    ("Write an essay about climate change", True),
+    ("What's the bitcoin price today?", True),
+    ("Recommend a good movie", True),
+    ("Who is the president of the United States?", True),
+    ("Translate this sentence into German for my class", True),
+    ("What's my horoscope for today?", True),
+    ("Explain quantum physics to me", True),
+    # Support words in requests that are not about the customer's account or orders
+    ("Which app is best for learning Spanish?", True),
+    ("How do I get better at returning a tennis ball?", True),
+    ("Write a story about a dragon who loses his password", True),
+    ("Hi, can you explain how black holes work?", True),
+    ("Hello, tell me about the history of Rome", True),
+    ("오늘 날씨 어때요?", True),
+    ("재미있는 농담 해줘", True),
+    ("김치찌개 레시피 알려줘", True),
+    ("¿Qué tiempo hace hoy?", True),
+    ("Cuéntame un chiste", True),
+    ("Dame una receta de paella", True),
+    ("今日の天気は？", True),
+    ("面白い冗談を言って", True),
+    ("宿題を手伝って", True),
+)
+
+
+def lexicon_hits(normalized: str) -> tuple[list[str], int]:
+    """
+    Match a normalized message against the lexicons.
+
+    Returns:
+        (on-topic categories hit, number of off-topic terms hit)
+    """
+    on_topic = [
+        category for category, pattern in _ON_TOPIC_PATTERNS.items() if pattern.search(normalized)
+    ]
+    greeting = normalized.strip(" ,!.?¿¡")
+    for category, terms in _WHOLE_MESSAGE_TERMS.items():
+        if greeting in terms:
+            on_topic.append(category)
+    off_topic = len(_OFF_TOPIC_PATTERN.findall(normalized))
+    return on_topic, off_topic
+
+
+# =============================================================================
+# N-GRAM MODEL
+# =============================================================================
+
+
+def _bucket(feature: str, buckets: int) -> int:
+    # crc32 is stable across processes, unlike hash()
+    return zlib.crc32(feature.encode("utf-8")) % buckets
+
+
+class NgramTopicModel:
+    """Logistic regression over hashed character n-grams; predicts P(on-topic)."""
+
+    def __init__(self, buckets: int = 2**18, ngram_range: tuple[int, int] = (2, 4)):
+        self.buckets = buckets
+        self.ngram_range = ngram_range
+        self.weights: dict[int, float] = {}
+        self.bias = 0.0
+
+    def features(self, normalized: str) -> list[int]:
+        padded = f" {normalized} "
+        low, high = self.ngram_range
+        features = [
+            _bucket(padded[i : i + n], self.buckets)
+            for n in range(low, high + 1)
+            for i in range(len(padded) - n + 1)
+        ]
+        on_topic, off_topic = lexicon_hits(normalized)
+        features.extend(_bucket(f"lex:on:{category}", self.buckets) for category in on_topic)
+        features.extend([_bucket("lex:off", self.buckets)] * off_topic)
+        return features
+
+    def predict_proba(self, normalized: str) -> float:
+        features = self.features(normalized)
+        if not features:
+            return 0.5
+        # Average so long messages do not saturate the sigmoid
+        score = self.bias + sum(self.weights.get(f, 0.0) for f in features) / math.sqrt(len(features))
+        return 1.0 / (1.0 + math.exp(-max(-30.0, min(30.0, score))))
+
+    def fit(
+        self,
+        examples: Iterable[tuple[str, bool]],
+        epochs: int = 40,
+        learning_rate: float = 0.5,
+        l2: float = 1e-4,
+        seed: int = 0,
+    ) -> "NgramTopicModel":
+        """Train with SGD on (text, off_topic) pairs."""
+        data = [(self.features(normalize_text(text)), 0.0 if off else 1.0) for text, off in examples]
+        rng = random.Random(seed)
+        for _ in range(epochs):
+            rng.shuffle(data)
+            for features, label in data:
+                if not features:
+                    continue
+                scale = 1.0 / math.sqrt(len(features))
+                score = self.bias + sum(self.weights.get(f, 0.0) for f in features) * scale
+                predicted = 1.0 / (1.0 + math.exp(-max(-30.0, min(30.0, score))))
+                gradient = predicted - label
+                self.bias -= learning_rate * gradient
+                for f in features:
+                    weight = self.weights.get(f, 0.0)
+                    self.weights[f] = weight - learning_rate * (gradient * scale + l2 * weight)
+        return self
+
+    def to_dict(self) -> dict:
+        return {
+            "buckets": self.buckets,
+            "ngram_range": list(self.ngram_range),
+            "bias": self.bias,
+            "weights": {str(k): round(v, 6) for k, v in self.weights.items() if abs(v) > 1e-6},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "NgramTopicModel":
+        model = cls(buckets=data["buckets"], ngram_range=tuple(data["ngram_range"]))
+        model.bias = data["bias"]
+        model.weights = {int(k): v for k, v in data["weights"].items()}
+        return model
+
+    def save(self, path: str | Path) -> None:
+        Path(path).write_text(json.dumps(self.to_dict()), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: str | Path) -> "NgramTopicModel":
+        return cls.from_dict(json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+# =============================================================================
+# CLASSIFIER
+# =============================================================================
+
+
+@dataclass(frozen=True)
+class TopicVerdict:
+    """Local classification result; `off_topic` is None when the LLM must decide."""
+
+    off_topic: Optional[bool]
+    on_topic_probability: float
+    source: str  # lexicon, model, or uncertain
+
+    @property
+    def confident(self) -> bool:
+        return self.off_topic is not None
+
+
+class TopicPreClassifier:
+    """Lexicons plus n-gram model with escalation thresholds."""
+
+    def __init__(
+        self,
+        model: NgramTopicModel,
+        on_threshold: float = config.TOPIC_ON_TOPIC_THRESHOLD,
+        off_threshold: float = config.TOPIC_OFF_TOPIC_THRESHOLD,
+        lexicon_threshold: float = config.TOPIC_LEXICON_THRESHOLD,
+    ):
+        if not 0.0 <= off_threshold < lexicon_threshold <= on_threshold <= 1.0:
+            raise ValueError(
+                "Thresholds must satisfy 0 <= off_threshold < lexicon_threshold <= on_threshold <= 1"
+            )
+        self.model = model
+        self.on_threshold = on_threshold
+        self.off_threshold = off_threshold
+        self.lexicon_threshold = lexicon_threshold
+        self.lexicon_decisions = 0
+        self.model_decisions = 0
+        self.escalations = 0
+
+    def classify(self, text: str) -> TopicVerdict:
+        normalized = normalize_text(text)
+        on_topic, off_topic = lexicon_hits(normalized)
+        probability = self.model.predict_proba(normalized)
+
+        lexicon_on = bool(on_topic) and not off_topic
+        if lexicon_on and probability >= self.lexicon_threshold:
+            self.lexicon_decisions += 1
+            return TopicVerdict(False, probability, "lexicon")
+        if probability >= self.on_threshold:
+            self.model_decisions += 1
+            return TopicVerdict(False, probability, "model")
+        # A lexicon hit the model scores as off-topic is a disagreement; let the LLM decide
+        if probability <= self.off_threshold and not lexicon_on:
+            self.model_decisions += 1
+            return TopicVerdict(True, probability, "model")
+        self.escalations += 1
+        return TopicVerdict(None, probability, "uncertain")
+
+    def stats(self) -> dict[str, float]:
+        total = self.lexicon_decisions + self.model_decisions + self.escalations
+        return {
+            "lexicon_decisions": self.lexicon_decisions,
+            "model_decisions": self.model_decisions,
+            "escalations": self.escalations,
+            "local_rate": (total - self.escalations) / total if total else 0.0,
+        }
+
+
+def load_model(path: str = config.TOPIC_CLASSIFIER_MODEL) -> NgramTopicModel:
+    """Load a saved model, or train one on the seed examples."""
+    if path and Path(path).exists():
+        logger.info("Loading topic classifier model from %s", path)
+        return NgramTopicModel.load(path)
+    if path:
+        logger.warning("Topic classifier model %s not found; training on seed examples", path)
+    return NgramTopicModel().fit(SEED_EXAMPLES)
+
+
+def read_labeled(path: str | Path) -> list[tuple[str, bool]]:
+    """Read {"text", "off_topic"} JSONL examples."""
+    examples = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                examples.append((record["text"], bool(record["off_topic"])))
+    return examples
+
+
+# =============================================================================
+# CALIBRATION
+# =============================================================================
+
+
+def calibration_report(
+    model: NgramTopicModel,
+    examples: list[tuple[str, bool]],
+    on_threshold: float = config.TOPIC_ON_TOPIC_THRESHOLD,
+    off_threshold: float = config.TOPIC_OFF_TOPIC_THRESHOLD,
+    lexicon_threshold: float = config.TOPIC_LEXICON_THRESHOLD,
+    bins: int = 10,
+) -> dict:
+    """
+    Measure how well the classifier's probabilities and thresholds hold up.
+
+    Reports reliability bins (predicted vs. observed on-topic rate), the
+    coverage and error rates at the given thresholds, and a sweep of other
+    threshold pairs. A false block is an on-topic message classified
+    off-topic locally; a false pass is the reverse.
+    """
+    scored = []
+    for text, off_topic in examples:
+        normalized = normalize_text(text)
+        on_hits, off_hits = lexicon_hits(normalized)
+        scored.append((model.predict_proba(normalized), bool(on_hits and not off_hits), off_topic))
+
+    reliability = []
+    for index in range(bins):
+        low, high = index / bins, (index + 1) / bins
+        members = [
+            (p, off) for p, _, off in scored if low <= p < high or (index == bins - 1 and p == 1.0)
+        ]
+        if members:
+            reliability.append(
+                {
+                    "range": [low, high],
+                    "count": len(members),
+                    "mean_predicted_on_topic": sum(p for p, _ in members) / len(members),
+                    "observed_on_topic": sum(1 for _, off in members if not off) / len(members),
+                }
+            )
+
+    def evaluate(on_t: float, off_t: float) -> dict:
+        decided = false_blocks = false_passes = 0
+        for probability, lexicon_on, off_topic in scored:
+            if (lexicon_on and probability >= min(lexicon_threshold, on_t)) or probability >= on_t:
+                decided += 1
+                false_passes += off_topic
+            elif probability <= off_t and not lexicon_on:
+                decided += 1
+                false_blocks += not off_topic
+        total = len(scored)
+        return {
+            "on_threshold": on_t,
+            "off_threshold": off_t,
+            "coverage": decided / total if total else 0.0,
+            "local_accuracy": (decided - false_blocks - false_passes) / decided if decided else 0.0,
+            "false_blocks": false_blocks,
+            "false_passes": false_passes,
+        }
+
+    sweep = [
+        evaluate(on_t, off_t)
+        for on_t in (0.7, 0.8, 0.85, 0.9, 0.95)
+        for off_t in (0.02, 0.05, 0.1, 0.2)
+    ]
+    return {
+        "examples": len(scored),
+        "current": evaluate(on_threshold, off_threshold),
+        "reliability": reliability,
+        "threshold_sweep": sweep,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train and calibrate the off-topic pre-classifier")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    train_parser = subparsers.add_parser("train", help="Train a model on labeled JSONL")
+    train_parser.add_argument("examples", help="JSONL of {text, off_topic} records")
+    train_parser.add_argument("--out", required=True, help="Where to save the model JSON")
+    train_parser.add_argument(
+        "--include-seed", action="store_true", help="Also train on the built-in seed examples"
+    )
+    train_parser.add_argument("--epochs", type=int, default=40)
+
+    calibrate_parser = subparsers.add_parser("calibrate", help="Report calibration on labeled JSONL")
+    calibrate_parser.add_argument("examples", help="JSONL of {text, off_topic} records")
+    calibrate_parser.add_argument("--model", default=config.TOPIC_CLASSIFIER_MODEL, help="Model JSON")
+
+    args = parser.parse_args()
+    examples = read_labeled(args.examples)
+    if args.command == "train":
+        if args.include_seed:
+            examples.extend(SEED_EXAMPLES)
+        NgramTopicModel().fit(examples, epochs=args.epochs).save(args.out)
+        print(f"Trained on {len(examples)} examples; saved model to {args.out}")
+    elif args.command == "calibrate":
+        report = calibration_report(load_model(args.model), examples)
+        sys.stdout.write(json.dumps(report, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
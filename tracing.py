@@ -0,0 +1,472 @@
+"""
+Turn tracing exported as OTLP JSON.
+
+Every user turn runs in one Agents SDK trace (see ConversationService). The
+SDK records agent, model response, tool, handoff and guardrail spans; the app
+adds session read/write, intent routing and output-check spans. Guardrail LLM
+runs nest under their guardrail span, so a slow turn shows where its time
+went.
+
+OtlpFileExporter is a TracingProcessor that turns each finished trace into an
+OTLP/JSON ExportTraceServiceRequest and appends it as one line to TRACE_FILE.
+The format matches the OpenTelemetry Collector file exporter, so the file can
+be replayed into any OTLP backend. The SDK trace becomes a root span named
+after the workflow, carrying the turn's metadata (turn ID, customer, tier,
+outcome). Only names, timings, token counts and sizes are exported, never
+message or tool contents.
+
+Sampling is decided when a trace ends. A trace is kept if it errored, if it
+took at least TRACE_KEEP_SLOWER_THAN_MS, or if its trace ID falls within
+TRACE_SAMPLE_RATE. Lines are written on a background thread; when its queue
+is full, traces are dropped and counted.
+
+Print the critical path of the slowest turns in a trace file:
+    python tracing.py logs/traces.jsonl --slowest 5
+"""
+
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional, TextIO
+
+from agents import add_trace_processor, custom_span, get_current_trace, set_trace_processors
+from agents.tracing import CustomSpanData, Span, Trace, TracingProcessor
+
+import config
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+SERVICE_NAME = "customer-support-agent"
+
+# OTLP span kind and status codes
+_KIND_INTERNAL = 1
+_STATUS_UNSET = 0
+_STATUS_ERROR = 2
+
+# Tell the writer thread to exit
+_STOP = object()
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    # bool first: it is also an int
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: dict[str, Any]) -> list[dict[str, Any]]:
+    return [
+        {"key": key, "value": _otlp_value(value)}
+        for key, value in attributes.items()
+        if value is not None
+    ]
+
+
+def _unix_nano(iso_time: Optional[str]) -> int:
+    if not iso_time:
+        return 0
+    moment = datetime.fromisoformat(iso_time)
+    return int(moment.timestamp()) * 1_000_000_000 + moment.microsecond * 1000
+
+
+def _trace_hex(trace_id: str) -> str:
+    # SDK IDs look like "trace_<32 hex>"
+    return trace_id.removeprefix("trace_").rjust(32, "0")[-32:]
+
+
+def _span_hex(span_id: str) -> str:
+    # SDK IDs look like "span_<24 hex>"; OTLP span IDs have 16
+    return span_id.removeprefix("span_")[:16].rjust(16, "0")
+
+
+def _usage_attributes(usage: Any) -> dict[str, Any]:
+    if usage is None:
+        return {}
+    if isinstance(usage, dict):
+        return {
+            "gen_ai.usage.input_tokens": usage.get("input_tokens"),
+            "gen_ai.usage.output_tokens": usage.get("output_tokens"),
+        }
+    return {
+        "gen_ai.usage.input_tokens": usage.input_tokens,
+        "gen_ai.usage.output_tokens": usage.output_tokens,
+    }
+
+
+def describe_span(span: Span[Any]) -> tuple[str, dict[str, Any]]:
+    """Return the OTLP name and attributes for an SDK span (no message or tool contents)."""
+    data = span.span_data
+    if data.type == "agent":
+        return f"agent {data.name}", {
+            "agent.name": data.name,
+            "agent.handoffs": ",".join(data.handoffs or []),
+            "agent.tools": ",".join(data.tools or []),
+            "agent.output_type": data.output_type,
+        }
+    if data.type == "response":
+        response = data.response
+        if response is None:
+            return "model.response", {}
+        return "model.response", {
+            "gen_ai.response.id": response.id,
+            "gen_ai.response.model": response.model,
+            **_usage_attributes(response.usage),
+        }
+    if data.type == "generation":
+        return "model.generation", {"gen_ai.request.model": data.model, **_usage_attributes(data.usage)}
+    if data.type == "function":
+        return f"tool {data.name}", {
+            "tool.name": data.name,
+            "tool.input_chars": len(data.input or ""),
+            "tool.output_chars": len(str(data.output or "")),
+        }
+    if data.type == "guardrail":
+        return f"guardrail {data.name}", {
+            "guardrail.name": data.name,
+            "guardrail.triggered": data.triggered,
+        }
+    if data.type == "handoff":
+        return f"handoff {data.from_agent} -> {data.to_agent}", {
+            "handoff.from_agent": data.from_agent,
+            "handoff.to_agent": data.to_agent,
+        }
+    if data.type == "custom":
+        return data.name, {
+            key: value
+            for key, value in (data.data or {}).items()
+            if isinstance(value, (str, int, float, bool))
+        }
+    return data.type, {}
+
+
+@dataclass
+class _PendingTrace:
+    trace: Trace
+    start_ns: int
+    root_span_id: str = field(default_factory=lambda: uuid.uuid4().hex[:16])
+    spans: list[Span[Any]] = field(default_factory=list)
+
+
+class OtlpFileExporter(TracingProcessor):
+    """Writes sampled traces to a JSON lines file of OTLP ExportTraceServiceRequests."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        sample_rate: float = config.TRACE_SAMPLE_RATE,
+        keep_slower_than_ms: float = config.TRACE_KEEP_SLOWER_THAN_MS,
+        max_pending: int = config.TRACE_QUEUE_SIZE,
+    ):
+        self.path = Path(path)
+        self.sample_rate = sample_rate
+        self.keep_slower_than_ms = keep_slower_than_ms
+        self.exported = 0
+        self.sampled_out = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._pending: dict[str, _PendingTrace] = {}
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._file: Optional[TextIO] = None
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    # -- TracingProcessor ----------------------------------------------------
+
+    def on_trace_start(self, trace: Trace) -> None:
+        with self._lock:
+            self._pending[trace.trace_id] = _PendingTrace(trace, time.time_ns())
+
+    def on_trace_end(self, trace: Trace) -> None:
+        end_ns = time.time_ns()
+        with self._lock:
+            pending = self._pending.pop(trace.trace_id, None)
+        if pending is None:
+            return
+        errored = any(span.error for span in pending.spans)
+        if not self._keep(trace.trace_id, (end_ns - pending.start_ns) / 1e6, errored):
+            self.sampled_out += 1
+            return
+        try:
+            # Converted to OTLP on the writer thread
+            self._queue.put_nowait((pending, end_ns))
+        except queue.Full:
+            self.dropped += 1
+
+    def on_span_start(self, span: Span[Any]) -> None:
+        pass
+
+    def on_span_end(self, span: Span[Any]) -> None:
+        with self._lock:
+            pending = self._pending.get(span.trace_id)
+            if pending is not None:
+                pending.spans.append(span)
+
+    def force_flush(self) -> None:
+        self._queue.join()
+
+    def shutdown(self) -> None:
+        try:
+            self._queue.put(_STOP, timeout=5.0)
+        except queue.Full:
+            logger.warning("Trace exporter did not drain before shutdown")
+            return
+        self._thread.join(timeout=5.0)
+
+    # -- Export --------------------------------------------------------------
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "exported": self.exported,
+            "sampled_out": self.sampled_out,
+            "dropped": self.dropped,
+            "queued": self._queue.qsize(),
+        }
+
+    def _keep(self, trace_id: str, duration_ms: float, errored: bool) -> bool:
+        if errored or (self.keep_slower_than_ms and duration_ms >= self.keep_slower_than_ms):
+            return True
+        # Deterministic per trace, so every process makes the same decision
+        return int(_trace_hex(trace_id)[-8:], 16) / 0x1_0000_0000 < self.sample_rate
+
+    def _export_request(self, pending: _PendingTrace, end_ns: int) -> dict[str, Any]:
+        trace = pending.trace
+        trace_hex = _trace_hex(trace.trace_id)
+        exported = trace.export() or {}
+        root = {
+            "traceId": trace_hex,
+            "spanId": pending.root_span_id,
+            "name": trace.name,
+            "kind": _KIND_INTERNAL,
+            "startTimeUnixNano": str(pending.start_ns),
+            "endTimeUnixNano": str(end_ns),
+            "attributes": _otlp_attributes(
+                {"trace.group_id": exported.get("group_id"), **(exported.get("metadata") or {})}
+            ),
+            "status": {"code": _STATUS_UNSET},
+        }
+        spans = [root]
+        for span in pending.spans:
+            name, attributes = describe_span(span)
+            status: dict[str, Any] = {"code": _STATUS_UNSET}
+            if span.error:
+                status = {"code": _STATUS_ERROR, "message": span.error.get("message", "")}
+            spans.append(
+                {
+                    "traceId": trace_hex,
+                    "spanId": _span_hex(span.span_id),
+                    "parentSpanId": (
+                        _span_hex(span.parent_id) if span.parent_id else pending.root_span_id
+                    ),
+                    "name": name,
+                    "kind": _KIND_INTERNAL,
+                    "startTimeUnixNano": str(_unix_nano(span.started_at)),
+                    "endTimeUnixNano": str(_unix_nano(span.ended_at)),
+                    "attributes": _otlp_attributes(attributes),
+                    "status": status,
+                }
+            )
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": _otlp_attributes({"service.name": SERVICE_NAME})},
+                    "scopeSpans": [{"scope": {"name": SERVICE_NAME}, "spans": spans}],
+                }
+            ]
+        }
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    if self._file is not None:
+                        self._file.close()
+                    return
+                if self._file is None:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    self._file = open(self.path, "a", encoding="utf-8")
+                request = self._export_request(*item)
+                self._file.write(json.dumps(request, separators=(",", ":")) + "\n")
+                if self._queue.empty():
+                    self._file.flush()
+                self.exported += 1
+            except Exception as e:
+                logger.error("Failed to write trace to %s: %s", self.path, e, exc_info=True)
+            finally:
+                self._queue.task_done()
+
+
+_exporter: Optional[OtlpFileExporter] = None
+_exporter_lock = threading.Lock()
+
+
+def setup_tracing(replace_default_processors: bool) -> bool:
+    """
+    Register the OTLP file exporter when TRACE_FILE is set (once per process).
+
+    Args:
+        replace_default_processors: Make the file the only trace destination
+            (used with the mock provider, so nothing leaves the machine)
+            instead of adding it next to the SDK's OpenAI exporter
+
+    Returns:
+        Whether local tracing is enabled
+    """
+    global _exporter
+    if not config.TRACE_FILE:
+        return False
+    with _exporter_lock:
+        if _exporter is None:
+            _exporter = OtlpFileExporter(config.TRACE_FILE)
+            if replace_default_processors:
+                set_trace_processors([_exporter])
+            else:
+                add_trace_processor(_exporter)
+            logger.info("Writing traces to %s", config.TRACE_FILE)
+    return True
+
+
+def get_trace_exporter() -> Optional[OtlpFileExporter]:
+    """Return the registered file exporter, if tracing to a file is enabled."""
+    return _exporter
+
+
+def app_span(name: str, data: Optional[dict[str, Any]] = None) -> Span[CustomSpanData]:
+    """
+    Custom span for app work that may also run outside a turn.
+
+    Sessions and guardrail checks are also called directly (benchmarks,
+    scripts), where there is no current trace; the SDK logs an error for
+    every span opened there, so the span is a no-op instead.
+    """
+    return custom_span(name, data, disabled=get_current_trace() is None)
+
+
+# =============================================================================
+# CRITICAL PATH REPORT
+# =============================================================================
+
+
+def _attributes(span: dict[str, Any]) -> dict[str, Any]:
+    values = {}
+    for attribute in span.get("attributes", []):
+        (value,) = attribute["value"].values()
+        values[attribute["key"]] = value
+    return values
+
+
+def _duration_ns(span: dict[str, Any]) -> int:
+    return int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])
+
+
+def load_traces(path: str | Path) -> dict[str, list[dict[str, Any]]]:
+    """Read an OTLP JSON lines file into spans grouped by trace ID."""
+    traces: dict[str, list[dict[str, Any]]] = {}
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            for resource_spans in json.loads(line).get("resourceSpans", []):
+                for scope_spans in resource_spans.get("scopeSpans", []):
+                    for span in scope_spans.get("spans", []):
+                        traces.setdefault(span["traceId"], []).append(span)
+    return traces
+
+
+def critical_path(spans: list[dict[str, Any]]) -> list[tuple[dict[str, Any], int, int]]:
+    """
+    Find the chain of spans that determined a trace's duration.
+
+    Starting at the root, each span's critical children are found by walking
+    back from its end: the child that finished last, then the child that
+    finished before that one started, and so on. Children running in parallel
+    with a critical child are off the path.
+
+    Returns:
+        (span, depth, self time in ns) for each span on the path, in start order
+    """
+    by_id = {span["spanId"]: span for span in spans}
+    children: dict[str, list[dict[str, Any]]] = {}
+    roots = []
+    for span in spans:
+        parent = span.get("parentSpanId")
+        if parent and parent in by_id:
+            children.setdefault(parent, []).append(span)
+        else:
+            roots.append(span)
+    if not roots:
+        return []
+
+    def walk(span: dict[str, Any], depth: int) -> list[tuple[dict[str, Any], int, int]]:
+        chosen = []
+        cursor = int(span["endTimeUnixNano"])
+        for child in sorted(
+            children.get(span["spanId"], []),
+            key=lambda child: int(child["endTimeUnixNano"]),
+            reverse=True,
+        ):
+            if int(child["endTimeUnixNano"]) <= cursor:
+                chosen.append(child)
+                cursor = int(child["startTimeUnixNano"])
+        chosen.reverse()
+        self_ns = _duration_ns(span) - sum(_duration_ns(child) for child in chosen)
+        path = [(span, depth, max(0, self_ns))]
+        for child in chosen:
+            path.extend(walk(child, depth + 1))
+        return path
+
+    return walk(max(roots, key=_duration_ns), 0)
+
+
+def format_critical_paths(traces: dict[str, list[dict[str, Any]]], slowest: int) -> str:
+    """Render the critical paths of the `slowest` longest traces."""
+    roots = []
+    for trace_id, spans in traces.items():
+        top = [span for span in spans if not span.get("parentSpanId")]
+        if top:
+            roots.append((max(_duration_ns(span) for span in top), trace_id))
+    lines = []
+    for duration_ns, trace_id in sorted(roots, reverse=True)[:slowest]:
+        path = critical_path(traces[trace_id])
+        root_attributes = _attributes(path[0][0])
+        details = ", ".join(
+            f"{key}={root_attributes[key]}"
+            for key in ("turn_id", "customer_id", "customer_tier", "final_agent", "outcome")
+            if key in root_attributes
+        )
+        lines.append(f"trace {trace_id}  {duration_ns / 1e6:.1f} ms  {details}")
+        for span, depth, self_ns in path:
+            lines.append(
+                f"  {_duration_ns(span) / 1e6:9.1f} ms  self {self_ns / 1e6:8.1f} ms  "
+                f"{'  ' * depth}{span['name']}"
+            )
+        lines.append("")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Print the critical path of the slowest turns")
+    parser.add_argument(
+        "path", nargs="?", default=config.TRACE_FILE or None, help="OTLP JSON lines trace file"
+    )
+    parser.add_argument("--slowest", type=int, default=5, help="Number of turns to show")
+    args = parser.parse_args()
+    if not args.path:
+        parser.error("no trace file given and TRACE_FILE is not set")
+    sys.stdout.write(format_critical_paths(load_traces(args.path), args.slowest))
+
+
+if __name__ == "__main__":
+    main()
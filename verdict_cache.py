@@ -0,0 +1,217 @@
+"""
+Guardrail verdict cache.
+
+Guardrail agents classify text with a full LLM round trip, yet many inputs
+("hi", "where is my order?") repeat constantly across customers.
+VerdictCache maps a normalized form of the text to the structured verdict
+the guardrail agent returned, so repeats skip the model call:
+
+- an in-memory LRU tier bounded by `max_entries`, with a TTL per entry
+- an optional SQLite tier (WAL mode) shared across restarts and processes,
+  bounded by `disk_max_entries`
+
+Keys are namespaced (e.g. by a hash of the guardrail instructions), so
+changing a guardrail prompt never serves verdicts from the old prompt.
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Generic, Optional, TypeVar
+
+from agents import TResponseInputItem
+from pydantic import BaseModel
+
+import config
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+V = TypeVar("V", bound=BaseModel)
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s.!?。！？~]+$")
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS guardrail_verdicts (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL,
+        expires_at REAL NOT NULL
+    )
+"""
+_SELECT = "SELECT value, expires_at FROM guardrail_verdicts WHERE key = ?"
+_UPSERT = "INSERT OR REPLACE INTO guardrail_verdicts (key, value, expires_at) VALUES (?, ?, ?)"
+_DELETE_EXPIRED = "DELETE FROM guardrail_verdicts WHERE expires_at <= ?"
+_DELETE_OLDEST = """
+    DELETE FROM guardrail_verdicts WHERE key IN (
+        SELECT key FROM guardrail_verdicts ORDER BY expires_at LIMIT ?
+    )
+"""
+_COUNT = "SELECT COUNT(*) FROM guardrail_verdicts"
+
+# Disk tier size is enforced every this many writes
+_PRUNE_EVERY = 500
+
+
+def latest_user_text(input: str | list[TResponseInputItem]) -> str:
+    """Return the newest user message in guardrail input (a string or item list)."""
+    if isinstance(input, str):
+        return input
+    for item in reversed(input):
+        if item.get("role") == "user":
+            content = item.get("content")
+            if isinstance(content, str):
+                return content
+            if isinstance(content, list):
+                return " ".join(
+                    part.get("text", "") for part in content if isinstance(part, dict)
+                )
+    return ""
+
+
+def has_history(input: str | list[TResponseInputItem]) -> bool:
+    """Whether guardrail input carries anything besides the newest user message."""
+    return not isinstance(input, str) and len(input) > 1
+
+
+def normalize_text(text: str) -> str:
+    """Case-fold, NFKC-normalize and collapse whitespace and trailing punctuation."""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = _WHITESPACE.sub(" ", text).strip()
+    return _TRAILING_PUNCTUATION.sub("", text)
+
+
+class VerdictCache(Generic[V]):
+    """
+    Two-tier TTL/LRU cache of guardrail verdicts.
+
+    Thread-safe: guardrails run on the service loop, while stats may be read
+    from other threads.
+    """
+
+    def __init__(
+        self,
+        model_type: type[V],
+        namespace: str = "",
+        max_entries: int = config.GUARDRAIL_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = config.GUARDRAIL_CACHE_TTL_SECONDS,
+        db_path: Optional[str | Path] = None,
+        disk_max_entries: int = config.GUARDRAIL_CACHE_DB_MAX_ENTRIES,
+        clock: Callable[[], float] = time.time,
+    ):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.model_type = model_type
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_max_entries = disk_max_entries
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk: Optional[sqlite3.Connection] = None
+        self._disk_writes = 0
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        if db_path:
+            self._disk = sqlite3.connect(str(db_path), check_same_thread=False)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute(f"PRAGMA busy_timeout={config.SQLITE_BUSY_TIMEOUT_MS}")
+            self._disk.execute(_SCHEMA)
+            self._disk.commit()
+
+    def key_for(self, text: str) -> str:
+        """Cache key for `text`: a hash of the namespace and the normalized text."""
+        normalized = normalize_text(text)
+        return hashlib.sha256(f"{self.namespace}\x00{normalized}".encode("utf-8")).hexdigest()
+
+    def get(self, text: str) -> Optional[V]:
+        """Return the cached verdict for `text`, or None on a miss."""
+        key = self.key_for(text)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+
+            if self._disk is not None:
+                row = self._disk.execute(_SELECT, (key,)).fetchone()
+                if row is not None and row[1] > now:
+                    value = self.model_type.model_validate_json(row[0])
+                    self._remember(key, row[1], value)
+                    self.disk_hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def put(self, text: str, value: V) -> None:
+        """Cache a verdict for `text` in every tier."""
+        key = self.key_for(text)
+        expires_at = self._clock() + self.ttl_seconds
+        with self._lock:
+            self._remember(key, expires_at, value)
+            if self._disk is not None:
+                self._disk.execute(_UPSERT, (key, value.model_dump_json(), expires_at))
+                self._disk.commit()
+                self._disk_writes += 1
+                if self._disk_writes % _PRUNE_EVERY == 0:
+                    self._prune_disk()
+
+    def clear(self) -> None:
+        """Drop every cached verdict (both tiers)."""
+        with self._lock:
+            self._entries.clear()
+            if self._disk is not None:
+                self._disk.execute("DELETE FROM guardrail_verdicts")
+                self._disk.commit()
+
+    def _remember(self, key: str, expires_at: float, value: V) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _prune_disk(self) -> None:
+        self._disk.execute(_DELETE_EXPIRED, (self._clock(),))
+        (count,) = self._disk.execute(_COUNT).fetchone()
+        if count > self.disk_max_entries:
+            self._disk.execute(_DELETE_OLDEST, (count - self.disk_max_entries,))
+        self._disk.commit()
+
+    def stats(self) -> dict[str, float]:
+        """Hit/miss counters and the current memory tier size."""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._disk is not None:
+                self._disk.close()
+                self._disk = None